@@ -0,0 +1,362 @@
+# analytics.py
+"""
+Attendance rollups, maintained as AttendanceStudent rows are written.
+
+Three MySQL tables hold the aggregates dashboards read. Each chart is
+then a primary-key lookup instead of a scan over years of raw rows:
+
+    EventAttendanceDaily     (eventID, theDATE)  attendees, first/last check-in
+    GroupAttendanceDaily     (groupID, eventID, theDATE)  members who attended
+                             out of the group's size on that day
+    StudentAttendanceStats   (studentID)  total, first/last seen, last event,
+                             current and longest weekly streak
+
+`update_rollups` runs inside the transaction that inserts the attendance
+rows (persist_checkins and the check-in worker). It only touches the
+(event, day) pairs and students in that batch. Event and group rows are
+recomputed from the event-day's own rows, which is cheap and idempotent,
+so retried or duplicate inserts cannot double count. Student rows are
+updated in place. The week of the newest attendance extends the streak,
+keeps it or resets it. A student whose new row lies before their last
+seen week (a late back-fill) is recomputed from their history instead.
+
+A streak is a run of consecutive weeks (Monday to Sunday) with at least
+one attendance. A group's rate only counts event-days at which at least
+one member attended.
+
+Fill the tables for existing data with:
+
+    python -m analytics rebuild
+"""
+import asyncio
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from archive import archived_attendance, history_key
+from database import async_mysql_conn, close_async_connections
+from loaders import in_placeholders
+from tenants import selected, use_tenant
+
+STUDENT_CHUNK = 1000
+
+# Week number that changes on Mondays (TO_DAYS('2024-01-01') % 7 == 2, a Monday)
+WEEK_SQL = "((TO_DAYS({}) - 2) DIV 7)"
+
+
+def week_of(day: date) -> int:
+    # date.toordinal() is TO_DAYS() - 365
+    return (day.toordinal() + 365 - 2) // 7
+
+
+def current_streak(last_week: int, streak: int) -> int:
+    """A stored streak as of today: still current until a whole week passes without attendance."""
+    return streak if last_week >= week_of(date.today()) - 1 else 0
+
+
+EVENT_DAY_SQL = """
+    INSERT INTO EventAttendanceDaily (eventID, theDATE, attendees, firstCheckIn, lastCheckIn)
+    SELECT eventID, theDATE, COUNT(*), MIN(theTime), MAX(theTime)
+    FROM AttendanceStudent
+    WHERE eventID = %s AND theDATE = %s
+    GROUP BY eventID, theDATE
+    ON DUPLICATE KEY UPDATE
+        attendees = VALUES(attendees),
+        firstCheckIn = VALUES(firstCheckIn),
+        lastCheckIn = VALUES(lastCheckIn)
+"""
+
+GROUP_DAY_SQL = """
+    INSERT INTO GroupAttendanceDaily (groupID, eventID, theDATE, attended, members)
+    SELECT gm.groupID, %s, %s, COUNT(a.ID), COUNT(*)
+    FROM GroupMember gm
+             LEFT JOIN AttendanceStudent a
+                       ON a.studentID = gm.studentID AND a.eventID = %s AND a.theDATE = %s
+    WHERE gm.groupID IN (
+        SELECT g.groupID
+        FROM AttendanceStudent s
+                 JOIN GroupMember g ON g.studentID = s.studentID
+        WHERE s.eventID = %s AND s.theDATE = %s
+    )
+    GROUP BY gm.groupID
+    ON DUPLICATE KEY UPDATE attended = VALUES(attended), members = VALUES(members)
+"""
+
+# Incremental student update. MySQL applies the assignments left to right,
+# so currentStreak and longestStreak still see the old lastWeek. Archived
+# rows (archive.py) count through AttendanceArchiveStudent; they are older
+# than the hot ones, so firstSeen only ever moves back.
+STUDENT_INCREMENT_SQL = """
+    INSERT INTO StudentAttendanceStats
+        (studentID, totalAttended, firstSeen, lastSeen, lastEventID, lastWeek, currentStreak, longestStreak)
+    SELECT a.studentID,
+           COUNT(*) + COALESCE((SELECT SUM(x.rowCount) FROM AttendanceArchiveStudent x
+                                WHERE x.studentID = a.studentID), 0),
+           MIN(a.theDATE), MAX(a.theDATE),
+           (SELECT l.eventID FROM AttendanceStudent l
+            WHERE l.studentID = a.studentID
+            ORDER BY l.theDATE DESC, l.timeKey DESC, l.ID DESC
+            LIMIT 1),
+           {week}, 1, 1
+    FROM AttendanceStudent a
+    WHERE a.studentID IN ({ids})
+    GROUP BY a.studentID
+    ON DUPLICATE KEY UPDATE
+        currentStreak = CASE
+            WHEN VALUES(lastWeek) = lastWeek THEN currentStreak
+            WHEN VALUES(lastWeek) = lastWeek + 1 THEN currentStreak + 1
+            ELSE 1
+        END,
+        longestStreak = GREATEST(longestStreak, currentStreak),
+        totalAttended = VALUES(totalAttended),
+        firstSeen = LEAST(firstSeen, VALUES(firstSeen)),
+        lastSeen = VALUES(lastSeen),
+        lastEventID = VALUES(lastEventID),
+        lastWeek = VALUES(lastWeek)
+"""
+
+STUDENT_UPSERT_SQL = """
+    INSERT INTO StudentAttendanceStats
+        (studentID, totalAttended, firstSeen, lastSeen, lastEventID, lastWeek, currentStreak, longestStreak)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        totalAttended = VALUES(totalAttended),
+        firstSeen = VALUES(firstSeen),
+        lastSeen = VALUES(lastSeen),
+        lastEventID = VALUES(lastEventID),
+        lastWeek = VALUES(lastWeek),
+        currentStreak = VALUES(currentStreak),
+        longestStreak = VALUES(longestStreak)
+"""
+
+
+def _chunks(ids: List[int]):
+    for i in range(0, len(ids), STUDENT_CHUNK):
+        yield ids[i:i + STUDENT_CHUNK]
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+# ---------- Incremental updates ----------
+
+async def refresh_event_days(conn, event_days: Iterable[Tuple[int, object]]) -> None:
+    """Recompute the event and group rollups of the given (eventID, theDATE) pairs."""
+    for event_id, day in sorted(set(event_days)):
+        await conn.execute(
+            "DELETE FROM EventAttendanceDaily WHERE eventID = %s AND theDATE = %s", (event_id, day)
+        )
+        await conn.execute(EVENT_DAY_SQL, (event_id, day))
+        await conn.execute(
+            "DELETE FROM GroupAttendanceDaily WHERE eventID = %s AND theDATE = %s", (event_id, day)
+        )
+        await conn.execute(GROUP_DAY_SQL, (event_id, day) * 3)
+
+
+async def refresh_students(conn, student_ids: Iterable[int]) -> None:
+    """Recompute students' stats from their full history, archive included (deletes and back-fills)."""
+    student_ids = sorted(set(student_ids))
+    for chunk in _chunks(student_ids):
+        rows = await conn.fetchall(
+            f"""
+            SELECT ID, studentID, eventID, theDATE, theTime
+            FROM AttendanceStudent
+            WHERE studentID IN ({in_placeholders(chunk)})
+            ORDER BY studentID, theDATE, theTime, ID
+            """,
+            chunk,
+        )
+        archived = await archived_attendance(conn, chunk)
+        if archived:
+            rows = sorted(
+                list(rows) + archived,
+                key=lambda row: (row["studentID"], history_key(row["theDATE"], row["theTime"], row["ID"])),
+            )
+        history: Dict[int, List[dict]] = {}
+        for row in rows:
+            history.setdefault(row["studentID"], []).append(row)
+
+        stats = [student_stats(sid, history[sid]) for sid in chunk if sid in history]
+        if stats:
+            await conn.executemany(STUDENT_UPSERT_SQL, stats)
+        gone = [sid for sid in chunk if sid not in history]
+        if gone:
+            await conn.execute(
+                f"DELETE FROM StudentAttendanceStats WHERE studentID IN ({in_placeholders(gone)})", gone
+            )
+
+
+def student_stats(student_id: int, rows: List[dict]) -> tuple:
+    """STUDENT_UPSERT_SQL parameters from a student's rows in chronological order."""
+    weeks = sorted({week_of(_as_date(row["theDATE"])) for row in rows})
+    longest = run = 1
+    for prev, week in zip(weeks, weeks[1:]):
+        run = run + 1 if week == prev + 1 else 1
+        longest = max(longest, run)
+    return (
+        student_id,
+        len(rows),
+        rows[0]["theDATE"],
+        rows[-1]["theDATE"],
+        rows[-1]["eventID"],
+        weeks[-1],
+        run,
+        longest,
+    )
+
+
+async def update_rollups(conn, rows: Iterable[tuple]) -> None:
+    """
+    Bring the rollups up to date with freshly inserted AttendanceStudent rows
+    `(eventID, studentID, theDATE, theTime)`. Call on the inserting
+    connection, inside its transaction.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    await refresh_event_days(conn, ((event_id, day) for event_id, _, day, _ in rows))
+
+    # Earliest new week per student: older than their last week means a back-fill
+    new_week: Dict[int, int] = {}
+    for _, student_id, day, _ in rows:
+        week = week_of(_as_date(day))
+        new_week[student_id] = min(week, new_week.get(student_id, week))
+
+    backfilled: Set[int] = set()
+    student_ids = sorted(new_week)
+    for chunk in _chunks(student_ids):
+        current = await conn.fetchall(
+            f"SELECT studentID, lastWeek FROM StudentAttendanceStats WHERE studentID IN ({in_placeholders(chunk)})",
+            chunk,
+        )
+        backfilled.update(
+            row["studentID"] for row in current if new_week[row["studentID"]] < row["lastWeek"]
+        )
+
+    incremental = [sid for sid in student_ids if sid not in backfilled]
+    for chunk in _chunks(incremental):
+        await conn.execute(
+            STUDENT_INCREMENT_SQL.format(week=WEEK_SQL.format("MAX(a.theDATE)"), ids=in_placeholders(chunk)),
+            chunk,
+        )
+    await refresh_students(conn, backfilled)
+
+
+# ---------- Reads ----------
+
+async def event_attendance(db, event_id: int) -> List[dict]:
+    return await db.fetchall(
+        """
+        SELECT eventID, theDATE, attendees, firstCheckIn, lastCheckIn
+        FROM EventAttendanceDaily
+        WHERE eventID = %s
+        ORDER BY theDATE
+        """,
+        (event_id,),
+    )
+
+
+async def attendance_trend(db, since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+    """Attendees per day across all events, from the daily event rollup."""
+    clauses, params = [], []
+    if since:
+        clauses.append("theDATE >= %s")
+        params.append(since)
+    if until:
+        clauses.append("theDATE <= %s")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return await db.fetchall(
+        f"""
+        SELECT theDATE, SUM(attendees) AS attendees, COUNT(*) AS events
+        FROM EventAttendanceDaily
+        {where}
+        GROUP BY theDATE
+        ORDER BY theDATE
+        """,
+        params,
+    )
+
+
+async def student_attendance_stats(db, student_id: int) -> Optional[dict]:
+    return await db.fetchone(
+        """
+        SELECT studentID, totalAttended, firstSeen, lastSeen, lastEventID, longestStreak,
+               IF(lastWeek >= %s, currentStreak, 0) AS currentStreak
+        FROM StudentAttendanceStats
+        WHERE studentID = %s
+        """,
+        # A streak is still current until a whole week passes without attendance
+        (week_of(date.today()) - 1, student_id),
+    )
+
+
+async def group_attendance(db, group_id: int) -> List[dict]:
+    return await db.fetchall(
+        """
+        SELECT groupID, eventID, theDATE, attended, members
+        FROM GroupAttendanceDaily
+        WHERE groupID = %s
+        ORDER BY theDATE, eventID
+        """,
+        (group_id,),
+    )
+
+
+# ---------- Rebuild ----------
+
+async def rebuild() -> Tuple[int, int]:
+    """
+    Recompute every rollup from AttendanceStudent. Returns (event-days, students).
+
+    Event and group rows of archived event-days are kept as they are; their
+    raw rows are no longer in MySQL to recompute them from.
+    """
+    async with async_mysql_conn() as conn:
+        await conn.begin()
+        try:
+            for table in ("EventAttendanceDaily", "GroupAttendanceDaily"):
+                await conn.execute(
+                    f"""
+                    DELETE FROM {table}
+                    WHERE NOT EXISTS (SELECT 1
+                                      FROM AttendanceArchiveSegment s
+                                      WHERE s.dataset = 'attendance_student'
+                                        AND s.eventID = {table}.eventID
+                                        AND {table}.theDATE BETWEEN s.minDate AND s.maxDate)
+                    """
+                )
+            await conn.execute("DELETE FROM StudentAttendanceStats")
+            days = await conn.fetchall("SELECT DISTINCT eventID, theDATE FROM AttendanceStudent")
+            await refresh_event_days(conn, ((d["eventID"], d["theDATE"]) for d in days))
+            students = await conn.fetchall(
+                """
+                SELECT studentID FROM AttendanceStudent
+                UNION
+                SELECT studentID FROM AttendanceArchiveStudent
+                """
+            )
+            await refresh_students(conn, (s["studentID"] for s in students))
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+    return len(days), len(students)
+
+
+async def main() -> None:
+    try:
+        for tenant in selected():
+            with use_tenant(tenant):
+                days, students = await rebuild()
+                print(f"{tenant.id}: attendance rollups rebuilt, {days} event-days, {students} students")
+    finally:
+        await close_async_connections()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m analytics rebuild")
+    asyncio.run(main())
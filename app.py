@@ -1,24 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import mysql.connector
 from bson import ObjectId
 from pydantic import BaseModel
-from typing import Any, List
+from typing import Any, List, Optional
 import redis
+import asyncio
 import os
+import time
 from database import (
-    get_db_connection,
-    get_mongo_db,
-    get_redis_conn,
+    MYSQL_ERRORS,
+    async_mysql_conn,
+    get_async_mongo_db,
     close_connections,
+    close_async_connections,
+    ensure_mongo_indexes,
+    get_async_mysql_pool,
     get_mysql_pool,
     get_mongo_client,
     get_redis_client,
 )
+from checkin_events import checkin_events
+from checkin_store import checkin_store
+from checkin_worker import CheckInWorker
 from extra_routes import router as extra_router
 from graphql_api import graphql_app
-from fastapi.responses import FileResponse
+from metrics import HTTP_DURATION, RequestStats, current_stats, register_collector, render_metrics, track
+from outbox import POLL_SECONDS as OUTBOX_POLL_SECONDS, outbox
+from pagination import ListSpec, fetch_page
+from persisted_queries import PersistedQueryMiddleware
+from query_cache import query_cache
+from search import name_index
+from static_assets import router as static_router
+from tenants import TenantMiddleware, UnknownTenant, all_tenants, use_tenant
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 
 # ------------------------------------------------------------------------------
@@ -30,9 +45,44 @@ async def lifespan(app: FastAPI):
     print("Application startup: initializing DB pools...")
     get_mysql_pool()
     get_mongo_client()
+    ensure_mongo_indexes()
     get_redis_client()
+    await get_async_mysql_pool()
+    for tenant in all_tenants():
+        with use_tenant(tenant):
+            try:
+                await name_index.ensure_built()
+            except Exception as e:
+                print(f"Search index not built ({tenant.id}): {e}")
+
+    # CHECKIN_WORKER=1 persists the check-in stream from this process; larger
+    # deployments run `python -m checkin_worker` separately instead.
+    worker, worker_task = None, None
+    if os.getenv("CHECKIN_WORKER", "0") == "1":
+        worker = CheckInWorker()
+        worker_task = asyncio.create_task(worker.run())
+
+    # Cleanup queued by deletes that was not drained right after its commit
+    outbox_task = asyncio.create_task(outbox.run()) if OUTBOX_POLL_SECONDS > 0 else None
+
+    # Other workers' cache bumps (memory query cache only; see query_cache.py)
+    cache_task = asyncio.create_task(query_cache.listen())
+
     yield
     print("Application shutdown: closing DB pools...")
+    cache_task.cancel()
+    if outbox_task is not None:
+        outbox.stop()
+        outbox_task.cancel()
+    if worker is not None:
+        worker.stop()
+        try:
+            await asyncio.wait_for(worker_task, timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        await worker.close()
+    await checkin_events.close()
+    await close_async_connections()
     close_connections()
 
 
@@ -47,6 +97,10 @@ app = FastAPI(
 # ------------------------------------------------------------------------------
 # CORS
 # ------------------------------------------------------------------------------
+# Selects the request's tenant (tenants.py); innermost, so every handler runs inside it
+app.add_middleware(TenantMiddleware)
+# Resolves persisted-query hashes on /graphql (inside CORS, so its errors get CORS headers)
+app.add_middleware(PersistedQueryMiddleware, path="/graphql")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -56,67 +110,114 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(UnknownTenant)
+async def unknown_tenant(request: Request, exc: UnknownTenant):
+    """Data routes called without a tenant on a multi-tenant deployment."""
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+# ------------------------------------------------------------------------------
+# METRICS
+# ------------------------------------------------------------------------------
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Collect per-request store calls and record HTTP latency by route template."""
+    token = current_stats.set(RequestStats())
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        HTTP_DURATION.observe(time.perf_counter() - start, request.method, path, status)
+        current_stats.reset(token)
+
+
+def query_cache_metrics():
+    stats = query_cache.stats()
+    lines = []
+    for name in ("hits", "misses", "evictions"):
+        lines.append(f"# TYPE query_cache_{name}_total counter")
+        lines.append(f"query_cache_{name}_total {stats[name]}")
+    return lines
+
+
+register_collector(query_cache_metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # ------------------------------------------------------------------------------
 # ROUTERS
 # ------------------------------------------------------------------------------
 app.include_router(extra_router)
 app.include_router(graphql_app, prefix="/graphql")
 
-@app.get("/events")
-def get_all_events():
-    """Return all events for the dashboard."""
-    try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT
-                ID AS id,
-                Type AS type,
-                Notes AS notes,
-                eventTypeID AS eventTypeId
-            FROM Event
-            ORDER BY ID
-        """)
-        events = cursor.fetchall()
-        return events
-
-    except mysql.connector.Error as err:
-        raise HTTPException(status_code=500, detail=f"MySQL Error: {err}")
 
-    finally:
-        if "cursor" in locals(): cursor.close()
-        if "cnx" in locals() and cnx.is_connected(): cnx.close()
+REST_STUDENT_LIST = ListSpec(
+    source="Student s",
+    columns={
+        "id": "s.ID",
+        "guardianID": "s.guardianID",
+        "firstName": "s.firstName",
+        "lastName": "s.lastName",
+        "guardianName": "CONCAT(g.firstName, ' ', g.lastName)",
+    },
+    order=["s.ID"],
+    joins={"guardian": "LEFT JOIN Guardian g ON s.guardianID = g.ID"},
+    join_fields={"guardianName": "guardian"},
+)
 
 
 @app.get("/students")
-def get_all_students():
-    """Return all students for the dashboard."""
+async def get_all_students(
+        response: Response,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        fields: Optional[str] = None,
+):
+    """
+    Return all students for the dashboard. Pass `limit`/`after` for keyset
+    pages (next cursor in X-Next-Cursor) and `fields=id,firstName` to
+    select only some columns.
+    """
+    async def load():
+        async with async_mysql_conn() as cnx:
+            return await cnx.fetchall("""
+                SELECT
+                    s.ID as id,
+                    s.guardianID,
+                    s.firstName,
+                    s.lastName,
+                    CONCAT(g.firstName, ' ', g.lastName) as guardianName
+                FROM Student s
+                LEFT JOIN Guardian g ON s.guardianID = g.ID
+                ORDER BY s.id
+            """)
+
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT
-                s.ID as id,
-                s.guardianID,
-                s.firstName,
-                s.lastName,
-                CONCAT(g.firstName, ' ', g.lastName) as guardianName
-            FROM Student s
-            LEFT JOIN Guardian g ON s.guardianID = g.ID
-            ORDER BY s.id
-        """)
-        students = cursor.fetchall()
-        return students
-
-    except mysql.connector.Error as err:
+        if limit is None and after is None and fields is None:
+            return await query_cache.get_or_load("students", "rest:all", load)
+
+        wanted = fields.split(",") if fields else REST_STUDENT_LIST.columns
+        async with async_mysql_conn() as cnx:
+            rows, page_info, _ = await fetch_page(cnx, REST_STUDENT_LIST, wanted, limit, after)
+        if page_info.hasNextPage:
+            response.headers["X-Next-Cursor"] = page_info.endCursor
+        return rows
+
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    except MYSQL_ERRORS as err:
         raise HTTPException(status_code=500, detail=f"MySQL Error: {err}")
 
-    finally:
-        if "cursor" in locals(): cursor.close()
-        if "cnx" in locals() and cnx.is_connected(): cnx.close()
-
 
 # ------------------------------------------------------------------------------
 # EVENT-TYPE MONGO + REDIS ENDPOINTS (Your existing logic)
@@ -132,29 +233,22 @@ class myEventType(BaseModel):
 
 
 @app.post("/events-types")
-def create_eventType(event_type: myEventType):
+async def create_eventType(event_type: myEventType):
     """Create new EventType in MySQL + Mongo."""
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        cursor.execute(
-            "INSERT INTO EVENT_TYPE (name) VALUES (%s);",
-            (event_type.name,)
-        )
-        cnx.commit()
-        event_type_id = cursor.lastrowid
+        async with async_mysql_conn() as cnx:
+            await cnx.execute(
+                "INSERT INTO EVENT_TYPE (name) VALUES (%s);",
+                (event_type.name,)
+            )
+            event_type_id = cnx.lastrowid
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
 
-    finally:
-        if "cursor" in locals(): cursor.close()
-        if "cnx" in locals() and cnx.is_connected(): cnx.close()
-
     # Now insert into Mongo
     try:
-        db = get_mongo_db()
+        db = get_async_mongo_db()
         coll = db["event_types"]
 
         document = {
@@ -163,7 +257,8 @@ def create_eventType(event_type: myEventType):
             "fields": [{"Type": f.type, "Notes": f.note} for f in event_type.fields]
         }
 
-        result = coll.insert_one(document)
+        with track("mongo"):
+            result = await coll.insert_one(document)
         return {"mysql_id": event_type_id, "mongo_id": str(result.inserted_id)}
 
     except Exception as e:
@@ -179,21 +274,20 @@ class CheckInEvent(BaseModel):
     studentID: int
 
 @app.post("/event/check-in")
-def check_in_student(check: CheckInEvent):
+async def check_in_student(check: CheckInEvent):
     """Write a student check-in to Redis."""
     try:
         # Validate event exists
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        cursor.execute("SELECT ID FROM Event WHERE ID = %s", (check.eventID,))
-        event = cursor.fetchone()
+        async with async_mysql_conn() as cnx:
+            event = await cnx.fetchone("SELECT ID FROM Event WHERE ID = %s", (check.eventID,))
+    except MYSQL_ERRORS as err:
+        raise HTTPException(status_code=500, detail=f"MySQL Error: {err}")
 
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
 
-        r = get_redis_conn()
-        r.sadd(f"event:{check.eventID}:checkins", check.studentID)
+    try:
+        await checkin_store.check_in(check.eventID, check.studentID)
 
         return {
             "event_id": check.eventID,
@@ -204,39 +298,12 @@ def check_in_student(check: CheckInEvent):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
-    finally:
-        if "cursor" in locals(): cursor.close()
-        if "cnx" in locals() and cnx.is_connected(): cnx.close()
-
-
-@app.get("/")
-@app.get("/leader-login.html")
-def login_page():
-    return FileResponse("frontend/leader-login.html")
-
-@app.get("/index.html")
-def index_page():
-    return FileResponse("frontend/index.html")
-
-@app.get("/student.html")
-def student_page():
-    return FileResponse("frontend/student.html")
-
-@app.get("/styles.css")
-def styles():
-    return FileResponse("frontend/styles.css")
 
-@app.get("/app.js")
-def app_js():
-    return FileResponse("frontend/app.js")
+# Frontend pages, scripts and styles (static_assets.py); registered last so
+# API routes take precedence
+app.include_router(static_router)
 
-@app.get("/student.js")
-def student_js():
-    return FileResponse("frontend/student.js")
 
-@app.get("/leader-login.js")
-def leader_login_js():
-    return FileResponse("frontend/leader-login.js")
 # ------------------------------------------------------------------------------
 # RUN APP
 # ------------------------------------------------------------------------------
@@ -0,0 +1,399 @@
+# archive.py
+"""
+Cold storage for old attendance: columnar segment files on local disk.
+
+`archive_attendance` moves AttendanceStudent and AttendanceRecord rows
+older than ARCHIVE_HORIZON_DAYS out of MySQL into append-only segment
+files, one per (table, year, event) and run:
+
+    ARCHIVE_DIR/attendance_student/year=2023/event=12/part-20250101T020000-1a2b3c4d.col
+
+(under ARCHIVE_DIR/<tenant>/ on a multi-tenant deployment, see tenants.py).
+
+A segment stores each column as a zlib-compressed little-endian array
+(strings as a compressed JSON list) behind a small JSON header. A reader
+memory-maps the file and decompresses only the columns it needs. Files
+are written next to their final name and renamed into place. They are
+then registered in AttendanceArchiveSegment, and the per-student row
+counts go into AttendanceArchiveStudent. The rows are deleted from MySQL
+in the same transaction as that registration. A crash leaves at worst an
+unregistered file, which readers never see and `vacuum` removes.
+
+Rollups (analytics.py) are left as they are: they already count the
+archived rows. `studentAttendance(includeArchived: true)` merges a
+student's hot rows with the archived ones. AttendanceArchiveStudent says
+which segments to open, so other students' files are never touched.
+Deleting a student or event (cascade.py) removes their index rows, which
+makes the archived rows unreachable. `vacuum` deletes files that no
+segment references any more.
+
+    python -m archive run [--horizon-days N]
+    python -m archive vacuum
+"""
+import asyncio
+import json
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from database import async_mysql_conn, close_async_connections
+from loaders import in_placeholders
+from profiles import student_profiles
+from tenants import MULTI_TENANT, current, selected, use_tenant
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "730"))
+MAGIC = b"YGCOL1\n"
+CHUNK = 1000
+
+# Archived table -> (columns in file order, column types)
+#   int32/int64: array typecodes "i"/"q"; date: days since 0001-01-01 (int32);
+#   time: seconds since midnight (int32); str: JSON list of strings / nulls
+DATASETS = {
+    "attendance_student": (
+        "AttendanceStudent",
+        [("ID", "int64"), ("studentID", "int32"), ("theDATE", "date"), ("theTime", "time")],
+    ),
+    "attendance_record": (
+        "AttendanceRecord",
+        [("ID", "int64"), ("theDATE", "date"), ("theTime", "time"), ("RSVP", "str")],
+    ),
+}
+
+TYPECODES = {"int32": "i", "int64": "q", "date": "i", "time": "i"}
+
+
+# ---------- Segment files ----------
+
+def _seconds(value) -> int:
+    """MySQL TIME (timedelta, time, "H:MM:SS" or seconds) as seconds since midnight; -1 for NULL."""
+    if value is None:
+        return -1
+    if isinstance(value, int):
+        return value
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    if isinstance(value, str):
+        h, m, s = value.split(":")
+        return int(h) * 3600 + int(m) * 60 + int(float(s))
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _encode(kind: str, values: list) -> bytes:
+    if kind == "str":
+        raw = json.dumps(values).encode("utf-8")
+    else:
+        if kind == "date":
+            values = [v.toordinal() for v in values]
+        elif kind == "time":
+            values = [_seconds(v) for v in values]
+        arr = array(TYPECODES[kind], values)
+        if arr.itemsize * 8 != (64 if kind == "int64" else 32):
+            raise RuntimeError(f"Unexpected item size for {kind} on this platform")
+        raw = arr.tobytes() if struct.pack("=H", 1) == struct.pack("<H", 1) else _swapped(arr)
+    return zlib.compress(raw, 6)
+
+
+def _swapped(arr: array) -> bytes:
+    arr = array(arr.typecode, arr)
+    arr.byteswap()
+    return arr.tobytes()
+
+
+def _decode(kind: str, data: bytes) -> list:
+    raw = zlib.decompress(data)
+    if kind == "str":
+        return json.loads(raw)
+    arr = array(TYPECODES[kind])
+    arr.frombytes(raw)
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        arr.byteswap()
+    if kind == "date":
+        return [date.fromordinal(v) for v in arr]
+    if kind == "time":
+        # timedelta, as the MySQL drivers return TIME columns
+        return [None if v < 0 else timedelta(seconds=v) for v in arr]
+    return arr.tolist()
+
+
+def write_segment(path: str, columns: Sequence[Tuple[str, str]], rows: List[dict]) -> None:
+    """Write `rows` as a new segment at `path` (atomically, via rename)."""
+    blocks, header_columns, offset = [], [], 0
+    for name, kind in columns:
+        block = _encode(kind, [row[name] for row in rows])
+        header_columns.append({"name": name, "type": kind, "offset": offset, "length": len(block)})
+        blocks.append(block)
+        offset += len(block)
+    header = json.dumps({"rows": len(rows), "columns": header_columns}).encode()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_segment(path: str, names: Optional[Iterable[str]] = None) -> Dict[str, list]:
+    """Columns of a segment (only `names` if given), read through mmap."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            if bytes(view[:len(MAGIC)]) != MAGIC:
+                raise ValueError(f"{path} is not an archive segment")
+            (header_len,) = struct.unpack_from("<I", view, len(MAGIC))
+            start = len(MAGIC) + 4
+            header = json.loads(bytes(view[start:start + header_len]))
+            base = start + header_len
+            wanted = set(names) if names is not None else None
+            out = {}
+            for col in header["columns"]:
+                if wanted is None or col["name"] in wanted:
+                    with view[base + col["offset"]:base + col["offset"] + col["length"]] as block:
+                        out[col["name"]] = _decode(col["type"], block)
+            return out
+        finally:
+            view.release()
+
+
+def student_rows(path: str, student_ids: set) -> List[dict]:
+    """The rows of `student_ids` in an attendance_student segment."""
+    students = read_segment(path, ["studentID"])["studentID"]
+    hits = [i for i, sid in enumerate(students) if sid in student_ids]
+    if not hits:
+        return []
+    cols = read_segment(path, ["ID", "theDATE", "theTime"])
+    return [
+        {"ID": cols["ID"][i], "studentID": students[i], "theDATE": cols["theDATE"][i], "theTime": cols["theTime"][i]}
+        for i in hits
+    ]
+
+
+# ---------- Reads ----------
+
+def history_key(day, at, row_id) -> tuple:
+    """
+    Sort key of an attendance row, from column values or from the
+    (theDATE, theTime seconds, ID) values of an attendance cursor.
+    """
+    return str(day), _seconds(at), int(row_id)
+
+
+async def archived_attendance(
+        db, student_ids: Sequence[int], since: Optional[str] = None, until: Optional[str] = None
+) -> List[dict]:
+    """
+    Archived AttendanceStudent rows (ID, eventID, studentID, theDATE,
+    theTime) of the given students, opening only their segments, and of
+    those only the ones overlapping [since, until] (ISO dates) if given.
+    """
+    rows: List[dict] = []
+    for i in range(0, len(student_ids), CHUNK):
+        chunk = list(student_ids[i:i + CHUNK])
+        where, params = [f"a.studentID IN ({in_placeholders(chunk)})"], list(chunk)
+        if since is not None:
+            where.append("s.maxDate >= %s")
+            params.append(since)
+        if until is not None:
+            where.append("s.minDate <= %s")
+            params.append(until)
+        segments = await db.fetchall(
+            f"""
+            SELECT DISTINCT s.ID, s.eventID, s.path
+            FROM AttendanceArchiveStudent a
+                     JOIN AttendanceArchiveSegment s ON s.ID = a.segmentID
+            WHERE {" AND ".join(where)}
+            """,
+            params,
+        )
+        wanted = set(chunk)
+        for seg in segments:
+            found = await asyncio.to_thread(student_rows, os.path.join(tenant_dir(), seg["path"]), wanted)
+            rows.extend({**row, "eventID": seg["eventID"]} for row in found)
+    return rows
+
+
+async def has_archived(db, student_id: int, until: str) -> bool:
+    """Whether the student has archived rows in a segment starting on or before `until`."""
+    row = await db.fetchone(
+        """
+        SELECT 1 AS found
+        FROM AttendanceArchiveStudent a
+                 JOIN AttendanceArchiveSegment s ON s.ID = a.segmentID
+        WHERE a.studentID = %s AND s.minDate <= %s
+        LIMIT 1
+        """,
+        (student_id, until),
+    )
+    return row is not None
+
+
+async def student_history(
+        db, student_id: int, older_than: Optional[tuple] = None, newer_than: Optional[tuple] = None
+) -> List[dict]:
+    """
+    A student's archived attendance shaped like AttendanceRecordType rows,
+    newest first, optionally only between two `history_key`s (exclusive).
+    Segments outside those dates are not opened.
+    """
+    rows = await archived_attendance(
+        db, [student_id],
+        since=newer_than[0] if newer_than else None,
+        until=older_than[0] if older_than else None,
+    )
+    rows = [
+        row for row in rows
+        if (older_than is None or history_key(row["theDATE"], row["theTime"], row["ID"]) < older_than)
+        and (newer_than is None or history_key(row["theDATE"], row["theTime"], row["ID"]) > newer_than)
+    ]
+    event_ids = sorted({row["eventID"] for row in rows})
+    names = {}
+    if event_ids:
+        events = await db.fetchall(
+            f"SELECT ID, Type FROM Event WHERE ID IN ({in_placeholders(event_ids)})", event_ids
+        )
+        names = {event["ID"]: event["Type"] for event in events}
+    history = [
+        {
+            "id": row["ID"],
+            "eventId": row["eventID"],
+            "studentId": row["studentID"],
+            "theDATE": row["theDATE"],
+            "theTime": row["theTime"],
+            "eventName": names.get(row["eventID"]),
+        }
+        for row in rows
+    ]
+    history.sort(key=lambda row: history_key(row["theDATE"], row["theTime"], row["id"]), reverse=True)
+    return history
+
+
+def tenant_dir() -> str:
+    """The current tenant's segment directory (ARCHIVE_DIR/<tenant> when multi-tenant)."""
+    return os.path.join(ARCHIVE_DIR, current().id) if MULTI_TENANT else ARCHIVE_DIR
+
+
+# ---------- Archiving ----------
+
+def _segment_path(dataset: str, year: int, event_id: int) -> str:
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    return os.path.join(dataset, f"year={year}", f"event={event_id}", f"part-{stamp}-{uuid.uuid4().hex[:8]}.col")
+
+
+async def _archive_partition(dataset: str, event_id: int, year: int, cutoff: date) -> int:
+    table, columns = DATASETS[dataset]
+    names = ", ".join(name for name, _ in columns)
+    async with async_mysql_conn() as conn:
+        await conn.begin()
+        path = None
+        try:
+            rows = await conn.fetchall(
+                f"""
+                SELECT {names}
+                FROM {table}
+                WHERE eventID = %s AND theDATE >= %s AND theDATE < %s
+                ORDER BY theDATE, ID
+                FOR UPDATE
+                """,
+                (event_id, date(year, 1, 1), min(cutoff, date(year + 1, 1, 1))),
+            )
+            if not rows:
+                await conn.rollback()
+                return 0
+
+            path = _segment_path(dataset, year, event_id)
+            await asyncio.to_thread(write_segment, os.path.join(tenant_dir(), path), columns, rows)
+            await conn.execute(
+                """
+                INSERT INTO AttendanceArchiveSegment (dataset, eventID, year, path, rowCount, minDate, maxDate)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                (dataset, event_id, year, path, len(rows), rows[0]["theDATE"], rows[-1]["theDATE"]),
+            )
+            segment_id = conn.lastrowid
+            if dataset == "attendance_student":
+                per_student: Dict[int, int] = {}
+                for row in rows:
+                    per_student[row["studentID"]] = per_student.get(row["studentID"], 0) + 1
+                await conn.executemany(
+                    "INSERT INTO AttendanceArchiveStudent (segmentID, studentID, rowCount) VALUES (%s, %s, %s)",
+                    [(segment_id, sid, n) for sid, n in per_student.items()],
+                )
+            ids = [row["ID"] for row in rows]
+            for i in range(0, len(ids), CHUNK):
+                chunk = ids[i:i + CHUNK]
+                await conn.execute(f"DELETE FROM {table} WHERE ID IN ({in_placeholders(chunk)})", chunk)
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            if path is not None and os.path.exists(os.path.join(tenant_dir(), path)):
+                os.remove(os.path.join(tenant_dir(), path))
+            raise
+    if dataset == "attendance_student":
+        # Their portal profiles list recent attendance from MySQL
+        await student_profiles.refresh(row["studentID"] for row in rows)
+    return len(rows)
+
+
+async def archive_attendance(horizon_days: int = HORIZON_DAYS) -> Dict[str, int]:
+    """Archive every row older than the horizon, one transaction per partition."""
+    cutoff = date.today() - timedelta(days=horizon_days)
+    moved = {}
+    for dataset, (table, _) in DATASETS.items():
+        async with async_mysql_conn() as conn:
+            partitions = await conn.fetchall(
+                f"SELECT DISTINCT eventID, YEAR(theDATE) AS year FROM {table} WHERE theDATE < %s",
+                (cutoff,),
+            )
+        moved[dataset] = 0
+        for part in sorted(partitions, key=lambda p: (p["year"], p["eventID"])):
+            moved[dataset] += await _archive_partition(dataset, part["eventID"], part["year"], cutoff)
+    return moved
+
+
+async def vacuum() -> int:
+    """Delete segment files that are no longer registered (deleted events, crashed runs)."""
+    # Files younger than this may belong to a run that has not committed yet
+    settled = datetime.now().timestamp() - 3600
+    async with async_mysql_conn() as conn:
+        registered = {row["path"] for row in await conn.fetchall("SELECT path FROM AttendanceArchiveSegment")}
+    base = tenant_dir()
+    removed = 0
+    for root, _, files in os.walk(base):
+        for name in files:
+            full = os.path.join(root, name)
+            if os.path.relpath(full, base) not in registered and os.path.getmtime(full) < settled:
+                os.remove(full)
+                removed += 1
+    return removed
+
+
+async def main(argv: List[str]) -> None:
+    try:
+        if argv[:1] == ["run"]:
+            horizon = int(argv[2]) if argv[1:2] == ["--horizon-days"] and len(argv) > 2 else HORIZON_DAYS
+        elif argv != ["vacuum"]:
+            raise SystemExit("usage: python -m archive run [--horizon-days N] | vacuum")
+        for tenant in selected():
+            with use_tenant(tenant):
+                if argv[0] == "run":
+                    moved = await archive_attendance(horizon)
+                    print(f"{tenant.id}: archived rows older than {horizon} days: {moved}")
+                else:
+                    print(f"{tenant.id}: removed {await vacuum()} unreferenced segment files")
+    finally:
+        await close_async_connections()
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(main(sys.argv[1:]))
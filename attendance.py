@@ -0,0 +1,71 @@
+# attendance.py
+"""
+Bulk persistence of Redis check-ins into AttendanceStudent.
+
+The check-ins are drained atomically into a per-event "persisting" key by
+`checkin_store.drain`, so check-ins that arrive while we write to MySQL land
+in a fresh key instead of being deleted. All rows are written with one
+`executemany` (sent as a multi-row INSERT) inside a single transaction, and
+the UNIQUE (eventID, studentID, theDATE) constraint turns retries into
+no-ops. The attendance rollups (analytics.py) are updated in the same
+transaction, and the students' portal profiles (profiles.py) are rebuilt
+after the commit. If the write fails, the drained IDs are merged back into the live
+key; if the process dies mid-write, the next call picks up the leftovers
+from the persisting key.
+"""
+from datetime import date, datetime
+from typing import Optional
+
+from analytics import update_rollups
+from checkin_store import checkin_store
+from database import async_mysql_conn
+from profiles import student_profiles
+
+INSERT_SQL = """
+    INSERT INTO AttendanceStudent (eventID, studentID, theDATE, theTime)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE ID = ID
+"""
+
+
+async def persist_checkins(event_id: int) -> int:
+    """
+    Persist the event's check-ins in one transaction and clear them from
+    Redis. Returns the number of students persisted.
+
+    With day partitions every recorded day is drained, each in its own
+    transaction and dated that day.
+    """
+    days = await checkin_store.days(event_id) or [None]
+    return sum([await _persist_day(event_id, day) for day in days])
+
+
+async def _persist_day(event_id: int, day: Optional[date]) -> int:
+    student_ids = await checkin_store.drain(event_id, day)
+    if not student_ids:
+        await checkin_store.discard_pending(event_id, day)
+        return 0
+
+    now = datetime.now()
+    date_str = (day or now.date()).isoformat()
+    # Earlier days' check-in times are unknown here (the stream worker has them)
+    time_str = now.time().replace(microsecond=0).isoformat() if day in (None, now.date()) else None
+    rows = [(event_id, sid, date_str, time_str) for sid in student_ids]
+
+    try:
+        async with async_mysql_conn() as conn:
+            await conn.begin()
+            try:
+                await conn.executemany(INSERT_SQL, rows)
+                await update_rollups(conn, rows)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+    except Exception:
+        await checkin_store.restore(event_id, day)
+        raise
+
+    await checkin_store.discard_pending(event_id, day)
+    await student_profiles.refresh(student_ids)
+    return len(student_ids)
@@ -0,0 +1,12 @@
+"""
+Reproducible load tests for the youth ministry API.
+
+    docker compose -f bench/docker-compose.yml up -d   # local MySQL, Mongo, Redis
+    source bench/bench.env                             # point the app at them
+    python -m bench.seed                               # 10k students, 1M attendance rows
+    uvicorn app:app --port 8000 &                      # the app under test
+    python -m bench.run --save bench/baseline.json     # drive the frontend's operations
+    python -m bench.run --compare bench/baseline.json  # later: compare against a baseline
+
+See bench/run.py for the operations and report format.
+"""
@@ -0,0 +1,244 @@
+# bench/run.py
+"""
+Drive the GraphQL operations the frontend sends and report latency.
+
+Each operation is fired `--requests` times by `--concurrency` concurrent
+clients against a running server. The report gives p50/p95/p99 latency,
+mean, error count and throughput per operation, and can be saved as a
+JSON baseline and compared against one from an earlier commit:
+
+    python -m bench.run --save bench/baseline.json
+    python -m bench.run --compare bench/baseline.json --tolerance 0.15
+
+`--compare` exits with status 1 if any operation's p99 grows, or its
+throughput drops, by more than the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset.json")
+
+# Query text copied from frontend/app.js so the server sees what browsers send
+OPERATIONS = {
+    "MultiDbQuery": """
+      query MultiDbQuery($eventId: Int!) {
+        eventDetails(eventId: $eventId) {
+          Type
+          Notes
+          currentlyCheckedIn
+          liveAttendeeCount
+          notesCount
+        }
+      }
+    """,
+    "GetAllGroups": """
+      query GetAllGroups {
+        groups {
+          id
+          name
+          memberCount
+          members {
+            id
+            firstName
+            lastName
+          }
+          leaders {
+            id
+            firstName
+            lastName
+          }
+        }
+      }
+    """,
+    "StudentAttendance": """
+      query StudentAttendance($studentId: Int!) {
+        studentAttendance(studentId: $studentId) {
+          id
+          eventId
+          theDATE
+          theTime
+          eventName
+        }
+      }
+    """,
+    "checkIn": """
+      mutation CheckIn($eventId: Int!, $studentId: Int!) {
+        checkIn(eventId: $eventId, studentId: $studentId) {
+          status
+        }
+      }
+    """,
+    "persistAttendance": """
+      mutation Persist($eventId: Int!) {
+        persistAttendance(eventId: $eventId) {
+          count
+        }
+      }
+    """,
+}
+
+
+def variables_for(op: str, dataset: dict, rng: random.Random) -> dict:
+    live = dataset["liveEvents"]
+    if op == "MultiDbQuery":
+        return {"eventId": rng.choice(live)}
+    if op == "StudentAttendance":
+        return {"studentId": rng.randint(1, dataset["students"])}
+    if op == "checkIn":
+        return {"eventId": rng.choice(live), "studentId": rng.randint(1, dataset["students"])}
+    if op == "persistAttendance":
+        # Runs after checkIn, so the first calls drain what checkIn wrote
+        return {"eventId": rng.choice(live)}
+    return {}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_operation(client, url, op, dataset, requests, concurrency, seed):
+    rng = random.Random(seed)
+    payloads = [{"query": OPERATIONS[op], "variables": variables_for(op, dataset, rng)} for _ in range(requests)]
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for p in payloads:
+        queue.put_nowait(p)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                payload = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                res = await client.post(url, json=payload)
+                body = res.json()
+                if res.status_code != 200 or body.get("errors"):
+                    errors += 1
+            except (httpx.HTTPError, ValueError):
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, dataset):
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for op in args.operations:
+            # Warm caches and connection pools before measuring
+            await run_operation(client, args.url, op, dataset, min(args.warmup, args.requests),
+                                args.concurrency, args.seed + 1)
+            results[op] = await run_operation(client, args.url, op, dataset, args.requests,
+                                              args.concurrency, args.seed)
+            r = results[op]
+            print(f"{op:20s} p50={r['p50_ms']:8.2f}ms p99={r['p99_ms']:8.2f}ms "
+                  f"rps={r['throughput_rps']:8.1f} errors={r['errors']}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressed = False
+    print(f"\n{'operation':20s} {'p99 base':>10s} {'p99 now':>10s} {'Δp99':>8s} {'rps base':>10s} {'rps now':>10s} {'Δrps':>8s}")
+    for op, now in results.items():
+        base = baseline["results"].get(op)
+        if not base:
+            print(f"{op:20s} (not in baseline)")
+            continue
+        d_p99 = (now["p99_ms"] - base["p99_ms"]) / base["p99_ms"] if base["p99_ms"] else 0.0
+        d_rps = (now["throughput_rps"] - base["throughput_rps"]) / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        flag = ""
+        if d_p99 > tolerance or d_rps < -tolerance:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{op:20s} {base['p99_ms']:10.2f} {now['p99_ms']:10.2f} {d_p99:+8.1%} "
+              f"{base['throughput_rps']:10.1f} {now['throughput_rps']:10.1f} {d_rps:+8.1%}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GraphQL operations used by the frontend.")
+    parser.add_argument("--url", default="http://localhost:8000/graphql")
+    parser.add_argument("--operations", nargs="+", default=list(OPERATIONS), choices=list(OPERATIONS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=125)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(DATASET_PATH):
+        print("bench/dataset.json not found; run `python -m bench.seed` first.")
+        return 2
+    with open(DATASET_PATH) as f:
+        dataset = json.load(f)
+
+    results = asyncio.run(run(args, dataset))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "dataset": dataset,
+        },
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# bench/scale.py
+"""
+Measure how throughput scales with the number of workers.
+
+For each worker count the app is started under gunicorn (gunicorn.conf.py)
+with WEB_CONCURRENCY set to that count, pinned to as many CPUs with
+taskset when available, so N workers get N cores. Then bench.run
+drives the read operations against it. The report gives each operation's
+throughput and p99 per worker count, and the speedup over the smallest
+count:
+
+    python -m bench.scale --workers 1 2 4 8 --save bench/scale.json
+
+Run it on a machine with at least as many cores as the largest count, with
+MySQL, Mongo and Redis on other cores or hosts (bench/docker-compose.yml
+with --cpuset, or separate machines). Otherwise the measurement is
+bounded by the databases, not the workers. Pool sizes are divided
+between workers (MYSQL_ASYNC_POOL_SIZE = --connections / workers) so
+every run holds the same number of MySQL connections.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from bench.run import DATASET_PATH, OPERATIONS, git_commit, run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READ_OPERATIONS = ["MultiDbQuery", "GetAllGroups", "StudentAttendance"]
+
+
+def start_server(workers: int, port: int, connections: int, pin: bool) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{port}",
+        MYSQL_ASYNC_POOL_SIZE=str(max(1, connections // workers)),
+        MYSQL_POOL_MAX_SIZE=str(max(2, connections // workers // 4)),
+    )
+    cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    if pin and shutil.which("taskset"):
+        cmd = ["taskset", "-c", f"0-{workers - 1}"] + cmd
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, start_new_session=True)
+
+
+def wait_ready(port: int, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server not ready after {timeout:.0f}s")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+
+def report(results: dict, operations) -> None:
+    counts = sorted(results)
+    base = counts[0]
+    print(f"\n{'operation':20s} {'workers':>7s} {'rps':>10s} {'p99 ms':>9s} {'speedup':>8s} {'per worker':>11s}")
+    for op in operations:
+        for n in counts:
+            r = results[n][op]
+            base_rps = results[base][op]["throughput_rps"]
+            speedup = r["throughput_rps"] / base_rps if base_rps else 0.0
+            print(f"{op:20s} {n:7d} {r['throughput_rps']:10.1f} {r['p99_ms']:9.2f} "
+                  f"{speedup:7.2f}x {speedup * base / n:10.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark throughput against the number of workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--operations", nargs="+", default=READ_OPERATIONS, choices=list(OPERATIONS))
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=125)
+    parser.add_argument("--connections", type=int, default=64, help="MySQL connections shared by all workers")
+    parser.add_argument("--no-pin", dest="pin", action="store_false", help="do not pin workers to CPUs")
+    parser.add_argument("--save", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(DATASET_PATH):
+        print("bench/dataset.json not found; run `python -m bench.seed` first.")
+        return 2
+    with open(DATASET_PATH) as f:
+        dataset = json.load(f)
+    if max(args.workers) > (os.cpu_count() or 1):
+        print(f"warning: {max(args.workers)} workers on {os.cpu_count()} CPUs; larger counts cannot scale")
+
+    results = {}
+    for n in sorted(set(args.workers)):
+        print(f"\n== {n} worker(s)")
+        server = start_server(n, args.port, args.connections, args.pin)
+        try:
+            wait_ready(args.port, server)
+            run_args = argparse.Namespace(**vars(args), url=f"http://127.0.0.1:{args.port}/graphql")
+            results[n] = asyncio.run(run(run_args, dataset))
+        finally:
+            stop_server(server)
+
+    report(results, args.operations)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "timestamp": datetime.utcnow().isoformat() + "Z",
+                    "cpus": os.cpu_count(),
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "connections": args.connections,
+                    "dataset": dataset,
+                },
+                "results": {str(n): r for n, r in results.items()},
+            }, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
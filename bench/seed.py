@@ -0,0 +1,214 @@
+# bench/seed.py
+"""
+Generate a synthetic church for load testing.
+
+Recreates the MySQL schema from schema.sql, then bulk-loads guardians,
+students, leaders, volunteers, groups, events and attendance history, plus
+Mongo meeting notes and live Redis check-ins. The generator is seeded, so
+the same arguments always produce the same dataset. The ID ranges are
+written to bench/dataset.json for bench.run to pick realistic variables.
+
+    python -m bench.seed [--students 10000] [--attendance 1000000] [--seed 125]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+from database import (
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_PORT,
+    DB_USER,
+    get_mongo_db,
+    get_redis_client,
+)
+from migrate import split_statements
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset.json")
+BATCH = 5000
+
+FIRST_NAMES = [
+    "Ava", "Ben", "Chloe", "Daniel", "Ella", "Finn", "Grace", "Henry", "Isla", "Jack",
+    "Kai", "Lily", "Mason", "Nora", "Owen", "Piper", "Quinn", "Ruby", "Sam", "Tess",
+    "Uri", "Violet", "Wyatt", "Xena", "Yara", "Zane",
+]
+LAST_NAMES = [
+    "Adams", "Brown", "Clark", "Davis", "Evans", "Foster", "Garcia", "Hill", "Irwin",
+    "Johnson", "King", "Lee", "Moore", "Nguyen", "Ortiz", "Patel", "Reed", "Smith",
+    "Turner", "Walker", "Young",
+]
+EVENT_TYPES = ["Youth Group Night", "Service Project", "Retreat", "Bible Study", "Worship Night"]
+
+
+def timed(label):
+    def wrap(fn):
+        def inner(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            print(f"  {label}: {time.perf_counter() - start:.1f}s")
+            return result
+        return inner
+    return wrap
+
+
+def name(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def insert_many(cursor, sql, rows):
+    for i in range(0, len(rows), BATCH):
+        cursor.executemany(sql, rows[i:i + BATCH])
+
+
+@timed("schema")
+def create_schema(cursor):
+    with open(os.path.join(ROOT, "schema.sql")) as f:
+        for statement in split_statements(f.read()):
+            cursor.execute(statement)
+
+
+@timed("people, groups and events")
+def seed_people(cursor, rng, args):
+    guardians = max(1, args.students // 2)
+    insert_many(cursor, "INSERT INTO Guardian (ID, firstName, lastName) VALUES (%s, %s, %s)",
+                [(i, *name(rng)) for i in range(1, guardians + 1)])
+    insert_many(cursor, "INSERT INTO Student (ID, guardianID, firstName, lastName) VALUES (%s, %s, %s, %s)",
+                [(i, rng.randint(1, guardians), *name(rng)) for i in range(1, args.students + 1)])
+    insert_many(cursor, "INSERT INTO Leader (ID, firstName, lastName) VALUES (%s, %s, %s)",
+                [(i, *name(rng)) for i in range(1, args.leaders + 1)])
+    insert_many(cursor, "INSERT INTO Volunteer (ID, firstName, lastName) VALUES (%s, %s, %s)",
+                [(i, *name(rng)) for i in range(1, args.volunteers + 1)])
+
+    insert_many(cursor, "INSERT INTO EVENT_TYPE (ID, name) VALUES (%s, %s)",
+                [(i, t) for i, t in enumerate(EVENT_TYPES, start=1)])
+    insert_many(cursor, "INSERT INTO Event (ID, Type, Notes, event_typeID) VALUES (%s, %s, %s, %s)",
+                [(i, f"{rng.choice(EVENT_TYPES)} #{i}", "Synthetic benchmark event", rng.randint(1, len(EVENT_TYPES)))
+                 for i in range(1, args.events + 1)])
+
+    insert_many(cursor, "INSERT INTO AGroup (ID, name) VALUES (%s, %s)",
+                [(i, f"Small Group {i}") for i in range(1, args.groups + 1)])
+    # Every student in one group, two leaders per group
+    insert_many(cursor, "INSERT INTO GroupMember (groupID, studentID) VALUES (%s, %s)",
+                [(rng.randint(1, args.groups), sid) for sid in range(1, args.students + 1)])
+    insert_many(cursor, "INSERT IGNORE INTO GroupLeader (groupID, leaderID) VALUES (%s, %s)",
+                [(gid, rng.randint(1, args.leaders)) for gid in range(1, args.groups + 1) for _ in range(2)])
+
+    insert_many(cursor, "INSERT INTO EventLeader (leaderID, eventID) VALUES (%s, %s)",
+                [(rng.randint(1, args.leaders), eid) for eid in range(1, args.events + 1)])
+    insert_many(cursor, "INSERT IGNORE INTO VolunteerRecord (volunteerID, eventID) VALUES (%s, %s)",
+                [(rng.randint(1, args.volunteers), rng.randint(1, args.events)) for _ in range(args.events * 3)])
+
+
+@timed("attendance history")
+def seed_attendance(cursor, rng, args):
+    # Events are spread weekly backwards from today; each one gets an equal
+    # share of the attendance rows, sampled without replacement.
+    per_event = min(args.students, max(1, args.attendance // args.events))
+    start = date.today() - timedelta(weeks=args.events)
+    sql = "INSERT INTO AttendanceStudent (eventID, studentID, theDATE, theTime) VALUES (%s, %s, %s, %s)"
+    rows = []
+    for eid in range(1, args.events + 1):
+        day = (start + timedelta(weeks=eid)).isoformat()
+        for sid in rng.sample(range(1, args.students + 1), per_event):
+            rows.append((eid, sid, day, "18:30:00"))
+        if len(rows) >= BATCH * 10:
+            insert_many(cursor, sql, rows)
+            rows = []
+    insert_many(cursor, sql, rows)
+    return per_event * args.events
+
+
+@timed("mongo notes")
+def seed_notes(rng, args):
+    coll = get_mongo_db()["meeting_notes"]
+    coll.delete_many({})
+    docs = []
+    for eid in range(1, args.events + 1):
+        for n in range(args.notes_per_event):
+            docs.append({
+                "eventId": eid,
+                "content": f"Meeting note {n} for event {eid}: {rng.choice(FIRST_NAMES)} led prayer.",
+                "createdAt": datetime.utcnow() - timedelta(minutes=rng.randint(0, 500000)),
+            })
+        if len(docs) >= BATCH:
+            coll.insert_many(docs)
+            docs = []
+    if docs:
+        coll.insert_many(docs)
+
+
+@timed("redis check-ins")
+def seed_checkins(rng, args, live_events):
+    from checkin_store import checkin_store
+
+    r = get_redis_client()
+    pipe = r.pipeline(transaction=False)
+    for eid in live_events:
+        # Sync client, same key layout as the async CheckInStore
+        key = checkin_store.key(eid)
+        pipe.delete(key)
+        for sid in rng.sample(range(1, args.students + 1), min(args.students, 300)):
+            if checkin_store.bitmap:
+                pipe.setbit(key, sid, 1)
+            else:
+                pipe.sadd(key, sid)
+    pipe.execute()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a synthetic church for benchmarking.")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--attendance", type=int, default=1000000)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--groups", type=int, default=300)
+    parser.add_argument("--leaders", type=int, default=150)
+    parser.add_argument("--volunteers", type=int, default=200)
+    parser.add_argument("--notes-per-event", type=int, default=20)
+    parser.add_argument("--live-events", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=125)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    print(f"Seeding {DB_NAME} on {DB_HOST}:{DB_PORT} ...")
+    cnx = mysql.connector.connect(user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+    cursor = cnx.cursor()
+    try:
+        create_schema(cursor)
+        cursor.execute(f"USE {DB_NAME}")
+        cursor.execute("SET foreign_key_checks = 0")
+        cursor.execute("SET unique_checks = 0")
+        seed_people(cursor, rng, args)
+        attendance_rows = seed_attendance(cursor, rng, args)
+        cursor.execute("SET unique_checks = 1")
+        cursor.execute("SET foreign_key_checks = 1")
+        cnx.commit()
+    finally:
+        cursor.close()
+        cnx.close()
+
+    seed_notes(rng, args)
+    live_events = list(range(args.events - args.live_events + 1, args.events + 1))
+    seed_checkins(rng, args, live_events)
+
+    dataset = {
+        "seed": args.seed,
+        "students": args.students,
+        "events": args.events,
+        "groups": args.groups,
+        "attendanceRows": attendance_rows,
+        "liveEvents": live_events,
+    }
+    with open(DATASET_PATH, "w") as f:
+        json.dump(dataset, f, indent=2)
+    print(f"Done. Dataset description written to {DATASET_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# cascade.py
+"""
+Set-based cascade deletes driven by the foreign keys in schema.sql.
+
+`cascade_delete(db, "Event", [1, 2, 3])` deletes the events and,
+recursively, every row that references them. It runs one statement per
+referencing table (`DELETE FROM child WHERE fk IN (...)`, chunked), not
+one statement per row, on the caller's connection. Inside a mutation the
+whole cascade therefore commits or rolls back as one transaction.
+
+The reference graph is read from the FOREIGN KEY clauses in schema.sql.
+The rollup tables that reference rows without a constraint are listed in
+LOGICAL_REFERENCES. References in SET_NULL are cleared instead of
+deleted, so deleting a guardian or an event type never deletes students
+or events.
+
+Whatever lives outside MySQL is queued in the cleanup outbox in the same
+transaction: Mongo notes and Redis check-ins of deleted events, and
+search index entries of deleted people. Rollups of surviving students and
+event-days that lost attendance rows (archived rows included) are
+recomputed before the commit.
+"""
+import os
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+from analytics import refresh_event_days, refresh_students
+from loaders import in_placeholders
+from outbox import enqueue
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")
+CHUNK = 1000
+
+# (table, column, referenced table) enforced by the application, not MySQL
+LOGICAL_REFERENCES = [
+    ("EventAttendanceDaily", "eventID", "Event"),
+    ("GroupAttendanceDaily", "eventID", "Event"),
+    ("GroupAttendanceDaily", "groupID", "AGroup"),
+    ("StudentAttendanceStats", "studentID", "Student"),
+    # Archived attendance (archive.py): dropping the index rows hides the
+    # segment rows; `python -m archive vacuum` removes unreferenced files
+    ("AttendanceArchiveSegment", "eventID", "Event"),
+    ("AttendanceArchiveStudent", "segmentID", "AttendanceArchiveSegment"),
+    ("AttendanceArchiveStudent", "studentID", "Student"),
+]
+
+# References that are cleared (SET NULL) rather than cascaded
+SET_NULL = {("Student", "guardianID"), ("Event", "event_typeID")}
+
+# Tables whose rows are search index entries, by search kind
+SEARCH_KINDS = {"Student": "student", "Guardian": "guardian", "Volunteer": "volunteer", "Leader": "leader"}
+
+
+def parse_references(schema_sql: str) -> List[Tuple[str, str, str]]:
+    """(table, column, referenced table) for every FOREIGN KEY in the schema."""
+    references = []
+    for match in re.finditer(r"CREATE TABLE\s+(\w+)\s*\((.*?)\n\);", schema_sql, re.S | re.I):
+        table, body = match.groups()
+        for column, parent in re.findall(r"FOREIGN KEY\s*\((\w+)\)\s*REFERENCES\s+(\w+)\s*\(", body, re.I):
+            references.append((table, column, parent))
+    return references
+
+
+def load_graph(path: str = SCHEMA_PATH) -> Dict[str, List[Tuple[str, str]]]:
+    """Referenced table -> [(referencing table, column)]."""
+    with open(path) as f:
+        references = parse_references(f.read()) + LOGICAL_REFERENCES
+    graph: Dict[str, List[Tuple[str, str]]] = {}
+    for table, column, parent in references:
+        graph.setdefault(parent, []).append((table, column))
+    return graph
+
+
+REFERENCES = load_graph()
+
+
+def _chunks(ids: List[int]):
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+class CascadeDelete:
+    """One cascade: what was deleted and which rollups it touched."""
+
+    def __init__(self, db):
+        self.db = db
+        self.deleted: Dict[str, Set[int]] = {}
+        self.rows: Dict[str, int] = {}
+        self._event_days: Set[tuple] = set()
+        self._students: Set[int] = set()
+
+    @property
+    def students(self) -> Set[int]:
+        """Students who lost attendance rows, hot or archived, deleted students included."""
+        return set(self._students)
+
+    async def delete(self, table: str, ids: Iterable[int]) -> Set[int]:
+        """Delete rows of `table` by ID with everything referencing them; returns the IDs that existed."""
+        ids = sorted(set(ids) - self.deleted.get(table, set()))
+        existing: Set[int] = set()
+        for chunk in _chunks(ids):
+            rows = await self.db.fetchall(f"SELECT ID FROM {table} WHERE ID IN ({in_placeholders(chunk)})", chunk)
+            existing.update(row["ID"] for row in rows)
+        if existing:
+            self.deleted.setdefault(table, set()).update(existing)
+            await self._children(table, sorted(existing))
+            await self._delete_where(table, "ID", sorted(existing))
+        return existing
+
+    async def _children(self, table: str, ids: List[int]) -> None:
+        for child, column in REFERENCES.get(table, []):
+            for chunk in _chunks(ids):
+                where = f"{column} IN ({in_placeholders(chunk)})"
+                if (child, column) in SET_NULL:
+                    await self.db.execute(f"UPDATE {child} SET {column} = NULL WHERE {where}", chunk)
+                    continue
+                if child == "AttendanceStudent":
+                    await self._note_attendance(where, chunk)
+                elif child == "AttendanceArchiveStudent":
+                    await self._note_archived(where, chunk)
+                if child in REFERENCES:
+                    rows = await self.db.fetchall(f"SELECT ID FROM {child} WHERE {where}", chunk)
+                    await self.delete(child, (row["ID"] for row in rows))
+                else:
+                    await self._delete_where(child, column, chunk)
+
+    async def _note_attendance(self, where: str, params: List[int]) -> None:
+        """Remember the event-days and students whose rollups lose rows."""
+        rows = await self.db.fetchall(
+            f"SELECT DISTINCT eventID, studentID, theDATE FROM AttendanceStudent WHERE {where}", params
+        )
+        for row in rows:
+            self._event_days.add((row["eventID"], row["theDATE"]))
+            self._students.add(row["studentID"])
+
+    async def _note_archived(self, where: str, params: List[int]) -> None:
+        """Students whose archived rows (archive.py) become unreachable: their rollups change too."""
+        rows = await self.db.fetchall(
+            f"SELECT DISTINCT studentID FROM AttendanceArchiveStudent WHERE {where}", params
+        )
+        self._students.update(row["studentID"] for row in rows)
+
+    async def _delete_where(self, table: str, column: str, ids: List[int]) -> None:
+        total = 0
+        for chunk in _chunks(ids):
+            total += await self.db.execute(
+                f"DELETE FROM {table} WHERE {column} IN ({in_placeholders(chunk)})", chunk
+            )
+        self.rows[table] = self.rows.get(table, 0) + total
+
+    async def finish(self) -> None:
+        """Recompute surviving rollups and queue the cleanup outside MySQL."""
+        gone_events = self.deleted.get("Event", set())
+        gone_students = self.deleted.get("Student", set())
+        await refresh_event_days(self.db, (day for day in self._event_days if day[0] not in gone_events))
+        await refresh_students(self.db, self._students - gone_students)
+
+        if gone_events:
+            await enqueue(self.db, "event_documents", "eventIds", sorted(gone_events))
+        people = [
+            [kind, person_id]
+            for table, kind in SEARCH_KINDS.items()
+            for person_id in sorted(self.deleted.get(table, ()))
+        ]
+        if people:
+            await enqueue(self.db, "search_remove", "people", people)
+
+
+async def cascade_delete(db, table: str, ids: Iterable[int]) -> CascadeDelete:
+    """Delete `ids` from `table` with all dependent rows; see CascadeDelete.deleted/rows."""
+    cascade = CascadeDelete(db)
+    await cascade.delete(table, ids)
+    await cascade.finish()
+    return cascade
@@ -0,0 +1,143 @@
+# checkin_events.py
+"""
+Fan-out of live check-in changes to GraphQL subscriptions.
+
+`CheckInStore` publishes every change on the event's Redis pub/sub
+channel. Each worker process keeps a single pub/sub connection and
+subscribes to an event's channel while at least one local subscriber is
+watching it. Incoming messages are copied into one bounded queue per
+subscriber, so a hundred leader screens on one event cost one Redis
+subscription and no extra reads.
+
+A subscriber whose queue fills up (a stalled browser), or every
+subscriber after the pub/sub connection drops, receives a "resync"
+message instead of the changes it missed. The subscription resolver then
+re-reads the full set once.
+
+    async with checkin_events.listen(event_id) as queue:
+        change = await queue.get()
+"""
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+from redis.exceptions import RedisError
+
+from checkin_store import checkin_store
+from database import get_async_redis
+
+QUEUE_SIZE = int(os.getenv("CHECKIN_SUBSCRIBER_QUEUE", "256"))
+RECONNECT_DELAY = 1.0
+
+
+def resync_message(event_id: int) -> dict:
+    return {"eventId": event_id, "action": "resync", "studentIds": [], "count": 0}
+
+
+class CheckInBroadcaster:
+    """One Redis pub/sub connection per process, shared by every subscriber."""
+
+    def __init__(self):
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def listen(self, event_id: int):
+        """Queue of change messages for one event, for as long as the block runs."""
+        channel = checkin_store.channel(event_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+            if channel not in self._listeners:
+                await self._pubsub.subscribe(channel)
+                self._listeners[channel] = set()
+            self._listeners[channel].add(queue)
+            if self._reader is None:
+                self._reader = asyncio.create_task(self._read(self._pubsub))
+        try:
+            yield queue
+        finally:
+            await self._remove(channel, queue)
+
+    async def _remove(self, channel: str, queue: asyncio.Queue) -> None:
+        async with self._lock:
+            queues = self._listeners.get(channel)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if queues:
+                return
+            del self._listeners[channel]
+            try:
+                await self._pubsub.unsubscribe(channel)
+            except RedisError:
+                pass
+            if not self._listeners:
+                await self._stop()
+
+    async def close(self) -> None:
+        """Stop fan-out at shutdown; open subscriptions stop receiving changes."""
+        async with self._lock:
+            self._listeners.clear()
+            await self._stop()
+
+    async def _stop(self) -> None:
+        """Close the pub/sub connection once nobody is listening (lock held)."""
+        reader, self._reader = self._reader, None
+        pubsub, self._pubsub = self._pubsub, None
+        if reader is not None:
+            reader.cancel()
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except RedisError:
+                pass
+
+    def _offer(self, queue: asyncio.Queue, message: dict) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop the backlog; the subscriber re-reads the set instead
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(resync_message(message["eventId"]))
+
+    async def _read(self, pubsub) -> None:
+        # Reads the connection it was started for; _stop() may clear
+        # self._pubsub (and cancel this task) at any await below.
+        while pubsub is self._pubsub:
+            try:
+                raw = await pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if pubsub is not self._pubsub:
+                    # Closed under us by _stop(): nothing left to read
+                    return
+                if not isinstance(e, (RedisError, OSError)):
+                    raise
+                # redis-py reconnects and re-subscribes on the next call;
+                # anything published meanwhile is lost, so resync everyone.
+                print(f"Check-in pub/sub connection lost: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                for channel, queues in list(self._listeners.items()):
+                    event_id = int(channel.split("{", 1)[1].split("}", 1)[0])
+                    for queue in list(queues):
+                        self._offer(queue, resync_message(event_id))
+                continue
+            if raw is None or raw.get("type") != "message":
+                continue
+            try:
+                message = json.loads(raw["data"])
+            except (TypeError, ValueError):
+                continue
+            for queue in list(self._listeners.get(raw["channel"], ())):
+                self._offer(queue, message)
+
+
+checkin_events = CheckInBroadcaster()
@@ -0,0 +1,288 @@
+# checkin_store.py
+"""
+Single owner of the Redis check-in keyspace.
+
+Every endpoint that reads or writes live check-ins goes through
+`checkin_store` so the key format only lives here:
+
+    event:{<eventId>}:checkins               set of student IDs (default)
+    event:{<eventId>}:checkins:bitmap        bitmap, bit N set = student N
+    ...:<YYYY-MM-DD>                         suffix when partitioned by day
+    ...:persisting                           IDs drained for a MySQL write
+    event:{<eventId>}:checkins:days          set of the days written, when partitioned
+    checkins:stream                          append-only log {eventId, studentId, ts}
+
+Every change is also published on the pub/sub channel
+`event:{<eventId>}:checkins:changes` as JSON
+`{"eventId", "action", "studentIds", "count"}`, where action is
+"checked_in", "checked_out", "persisted", "cleared" or "resync" (re-read
+the whole set) and studentIds holds only the IDs whose state changed. `checkin_events` fans these out to
+GraphQL subscriptions.
+
+With several tenants (tenants.py) every key and channel starts with the
+tenant's prefix, e.g. `t:grace:event:{12}:checkins`.
+
+The `{<eventId>}` hash tag keeps all keys for one event in the same Redis
+Cluster slot, which the multi-key Lua drain and SUNIONSTORE/BITOP require.
+
+The stream is consumed by `checkin_worker`, which writes AttendanceStudent
+rows with the real check-in time.
+
+Configuration (environment):
+    CHECKIN_STORAGE        "set" (default) or "bitmap"
+    CHECKIN_PARTITION_DAY  "1" to keep one key per event per day
+    CHECKIN_PARTITION_TTL  seconds a day partition lives (default 3 days)
+    CHECKIN_STREAM         "0" to stop appending to the stream
+    CHECKIN_STREAM_MAXLEN  approximate number of stream entries kept (default 1,000,000)
+"""
+import json
+import os
+import time
+from datetime import date
+from typing import Iterable, List, Optional
+
+from redis.exceptions import RedisError
+
+from database import get_async_redis, get_async_redis_raw
+from tenants import tenant_key
+
+SET_DRAIN_SCRIPT = """
+redis.call('SUNIONSTORE', KEYS[2], KEYS[2], KEYS[1])
+redis.call('DEL', KEYS[1])
+return redis.call('SMEMBERS', KEYS[2])
+"""
+
+# BITOP treats a missing key as all zeros, so leftovers from an interrupted
+# drain are merged the same way SUNIONSTORE merges them for sets.
+BITMAP_DRAIN_SCRIPT = """
+redis.call('BITOP', 'OR', KEYS[2], KEYS[2], KEYS[1])
+redis.call('DEL', KEYS[1])
+return redis.call('GET', KEYS[2])
+"""
+
+
+def bitmap_to_ids(data: Optional[bytes]) -> List[int]:
+    """Decode a Redis bitmap (bit 0 = most significant bit of byte 0)."""
+    ids = []
+    if not data:
+        return ids
+    for byte_index, byte in enumerate(data):
+        if not byte:
+            continue
+        for bit in range(8):
+            if byte & (0x80 >> bit):
+                ids.append(byte_index * 8 + bit)
+    return ids
+
+
+class CheckInStore:
+    """Live check-ins for events, stored as Redis sets or bitmaps."""
+
+    def __init__(
+            self,
+            storage: Optional[str] = None,
+            partition_by_day: Optional[bool] = None,
+            partition_ttl: Optional[int] = None,
+    ):
+        self.storage = storage or os.getenv("CHECKIN_STORAGE", "set")
+        if self.storage not in ("set", "bitmap"):
+            raise ValueError(f"Unknown CHECKIN_STORAGE '{self.storage}' (expected 'set' or 'bitmap')")
+        if partition_by_day is None:
+            partition_by_day = os.getenv("CHECKIN_PARTITION_DAY", "0") == "1"
+        self.partition_by_day = partition_by_day
+        self.partition_ttl = partition_ttl or int(os.getenv("CHECKIN_PARTITION_TTL", str(3 * 24 * 3600)))
+        self.stream_enabled = os.getenv("CHECKIN_STREAM", "1") == "1"
+        self.stream_maxlen = int(os.getenv("CHECKIN_STREAM_MAXLEN", "1000000"))
+
+    @property
+    def bitmap(self) -> bool:
+        return self.storage == "bitmap"
+
+    # ---------- Key naming ----------
+
+    def key(self, event_id: int, day: Optional[date] = None, bitmap: Optional[bool] = None) -> str:
+        key = tenant_key(f"event:{{{event_id}}}:checkins")
+        if self.bitmap if bitmap is None else bitmap:
+            key += ":bitmap"
+        if self.partition_by_day:
+            key += f":{(day or date.today()).isoformat()}"
+        return key
+
+    @staticmethod
+    def days_key(event_id: int) -> str:
+        return tenant_key(f"event:{{{event_id}}}:checkins:days")
+
+    def pending_key(self, event_id: int, day: Optional[date] = None) -> str:
+        return f"{self.key(event_id, day)}:persisting"
+
+    @property
+    def stream_key(self) -> str:
+        return tenant_key("checkins:stream")
+
+    @staticmethod
+    def channel(event_id: int) -> str:
+        """Pub/sub channel carrying check-in changes (not a key, so clear() leaves it alone)."""
+        return tenant_key(f"event:{{{event_id}}}:checkins:changes")
+
+    def _expire(self, pipe, key: str) -> None:
+        if self.partition_by_day:
+            pipe.expire(key, self.partition_ttl)
+
+    def _record_day(self, pipe, event_id: int) -> None:
+        """Remember today's partition, so drains and clear() find it without SCAN."""
+        if self.partition_by_day:
+            pipe.sadd(self.days_key(event_id), date.today().isoformat())
+            pipe.expire(self.days_key(event_id), self.partition_ttl)
+
+    def _count(self, pipe, key: str) -> None:
+        if self.bitmap:
+            pipe.bitcount(key)
+        else:
+            pipe.scard(key)
+
+    async def _publish(self, event_id: int, action: str, student_ids: List[int], count: int) -> None:
+        """Announce a change to subscribers; the write itself has already succeeded."""
+        if not student_ids and action in ("checked_in", "checked_out"):
+            return
+        message = {"eventId": event_id, "action": action, "studentIds": student_ids, "count": count}
+        try:
+            await get_async_redis().publish(self.channel(event_id), json.dumps(message))
+        except RedisError as e:
+            print(f"Could not publish check-in change for event {event_id}: {e}")
+
+    # ---------- Writes ----------
+
+    async def check_in(self, event_id: int, student_id: int) -> bool:
+        """Mark a student present. Returns True if they were not already."""
+        return (await self.check_in_many(event_id, [student_id]))[0]
+
+    async def check_in_many(self, event_id: int, student_ids: Iterable[int]) -> List[bool]:
+        """Pipelined check-in; one round trip for the whole batch."""
+        student_ids = list(student_ids)
+        if not student_ids:
+            return []
+        key = self.key(event_id)
+        pipe = get_async_redis().pipeline(transaction=False)
+        for sid in student_ids:
+            if self.bitmap:
+                pipe.setbit(key, sid, 1)
+            else:
+                pipe.sadd(key, sid)
+        self._expire(pipe, key)
+        self._record_day(pipe, event_id)
+        if self.stream_enabled:
+            # Repeats are harmless: the worker's insert is idempotent per day
+            ts = int(time.time() * 1000)
+            for sid in student_ids:
+                pipe.xadd(
+                    self.stream_key,
+                    {"eventId": event_id, "studentId": sid, "ts": ts},
+                    maxlen=self.stream_maxlen,
+                    approximate=True,
+                )
+        self._count(pipe, key)
+        replies = await pipe.execute()
+        # SADD returns 1 when added; SETBIT returns the previous bit
+        added = replies[:len(student_ids)]
+        added = [not bool(r) for r in added] if self.bitmap else [bool(r) for r in added]
+        new_ids = [sid for sid, is_new in zip(student_ids, added) if is_new]
+        await self._publish(event_id, "checked_in", new_ids, replies[-1])
+        return added
+
+    async def check_out(self, event_id: int, student_id: int) -> bool:
+        """Remove a student. Returns True if they were checked in."""
+        key = self.key(event_id)
+        pipe = get_async_redis().pipeline(transaction=False)
+        if self.bitmap:
+            pipe.setbit(key, student_id, 0)
+        else:
+            pipe.srem(key, student_id)
+        self._count(pipe, key)
+        removed, count = await pipe.execute()
+        removed = bool(removed)
+        await self._publish(event_id, "checked_out", [student_id] if removed else [], count)
+        return removed
+
+    async def clear(self, event_id: int) -> None:
+        """Delete every check-in key for the event (all recorded days, both storages)."""
+        r = get_async_redis()
+        days = [None] + await self.days(event_id) if self.partition_by_day else [None]
+        keys = [self.days_key(event_id)]
+        for day in days:
+            for bitmap in (False, True):
+                live = self.key(event_id, day, bitmap)
+                keys += [live, f"{live}:persisting"]
+        # One DEL of known names: the hash tag puts them all in one Cluster slot
+        await r.delete(*keys)
+        await self._publish(event_id, "cleared", [], 0)
+
+    # ---------- Reads ----------
+
+    async def members(self, event_id: int, day: Optional[date] = None) -> List[int]:
+        key = self.key(event_id, day)
+        if self.bitmap:
+            return bitmap_to_ids(await get_async_redis_raw().get(key))
+        return sorted(int(m) for m in await get_async_redis().smembers(key))
+
+    async def count(self, event_id: int, day: Optional[date] = None) -> int:
+        r = get_async_redis()
+        key = self.key(event_id, day)
+        if self.bitmap:
+            return await r.bitcount(key)
+        return await r.scard(key)
+
+    async def is_checked_in(self, event_id: int, student_id: int) -> bool:
+        r = get_async_redis()
+        key = self.key(event_id)
+        if self.bitmap:
+            return bool(await r.getbit(key, student_id))
+        return bool(await r.sismember(key, student_id))
+
+    async def days(self, event_id: int) -> List[date]:
+        """Days with a check-in partition for the event, oldest first ([] when not partitioned)."""
+        if not self.partition_by_day:
+            return []
+        raw = await get_async_redis().smembers(self.days_key(event_id))
+        return sorted(date.fromisoformat(day) for day in raw)
+
+    # ---------- Persistence handoff ----------
+
+    async def drain(self, event_id: int, day: Optional[date] = None) -> List[int]:
+        """
+        Atomically move the live check-ins into the pending key and return
+        every pending ID (including leftovers from an interrupted drain).
+        """
+        keys = (self.key(event_id, day), self.pending_key(event_id, day))
+        if self.bitmap:
+            ids = bitmap_to_ids(await get_async_redis_raw().eval(BITMAP_DRAIN_SCRIPT, 2, *keys))
+        else:
+            ids = sorted(int(m) for m in await get_async_redis().eval(SET_DRAIN_SCRIPT, 2, *keys))
+        # Students checked in after the drain are still live, hence the fresh count
+        await self._publish(event_id, "persisted", ids, await self.count(event_id, day))
+        return ids
+
+    async def restore(self, event_id: int, day: Optional[date] = None) -> None:
+        """Merge pending IDs back into the live key after a failed write."""
+        live, pending = self.key(event_id, day), self.pending_key(event_id, day)
+        pipe = get_async_redis().pipeline(transaction=True)
+        if self.bitmap:
+            pipe.bitop("OR", live, live, pending)
+        else:
+            pipe.sunionstore(live, live, pending)
+        pipe.delete(pending)
+        await pipe.execute()
+        # Subscribers saw these IDs leave with "persisted"; have them re-read the set
+        await self._publish(event_id, "resync", [], await self.count(event_id, day))
+
+    async def discard_pending(self, event_id: int, day: Optional[date] = None) -> None:
+        """Drop the pending key once its IDs are safely in MySQL."""
+        pipe = get_async_redis().pipeline(transaction=True)
+        pipe.delete(self.pending_key(event_id, day))
+        if self.partition_by_day and day is not None and day < date.today():
+            # A past day takes no new check-ins; its partition is done
+            pipe.delete(self.key(event_id, day))
+            pipe.srem(self.days_key(event_id), day.isoformat())
+        await pipe.execute()
+
+
+checkin_store = CheckInStore()
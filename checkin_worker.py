@@ -0,0 +1,252 @@
+# checkin_worker.py
+"""
+Continuous persistence of check-ins from the Redis Stream into MySQL.
+
+`CheckInStore.check_in_many` appends `{eventId, studentId, ts}` to the
+`checkins:stream` stream next to the live set. This worker reads the
+stream through a consumer group, writes each batch to AttendanceStudent
+with the real check-in date and time in one transaction, and only then
+acknowledges the entries. A worker that dies before acknowledging leaves
+its entries pending. On restart it processes its own pending entries
+first, and entries another consumer has held for CLAIM_IDLE_MS are taken
+over with XAUTOCLAIM. The insert is idempotent (UNIQUE per student, event
+and day, keeping the earliest time), so redelivered entries are harmless.
+The attendance rollups (analytics.py) are updated in the same transaction,
+and the students' portal profiles (profiles.py) are rebuilt once it commits.
+
+Rows that can never be written, e.g. for an event or student that has
+since been deleted, are moved to `checkins:stream:dead` instead of
+blocking the group. Any other MySQL or Redis error leaves the batch
+pending and the worker retries it after RETRY_DELAY.
+
+Start it with the API (CHECKIN_WORKER=1 runs it from the app lifespan) or
+as its own process, one or more per deployment. A worker serves every
+tenant (tenants.py): it waits on all their streams in one XREADGROUP and
+writes each batch to its tenant's schema:
+
+    python -m checkin_worker
+"""
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+from analytics import update_rollups
+from checkin_store import checkin_store
+from database import (
+    MYSQL_ERRORS,
+    REDIS_HOST,
+    REDIS_PASSWORD,
+    REDIS_PORT,
+    REDIS_USERNAME,
+    async_mysql_conn,
+    close_async_connections,
+)
+from metrics import Counter, Histogram
+from profiles import student_profiles
+from tenants import all_tenants, use_tenant
+
+GROUP = os.getenv("CHECKIN_WORKER_GROUP", "attendance-writers")
+BATCH_SIZE = int(os.getenv("CHECKIN_WORKER_BATCH", "500"))
+BLOCK_MS = int(os.getenv("CHECKIN_WORKER_BLOCK_MS", "1000"))
+# Entries another consumer has held this long without acking are taken over
+CLAIM_IDLE_MS = int(os.getenv("CHECKIN_WORKER_CLAIM_IDLE_MS", "60000"))
+RETRY_DELAY = 2.0
+
+# MySQL errors that retrying cannot fix: missing parent row, bad value
+POISON_ERRORS = {1048, 1216, 1366, 1452}
+
+INSERT_SQL = """
+    INSERT INTO AttendanceStudent (eventID, studentID, theDATE, theTime)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE theTime = LEAST(theTime, VALUES(theTime))
+"""
+
+WORKER_ROWS = Counter(
+    "checkin_worker_rows_total", "Stream entries handled by the check-in worker", ("outcome",)
+)
+WORKER_BATCH = Histogram("checkin_worker_batch_seconds", "Time to persist and ack one stream batch")
+
+
+def mysql_errno(err: Exception) -> Optional[int]:
+    """Error number from either driver (mysql-connector .errno, PyMySQL args[0])."""
+    errno = getattr(err, "errno", None)
+    if errno is None and err.args and isinstance(err.args[0], int):
+        errno = err.args[0]
+    return errno
+
+
+def entry_to_row(fields: dict) -> Tuple[int, int, str, str]:
+    checked_in = datetime.fromtimestamp(int(fields["ts"]) / 1000)
+    return (
+        int(fields["eventId"]),
+        int(fields["studentId"]),
+        checked_in.date().isoformat(),
+        checked_in.time().replace(microsecond=0).isoformat(),
+    )
+
+
+class CheckInWorker:
+    def __init__(self, consumer: Optional[str] = None):
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        # stream key -> tenant; one XREADGROUP call waits on every tenant's stream
+        self.streams = {}
+        for tenant in all_tenants():
+            with use_tenant(tenant):
+                self.streams[checkin_store.stream_key] = tenant
+        self._redis = None
+        self._stopped = False
+        self._next_claim = 0.0
+
+    def _client(self):
+        # Own client: blocking XREADGROUP calls would swamp the Redis latency metrics
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                decode_responses=True,
+                username=REDIS_USERNAME,
+                password=REDIS_PASSWORD,
+            )
+        return self._redis
+
+    async def ensure_group(self) -> None:
+        for stream in self.streams:
+            try:
+                # From the start of the stream: inserts are idempotent, lost entries are not
+                await self._client().xgroup_create(stream, GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    # ---------- Main loop ----------
+
+    async def run(self) -> None:
+        print(f"Check-in worker {self.consumer} consuming {len(self.streams)} stream(s) as group {GROUP}")
+        backlog = True
+        while not self._stopped:
+            try:
+                if backlog:
+                    await self.ensure_group()
+                    # Our own entries left unacked by a crash or a failed batch
+                    batches = await self._read("0")
+                    backlog = bool(batches)
+                else:
+                    batches = await self._claim() or await self._read(">", block=BLOCK_MS)
+                for stream, entries in batches:
+                    with use_tenant(self.streams[stream]):
+                        await self.process(stream, entries)
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) + MYSQL_ERRORS as e:
+                print(f"Check-in worker error, retrying in {RETRY_DELAY}s: {e}")
+                backlog = True
+                await asyncio.sleep(RETRY_DELAY)
+
+    def stop(self) -> None:
+        """Finish the current batch, then leave run()."""
+        self._stopped = True
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _read(self, start: str, block: Optional[int] = None) -> List[tuple]:
+        """[(stream, entries)] for the streams that have entries."""
+        reply = await self._client().xreadgroup(
+            GROUP, self.consumer, {stream: start for stream in self.streams}, count=BATCH_SIZE, block=block
+        )
+        return [(stream, entries) for stream, entries in reply or [] if entries]
+
+    async def _claim(self) -> List[tuple]:
+        """Take over entries a dead consumer never acknowledged (checked every CLAIM_IDLE_MS / 2)."""
+        now = time.monotonic()
+        if now < self._next_claim:
+            return []
+        self._next_claim = now + CLAIM_IDLE_MS / 2000
+        claimed = []
+        for stream in self.streams:
+            reply = await self._client().xautoclaim(
+                stream, GROUP, self.consumer, CLAIM_IDLE_MS, start_id="0-0", count=BATCH_SIZE
+            )
+            if reply[1]:
+                claimed.append((stream, reply[1]))
+        return claimed
+
+    # ---------- Batches ----------
+
+    async def process(self, stream: str, entries: List[tuple]) -> None:
+        """Persist one stream's entries (inside its tenant's `use_tenant`)."""
+        start = time.perf_counter()
+        rows, row_entries, dead = [], [], []
+        for entry_id, fields in entries:
+            try:
+                rows.append(entry_to_row(fields))
+                row_entries.append((entry_id, fields))
+            except (KeyError, TypeError, ValueError):
+                # Malformed, or trimmed from the stream while pending (fields is None)
+                dead.append((entry_id, fields, "malformed entry"))
+
+        if rows:
+            try:
+                await self._insert(rows)
+            except MYSQL_ERRORS as e:
+                if mysql_errno(e) not in POISON_ERRORS:
+                    raise
+                # Find the rows that can never be written; write the rest
+                for (entry_id, fields), row in zip(row_entries, rows):
+                    try:
+                        await self._insert([row])
+                    except MYSQL_ERRORS as row_err:
+                        if mysql_errno(row_err) not in POISON_ERRORS:
+                            raise
+                        dead.append((entry_id, fields, str(row_err)))
+
+        await self._dead_letter(stream, dead)
+        await self._client().xack(stream, GROUP, *[entry_id for entry_id, _ in entries])
+        WORKER_ROWS.inc("persisted", amount=len(entries) - len(dead))
+        WORKER_BATCH.observe(time.perf_counter() - start)
+
+    async def _insert(self, rows: List[tuple]) -> None:
+        async with async_mysql_conn() as conn:
+            await conn.begin()
+            try:
+                await conn.executemany(INSERT_SQL, rows)
+                await update_rollups(conn, rows)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        await student_profiles.refresh(row[1] for row in rows)
+
+    async def _dead_letter(self, stream: str, dead: List[tuple]) -> None:
+        if not dead:
+            return
+        pipe = self._client().pipeline(transaction=False)
+        for entry_id, fields, reason in dead:
+            print(f"Check-in worker: dead-lettering {entry_id} ({reason})")
+            pipe.xadd(f"{stream}:dead", {**(fields or {}), "sourceId": entry_id, "error": reason})
+        await pipe.execute()
+        WORKER_ROWS.inc("dead_letter", amount=len(dead))
+
+
+async def main() -> None:
+    worker = CheckInWorker()
+    try:
+        await worker.run()
+    finally:
+        await worker.close()
+        await close_async_connections()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
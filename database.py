@@ -1,9 +1,32 @@
-import mysql.connector.pooling
+import mysql.connector
 from pymongo import MongoClient
 from pymongo.server_api import ServerApi
 import redis
+import redis.asyncio as aioredis
+import asyncio
 import os
+import threading
+import time
 import warnings
+from contextlib import asynccontextmanager
+from typing import Callable
+
+import tenants
+from metrics import Counter, record_call, record_pool_wait, register_collector
+from mysql_pool import ConnectionPool, PoolTimeout
+
+# Async drivers are optional: without aiomysql the async MySQL helpers fall
+# back to the sync pool on a worker thread; without motor the async Mongo
+# helpers are unavailable.
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
 
 # --- Secret Management ---
 def load_secret(secret_name: str, default: str = None) -> str:
@@ -48,18 +71,42 @@ def load_secret(secret_name: str, default: str = None) -> str:
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = load_secret("mysql_password")
 DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
-DB_PORT = 3399
+DB_PORT = int(os.getenv("DB_PORT", "3399"))
 DB_NAME = os.getenv("DB_NAME", "youth_db")
+# Schema new connections open on; with several tenants each borrow selects one
+CONNECT_DB = None if tenants.MULTI_TENANT else DB_NAME
+
+# --- MySQL Pool Configuration ---
+# Sync pool (mysql-connector): migrations, scripts and the async fallback
+POOL_MIN_SIZE = int(os.getenv("MYSQL_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("MYSQL_POOL_MAX_SIZE", "20"))
+# Async pool (aiomysql): request handlers
+ASYNC_POOL_SIZE = int(os.getenv("MYSQL_ASYNC_POOL_SIZE", "20"))
+# Seconds a caller waits for a free connection before PoolTimeout
+POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))
+# Connections older than this are closed and replaced (keep below wait_timeout)
+POOL_MAX_LIFETIME = int(os.getenv("MYSQL_POOL_MAX_LIFETIME", "1800"))
+# Idle connections are pinged before reuse after this many seconds
+POOL_VALIDATE_AFTER = float(os.getenv("MYSQL_POOL_VALIDATE_AFTER", "30"))
+# Idle connections above the minimum are closed after this many seconds
+POOL_IDLE_TIMEOUT = float(os.getenv("MYSQL_POOL_IDLE_TIMEOUT", "300"))
+# Async connections one tenant may hold at once (tenants.py; "poolQuota" overrides)
+TENANT_POOL_QUOTA = int(os.getenv(
+    "TENANT_POOL_QUOTA", str(max(1, ASYNC_POOL_SIZE // 4) if tenants.MULTI_TENANT else ASYNC_POOL_SIZE)
+))
+
+# Errors raised by either MySQL driver, for `except MYSQL_ERRORS:`
+MYSQL_ERRORS = (mysql.connector.Error,) + ((aiomysql.MySQLError,) if aiomysql else ())
 
 # --- MongoDB Configuration ---
 # (We now load this from secrets/mongo_uri.txt instead of hardcoding)
 MONGO_URI = load_secret("mongo_uri")
-MONGO_DB_NAME = "youth_ministry"
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "youth_ministry")
 
 # --- Redis Configuration ---
 REDIS_PASSWORD = load_secret("redis_password")
 REDIS_HOST = load_secret("redis_host")
-REDIS_PORT = 11093
+REDIS_PORT = int(os.getenv("REDIS_PORT", "11093"))
 REDIS_USERNAME = "default"
 
 
@@ -69,31 +116,57 @@ mongo_client = None
 redis_client = None
 
 
+def connect_mysql():
+    """Opens one new, unpooled MySQL connection."""
+    return mysql.connector.connect(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        database=CONNECT_DB,
+    )
+
+
 def get_mysql_pool():
     """Initializes and returns the MySQL connection pool."""
     global db_pool
     if db_pool is None:
+        db_pool = ConnectionPool(
+            connect_mysql,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            timeout=POOL_TIMEOUT,
+            max_lifetime=POOL_MAX_LIFETIME,
+            validate_after=POOL_VALIDATE_AFTER,
+            idle_timeout=POOL_IDLE_TIMEOUT,
+        )
         try:
-            db_pool = mysql.connector.pooling.MySQLConnectionPool(
-                pool_name="fastapi_pool",
-                pool_size=5,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                host=DB_HOST,
-                port=DB_PORT,
-                database=DB_NAME,
-            )
+            db_pool.fill()
             print("Database connection pool created successfully.")
         except mysql.connector.Error as err:
+            # Connections are opened on demand once the server is reachable
             print(f"Error creating connection pool: {err}")
 
     return db_pool
 
 
 def get_db_connection():
-    """Gets a connection from the MySQL pool."""
+    """
+    Gets a connection from the MySQL pool, waiting up to MYSQL_POOL_TIMEOUT
+    seconds (PoolTimeout) when every connection is in use. The connection
+    uses the current tenant's schema.
+    """
     pool = get_mysql_pool()
-    return pool.get_connection()
+    cnx = pool.get_connection()
+    schema = tenants.current().db
+    try:
+        if getattr(cnx, "tenant_db", CONNECT_DB) != schema:
+            cnx.cmd_init_db(schema)
+            cnx.tenant_db = schema
+    except Exception:
+        cnx.close()
+        raise
+    return cnx
 
 
 # 👇 NEW: alias so graphql_api can call get_mysql_conn()
@@ -120,9 +193,9 @@ def get_mongo_client():
 
 
 def get_mongo_db():
-    """Gets the MongoDB database instance."""
+    """Gets the current tenant's MongoDB database."""
     client = get_mongo_client()
-    return client[MONGO_DB_NAME]
+    return client[tenants.current().mongo_db]
 
 
 # 👇 NEW: simple helper to get a specific collection
@@ -131,6 +204,36 @@ def get_mongo_collection(name: str):
     return db[name]
 
 
+# Indexes for the note queries in notes.py: event equality first, then the
+# sort key with _id as tie-breaker, so pages never need an in-memory sort.
+MONGO_INDEXES = {
+    "meeting_notes": [
+        ("eventId_createdAt", [("eventId", 1), ("createdAt", -1), ("_id", -1)]),
+        # Full-text search (search.py); a collection can have only one text index
+        ("content_text", [("content", "text")]),
+    ],
+    "event_notes": [
+        ("mysql_event_id_created_at", [("mysql_event_id", 1), ("created_at", 1), ("_id", 1)]),
+        ("note_tags_text", [("note", "text"), ("tags", "text")]),
+    ],
+}
+
+
+def ensure_mongo_indexes():
+    """Create any missing Mongo indexes in every tenant's database (idempotent; run at startup)."""
+    client = get_mongo_client()
+    if client is None:
+        return
+    for tenant in tenants.all_tenants():
+        db = client[tenant.mongo_db]
+        for collection, indexes in MONGO_INDEXES.items():
+            for name, keys in indexes:
+                try:
+                    db[collection].create_index(keys, name=name)
+                except Exception as e:
+                    print(f"Could not create Mongo index {tenant.mongo_db}.{collection}.{name}: {e}")
+
+
 def get_redis_client():
     """Initializes and returns the Redis client."""
     global redis_client
@@ -157,10 +260,364 @@ def get_redis_conn():
     return get_redis_client()
 
 
+# --- Async Clients / Pools ---
+async_db_pool = None
+async_mongo_client = None
+async_redis_client = None
+async_redis_raw_client = None
+
+
+async def get_async_mysql_pool():
+    """Initializes and returns the aiomysql pool (None if aiomysql is missing)."""
+    global async_db_pool
+    if async_db_pool is None and aiomysql is not None:
+        try:
+            async_db_pool = await aiomysql.create_pool(
+                minsize=min(POOL_MIN_SIZE, ASYNC_POOL_SIZE),
+                maxsize=ASYNC_POOL_SIZE,
+                pool_recycle=POOL_MAX_LIFETIME,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                host=DB_HOST,
+                port=DB_PORT,
+                db=CONNECT_DB,
+                autocommit=True,
+            )
+            print("Async database connection pool created successfully.")
+        except Exception as err:
+            print(f"Error creating async connection pool: {err}")
+
+    return async_db_pool
+
+
+class AsyncMySQLConnection:
+    """
+    Awaitable wrapper around one pooled MySQL connection.
+    Statements autocommit; call begin() to group several into a transaction.
+    """
+
+    def __init__(self, conn, pool=None, release=None):
+        self._conn = conn
+        self._pool = pool
+        # Gives the tenant's quota slot back once the connection is returned
+        self._release = release
+        self.lastrowid = None
+        # Set when a statement was cancelled mid-flight; the protocol state
+        # is unknown, so the connection is closed instead of reused.
+        self.broken = False
+        # mysql-connector calls run on worker threads; a cancelled await
+        # does not stop the thread, so later calls wait for it to finish.
+        self._thread_lock = threading.Lock()
+
+    async def _in_thread(self, fn, *args):
+        def locked():
+            with self._thread_lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    async def _call(self, fn, *args):
+        # aiomysql methods are coroutines; mysql-connector ones block
+        if self._pool is not None:
+            return await fn(*args)
+        return await self._in_thread(fn, *args)
+
+    async def _run(self, sql, params, fetch=None, many=False):
+        start = time.perf_counter()
+        try:
+            return await self._execute(sql, params, fetch, many)
+        except asyncio.CancelledError:
+            if self._pool is not None:
+                self.broken = True
+            raise
+        finally:
+            record_call("mysql", time.perf_counter() - start)
+
+    async def _execute(self, sql, params, fetch, many):
+        if self._pool is not None:
+            async with self._conn.cursor(aiomysql.DictCursor) as cur:
+                if many:
+                    await cur.executemany(sql, params)
+                else:
+                    await cur.execute(sql, params)
+                self.lastrowid = cur.lastrowid
+                if fetch == "one":
+                    return await cur.fetchone()
+                if fetch == "all":
+                    return await cur.fetchall()
+                return cur.rowcount
+
+        def blocking():
+            cur = self._conn.cursor(dictionary=True)
+            try:
+                if many:
+                    cur.executemany(sql, params)
+                else:
+                    cur.execute(sql, params)
+                self.lastrowid = cur.lastrowid
+                if fetch == "one":
+                    return cur.fetchone()
+                if fetch == "all":
+                    return cur.fetchall()
+                return cur.rowcount
+            finally:
+                cur.close()
+
+        return await self._in_thread(blocking)
+
+    async def fetchall(self, sql, params=()):
+        return await self._run(sql, params, fetch="all")
+
+    async def fetchone(self, sql, params=()):
+        return await self._run(sql, params, fetch="one")
+
+    async def execute(self, sql, params=()):
+        """Run a statement and return its rowcount (lastrowid is kept on self)."""
+        return await self._run(sql, params)
+
+    async def executemany(self, sql, seq_params):
+        return await self._run(sql, seq_params, many=True)
+
+    async def begin(self):
+        if self._pool is not None:
+            await self._conn.begin()
+        else:
+            await self._in_thread(self._conn.start_transaction)
+
+    async def commit(self):
+        await self._call(self._conn.commit)
+
+    async def rollback(self):
+        await self._call(self._conn.rollback)
+
+    async def use_database(self, schema: str):
+        """Switch to `schema` unless the connection already uses it."""
+        if getattr(self._conn, "tenant_db", CONNECT_DB) == schema:
+            return
+        if self._pool is not None:
+            await self._conn.select_db(schema)
+        else:
+            await self._in_thread(self._conn.cmd_init_db, schema)
+        self._conn.tenant_db = schema
+
+    async def close(self):
+        """Return the connection to its pool."""
+        if self._conn is None:
+            return
+        try:
+            if self._pool is not None:
+                if self.broken:
+                    self._conn.close()
+                self._pool.release(self._conn)
+            else:
+                await self._in_thread(self._conn.close)
+        finally:
+            self._conn = None
+            if self._release is not None:
+                self._release()
+
+
+# tenant id -> semaphore over its pool quota, and connections it holds
+_tenant_slots: dict = {}
+_tenant_in_use: dict = {}
+
+TENANT_QUOTA_WAITS = Counter(
+    "mysql_pool_tenant_quota_waits_total", "Borrows that waited because the tenant was at its quota", ("tenant",)
+)
+
+
+async def _take_tenant_slot(tenant) -> Callable[[], None]:
+    """Wait for one of the tenant's quota slots; returns the function giving it back."""
+    slots = _tenant_slots.get(tenant.id)
+    if slots is None:
+        slots = _tenant_slots[tenant.id] = asyncio.Semaphore(tenant.pool_quota or TENANT_POOL_QUOTA)
+    if slots.locked():
+        TENANT_QUOTA_WAITS.inc(tenant.id)
+    try:
+        await asyncio.wait_for(slots.acquire(), POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PoolTimeout(
+            f"Tenant '{tenant.id}' holds its quota of {tenant.pool_quota or TENANT_POOL_QUOTA} "
+            f"MySQL connections; none freed within {POOL_TIMEOUT:.1f}s"
+        )
+    _tenant_in_use[tenant.id] = _tenant_in_use.get(tenant.id, 0) + 1
+
+    def release():
+        _tenant_in_use[tenant.id] -= 1
+        slots.release()
+    return release
+
+
+async def get_async_mysql_conn() -> AsyncMySQLConnection:
+    """
+    Borrows a connection for the current tenant from the async pool (or
+    the sync pool as a fallback), within the tenant's pool quota.
+    """
+    tenant = tenants.current()
+    start = time.perf_counter()
+    release = await _take_tenant_slot(tenant)
+    try:
+        pool = await get_async_mysql_pool()
+        if pool is None:
+            # The sync pool records its own wait time and selects the schema
+            raw = await asyncio.to_thread(get_db_connection)
+            raw.autocommit = True
+            return AsyncMySQLConnection(raw, release=release)
+
+        try:
+            raw = await asyncio.wait_for(pool.acquire(), max(0.0, POOL_TIMEOUT - (time.perf_counter() - start)))
+        except asyncio.TimeoutError:
+            raise PoolTimeout(
+                f"No MySQL connection available within {POOL_TIMEOUT:.1f}s ({pool.size} in use)"
+            )
+    except BaseException:
+        release()
+        raise
+    record_pool_wait(time.perf_counter() - start)
+    conn = AsyncMySQLConnection(raw, pool, release)
+    try:
+        await conn.use_database(tenant.db)
+    except BaseException:
+        conn.broken = True
+        await conn.close()
+        raise
+    return conn
+
+
+@asynccontextmanager
+async def async_mysql_conn():
+    """`async with async_mysql_conn() as conn:` borrow-and-return helper."""
+    conn = await get_async_mysql_conn()
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+def get_async_mongo_client():
+    """Initializes and returns the Motor client."""
+    global async_mongo_client
+    if async_mongo_client is None:
+        if AsyncIOMotorClient is None:
+            raise RuntimeError("motor is not installed; the async Mongo client is unavailable.")
+        async_mongo_client = AsyncIOMotorClient(MONGO_URI, server_api=ServerApi("1"))
+
+    return async_mongo_client
+
+
+def get_async_mongo_db():
+    """Gets the current tenant's async MongoDB database."""
+    return get_async_mongo_client()[tenants.current().mongo_db]
+
+
+def get_async_mongo_collection(name: str):
+    return get_async_mongo_db()[name]
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """redis.asyncio client that reports each command and pipeline to metrics."""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            record_call("redis", time.perf_counter() - start)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        async def timed_execute(raise_on_error=True):
+            start = time.perf_counter()
+            try:
+                return await execute(raise_on_error)
+            finally:
+                record_call("redis", time.perf_counter() - start)
+
+        pipe.execute = timed_execute
+        return pipe
+
+
+def get_async_redis():
+    """Initializes and returns the redis.asyncio client."""
+    global async_redis_client
+    if async_redis_client is None:
+        async_redis_client = InstrumentedRedis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            decode_responses=True,
+            username=REDIS_USERNAME,
+            password=REDIS_PASSWORD,
+        )
+
+    return async_redis_client
+
+
+def get_async_redis_raw():
+    """redis.asyncio client that returns bytes (for bitmaps and other binary values)."""
+    global async_redis_raw_client
+    if async_redis_raw_client is None:
+        async_redis_raw_client = InstrumentedRedis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            decode_responses=False,
+            username=REDIS_USERNAME,
+            password=REDIS_PASSWORD,
+        )
+
+    return async_redis_raw_client
+
+
+async def close_async_connections():
+    """Close the async pools and clients."""
+    global async_db_pool, async_mongo_client, async_redis_client, async_redis_raw_client
+    if async_db_pool is not None:
+        async_db_pool.close()
+        await async_db_pool.wait_closed()
+        async_db_pool = None
+    if async_mongo_client is not None:
+        async_mongo_client.close()
+        async_mongo_client = None
+    if async_redis_client is not None:
+        await async_redis_client.aclose()
+        async_redis_client = None
+    if async_redis_raw_client is not None:
+        await async_redis_raw_client.aclose()
+        async_redis_raw_client = None
+    print("Async connection cleanup finished.")
+
+
+def pool_metrics():
+    """Prometheus gauges for both MySQL pools (registered with metrics)."""
+    lines = []
+    if db_pool is not None:
+        stats = db_pool.stats()
+        for name, key in (("size", "size"), ("in_use", "inUse"), ("idle", "idle"),
+                          ("waiters", "waiters"), ("max_size", "maxSize")):
+            lines.append(f'mysql_pool_{name}{{pool="sync"}} {stats[key]}')
+        for name in ("created", "recycled", "timeouts"):
+            lines.append(f'mysql_pool_{name}_total{{pool="sync"}} {stats[name]}')
+    if async_db_pool is not None:
+        size, free = async_db_pool.size, async_db_pool.freesize
+        lines.append(f'mysql_pool_size{{pool="async"}} {size}')
+        lines.append(f'mysql_pool_in_use{{pool="async"}} {size - free}')
+        lines.append(f'mysql_pool_idle{{pool="async"}} {free}')
+        lines.append(f'mysql_pool_max_size{{pool="async"}} {async_db_pool.maxsize}')
+    for tenant_id, in_use in sorted(_tenant_in_use.items()):
+        lines.append(f'mysql_pool_tenant_in_use{{tenant="{tenant_id}"}} {in_use}')
+    return lines
+
+
+register_collector(pool_metrics)
+
+
 # --- Graceful Shutdown ---
 def close_connections():
     """Close all database connections."""
-    global mongo_client
+    global db_pool, mongo_client
+    if db_pool is not None:
+        db_pool.close()
+        db_pool = None
     if mongo_client:
         mongo_client.close()
         mongo_client = None
@@ -170,6 +627,29 @@ def close_connections():
     print("Connection cleanup finished.")
 
 
+# --- Worker processes ---
+def reset_after_fork():
+    """
+    Forget the pools and clients inherited from a parent process.
+
+    gunicorn with preload_app (or any fork after import) would otherwise
+    hand every worker the same sockets. They are dropped, not closed:
+    closing would also close them in the parent. Each worker then opens
+    its own on first use.
+    """
+    global db_pool, mongo_client, redis_client
+    global async_db_pool, async_mongo_client, async_redis_client, async_redis_raw_client
+    db_pool = mongo_client = redis_client = None
+    async_db_pool = async_mongo_client = async_redis_client = async_redis_raw_client = None
+    # Semaphores belong to the parent's event loop
+    _tenant_slots.clear()
+    _tenant_in_use.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+
 # Example of how to use the functions
 if __name__ == "__main__":
     print("Attempting to connect to all databases...")
@@ -2,11 +2,17 @@
 from datetime import datetime
 from typing import List, Optional
 
-import mysql.connector
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 
-from database import get_db_connection, get_mongo_db, get_redis_conn
+from attendance import persist_checkins
+from checkin_store import checkin_store
+from database import MYSQL_ERRORS, async_mysql_conn, get_async_mongo_db
+from metrics import track
+from pagination import ListSpec, fetch_page
+from notes import event_notes
+from query_cache import query_cache
+from roster import EventNotFound, PooledQueries, import_roster
 
 router = APIRouter()
 
@@ -35,74 +41,69 @@ class EventNoteCreate(BaseModel):
 # Event CRUD (MySQL)
 # ============================================================
 
+REST_EVENT_LIST = ListSpec(
+    source="Event",
+    columns={"id": "id", "event_typeID": "event_typeID", "Type": "Type", "Notes": "Notes"},
+    order=["id"],
+)
+
+
 @router.get("/events", response_model=List[Event])
-def get_all_events():
-    """Get all events from MySQL."""
-    cnx = None
-    cursor = None
+async def get_all_events(response: Response, limit: Optional[int] = None, after: Optional[str] = None):
+    """
+    Get all events from MySQL. Pass `limit` (and `after`) for keyset pages;
+    the next page's cursor is returned in the X-Next-Cursor header.
+    """
+    async def load():
+        async with async_mysql_conn() as cnx:
+            return await cnx.fetchall("SELECT id, event_typeID, Type, Notes FROM Event ORDER BY ID")
+
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, event_typeID, Type, Notes FROM Event;")
-        rows = cursor.fetchall()
+        if limit is None and after is None:
+            return await query_cache.get_or_load("events", "rest:extra", load)
+
+        async with async_mysql_conn() as cnx:
+            rows, page_info, _ = await fetch_page(cnx, REST_EVENT_LIST, REST_EVENT_LIST.columns, limit, after)
+        if page_info.hasNextPage:
+            response.headers["X-Next-Cursor"] = page_info.endCursor
         return rows
-    except mysql.connector.Error as err:
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    except MYSQL_ERRORS as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
 @router.get("/events/{event_id}", response_model=Event)
-def get_event_by_id(event_id: int):
+async def get_event_by_id(event_id: int):
     """Get a single event by ID."""
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, event_typeID, Type, Notes FROM Event WHERE id = %s;",
-            (event_id,),
-        )
-        row = cursor.fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Event not found")
-        return row
-    except mysql.connector.Error as err:
+        async with async_mysql_conn() as cnx:
+            row = await cnx.fetchone(
+                "SELECT id, event_typeID, Type, Notes FROM Event WHERE id = %s;",
+                (event_id,),
+            )
+    except MYSQL_ERRORS as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return row
 
 
 @router.post("/events", response_model=Event, status_code=201)
-def create_event(event: EventCreate):
+async def create_event(event: EventCreate):
     """Create a new event in MySQL."""
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        sql = """
-            INSERT INTO Event (event_typeID, Type, Notes)
-            VALUES (%s, %s, %s);
-        """
-        cursor.execute(sql, (event.event_typeID, event.Type, event.Notes))
-        cnx.commit()
-        new_id = cursor.lastrowid
+        async with async_mysql_conn() as cnx:
+            sql = """
+                INSERT INTO Event (event_typeID, Type, Notes)
+                VALUES (%s, %s, %s);
+            """
+            await cnx.execute(sql, (event.event_typeID, event.Type, event.Notes))
+            new_id = cnx.lastrowid
+        await query_cache.bump("events")
         return Event(id=new_id, **event.model_dump())
-    except mysql.connector.Error as err:
+    except MYSQL_ERRORS as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
 # ============================================================
@@ -110,62 +111,47 @@ def create_event(event: EventCreate):
 # ============================================================
 
 @router.get("/event/{event_id}/checked-in")
-def get_checked_in_students(event_id: int):
+async def get_checked_in_students(event_id: int):
     """
     Return list of student IDs currently checked in (from Redis).
     """
-    r = get_redis_conn()
-    # Match the key pattern from app.py /event/check-in
-    redis_key = f"event {event_id}:checkIn"
-    student_ids = list(r.smembers(redis_key))  # Redis returns strings
+    student_ids = await checkin_store.members(event_id)
     return {"event_id": event_id, "checked_in_students": student_ids}
 
-@router.post("/event/{event_id}/persist-attendance")
-def persist_attendance(event_id: int):
-    r = get_redis_conn()
-    redis_key = f"event {event_id}:checkIn"
-    student_ids = list(r.smembers(redis_key))
-    if not student_ids:
-        return {
-            "event_id": event_id,
-            "persisted": 0,
-            "message": "No check-ins found in Redis.",
-        }
-
-    cnx = None
-    cursor = None
+@router.post("/event/{event_id}/roster")
+async def import_event_roster(event_id: int, request: Request):
+    """
+    Check in a whole roster from a streamed CSV (studentID column or one ID
+    per line) or NDJSON body. Returns which students were checked in, which
+    already were, and which lines or IDs failed.
+    """
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor()
-        now = datetime.now()
-        date_str = now.date().isoformat()
-        time_str = now.time().replace(microsecond=0).isoformat()
-
-        insert_sql = """
-            INSERT INTO AttendanceRecord (eventID, theDATE, theTime, RSVP)
-            VALUES (%s, %s, %s, %s);
-        """
-
-        for _sid in student_ids:
-            cursor.execute(insert_sql, (event_id, date_str, time_str, "YES"))
-
-        cnx.commit()
+        return await import_roster(
+            PooledQueries(), event_id, request.stream(), request.headers.get("content-type")
+        )
+    except EventNotFound:
+        raise HTTPException(status_code=404, detail="Event not found")
+    except MYSQL_ERRORS as err:
+        raise HTTPException(status_code=500, detail=f"MySQL Error: {err}")
 
-        # Clear Redis key
-        r.delete(redis_key)
+@router.post("/event/{event_id}/persist-attendance")
+async def persist_attendance(event_id: int):
+    try:
+        persisted = await persist_checkins(event_id)
+    except MYSQL_ERRORS as err:
+        raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
+    if not persisted:
         return {
             "event_id": event_id,
-            "persisted": len(student_ids),
-            "message": "Attendance persisted to MySQL and Redis key cleared.",
+            "persisted": 0,
+            "message": "No check-ins found in Redis.",
         }
-    except mysql.connector.Error as err:
-        raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
+    return {
+        "event_id": event_id,
+        "persisted": persisted,
+        "message": "Attendance persisted to MySQL and Redis key cleared.",
+    }
 
 
 # ============================================================
@@ -173,28 +159,20 @@ def persist_attendance(event_id: int):
 # ============================================================
 
 @router.post("/event/{event_id}/notes", status_code=201)
-def add_event_note(event_id: int, payload: EventNoteCreate):
+async def add_event_note(event_id: int, payload: EventNoteCreate):
     """
     Add a meeting note for a given event_id into MongoDB.
     """
     # Optional: verify event exists
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor()
-        cursor.execute("SELECT ID FROM Event WHERE ID = %s;", (event_id,))
-        if cursor.fetchone() is None:
-            raise HTTPException(status_code=404, detail="Event not found")
-    except mysql.connector.Error as err:
+        async with async_mysql_conn() as cnx:
+            event = await cnx.fetchone("SELECT ID FROM Event WHERE ID = %s;", (event_id,))
+    except MYSQL_ERRORS as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
 
-    db = get_mongo_db()
+    db = get_async_mongo_db()
     notes_coll = db["event_notes"]
 
     doc = {
@@ -204,28 +182,34 @@ def add_event_note(event_id: int, payload: EventNoteCreate):
         "tags": payload.tags or [],
         "created_at": datetime.utcnow().isoformat() + "Z",
     }
-    result = notes_coll.insert_one(doc)
+    with track("mongo"):
+        result = await notes_coll.insert_one(doc)
     return {"mongo_id": str(result.inserted_id), "event_id": event_id}
 
 
 @router.get("/event/{event_id}/notes")
-def list_event_notes(event_id: int):
+async def list_event_notes(
+        event_id: int, response: Response, limit: Optional[int] = None, after: Optional[str] = None
+):
     """
-    List all MongoDB notes for a given event.
+    List MongoDB notes for a given event, oldest first. With `limit`, one
+    page is returned and X-Next-Cursor holds the `after` for the next one.
     """
-    db = get_mongo_db()
-    notes_coll = db["event_notes"]
-
-    docs = notes_coll.find({"mysql_event_id": event_id}).sort("created_at", 1)
-    notes = []
-    for d in docs:
-        notes.append(
-            {
-                "id": str(d.get("_id")),
-                "note": d.get("note"),
-                "author": d.get("author"),
-                "tags": d.get("tags", []),
-                "created_at": d.get("created_at"),
-            }
-        )
+    try:
+        docs, next_cursor = await event_notes(event_id, first=limit, after=after)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    notes = [
+        {
+            "id": str(d.get("_id")),
+            "note": d.get("note"),
+            "author": d.get("author"),
+            "tags": d.get("tags", []),
+            "created_at": d.get("created_at"),
+        }
+        for d in docs
+    ]
     return {"event_id": event_id, "notes": notes}
@@ -0,0 +1,89 @@
+# fanout.py
+"""
+Concurrent reads across MySQL, Redis and MongoDB for multi-store resolvers.
+
+`fan_out` runs one awaitable per store at the same time, each under its own
+timeout, so the slowest store bounds the latency instead of the sum of all
+three. A store that times out or errors yields its default value and is
+reported as unavailable rather than failing the whole resolver. Per-store
+timings are appended to the request context and surfaced in the GraphQL
+response under `extensions.storeTimings` by `StoreTimingExtension`.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+from strawberry.extensions import SchemaExtension
+
+# Per-store timeouts in seconds
+STORE_TIMEOUTS = {
+    "mysql": float(os.getenv("MYSQL_READ_TIMEOUT", "2.0")),
+    "redis": float(os.getenv("REDIS_READ_TIMEOUT", "0.5")),
+    "mongo": float(os.getenv("MONGO_READ_TIMEOUT", "1.0")),
+}
+
+
+class StoreResult:
+    """Outcome of one store read inside a fan-out."""
+
+    def __init__(self, value: Any, status: str, elapsed_ms: float, error: Optional[str] = None):
+        self.value = value
+        self.status = status  # "ok", "timeout" or "error"
+        self.elapsed_ms = elapsed_ms
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+async def _timed(store: str, awaitable: Awaitable, default: Any) -> StoreResult:
+    start = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(awaitable, STORE_TIMEOUTS.get(store, 1.0))
+        status, error = "ok", None
+    except asyncio.TimeoutError:
+        value, status, error = default, "timeout", None
+    except Exception as e:
+        value, status, error = default, "error", str(e)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    return StoreResult(value, status, elapsed_ms, error)
+
+
+async def fan_out(
+        calls: Dict[str, Awaitable],
+        defaults: Optional[Dict[str, Any]] = None,
+        timings: Optional[List[dict]] = None,
+        label: str = "",
+) -> Dict[str, StoreResult]:
+    """
+    Await every call concurrently. `calls` maps a store name ("mysql",
+    "redis", "mongo") to an awaitable; `defaults` gives the value used when
+    that store times out or fails. Timings are appended to `timings`.
+    """
+    defaults = defaults or {}
+    stores = list(calls)
+    results = await asyncio.gather(
+        *(_timed(store, calls[store], defaults.get(store)) for store in stores)
+    )
+    outcome = dict(zip(stores, results))
+
+    if timings is not None:
+        for store, res in outcome.items():
+            entry = {"field": label, "store": store, "ms": res.elapsed_ms, "status": res.status}
+            if res.error:
+                entry["error"] = res.error
+            timings.append(entry)
+    return outcome
+
+
+class StoreTimingExtension(SchemaExtension):
+    """Adds the per-store timings collected during execution to `extensions`."""
+
+    def get_results(self):
+        context = self.execution_context.context
+        timings = context.get("store_timings") if isinstance(context, dict) else None
+        if not timings:
+            return {}
+        return {"storeTimings": timings}
@@ -1,5 +1,5 @@
 const API_BASE = "http://localhost:8000";
-const GRAPHQL_URL = `${API_BASE}/graphql`;
+const GRAPHQL_WS_URL = GRAPHQL_URL.replace(/^http/, "ws");
 
 // ============================================================
 // Check Authentication
@@ -30,13 +30,7 @@ async function safeFetch(url) {
 
 async function gqlRequest(query, variables = {}) {
   try {
-    const res = await fetch(GRAPHQL_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ query, variables }),
-    });
-
-    const json = await res.json();
+    const json = await gqlPersisted(query, variables);
 
     if (json.errors) {
       console.error("GraphQL errors:", json.errors);
@@ -50,6 +44,37 @@ async function gqlRequest(query, variables = {}) {
   }
 }
 
+// Minimal graphql-transport-ws client; returns a function that unsubscribes
+function gqlSubscribe(query, variables, onNext, onError) {
+  const ws = new WebSocket(GRAPHQL_WS_URL, "graphql-transport-ws");
+  let closed = false;
+
+  ws.onopen = () => ws.send(JSON.stringify({ type: "connection_init" }));
+  ws.onmessage = (evt) => {
+    const msg = JSON.parse(evt.data);
+    if (msg.type === "connection_ack") {
+      ws.send(
+        JSON.stringify({ id: "1", type: "subscribe", payload: { query, variables } })
+      );
+    } else if (msg.type === "next") {
+      if (msg.payload.errors) onError(new Error(msg.payload.errors[0].message));
+      else onNext(msg.payload.data);
+    } else if (msg.type === "error") {
+      onError(new Error(msg.payload[0].message));
+    } else if (msg.type === "ping") {
+      ws.send(JSON.stringify({ type: "pong" }));
+    }
+  };
+  ws.onclose = () => {
+    if (!closed) onError(new Error("Live updates disconnected"));
+  };
+
+  return () => {
+    closed = true;
+    ws.close();
+  };
+}
+
 function showStatus(elementId, message, type = "info") {
   const el = document.getElementById(elementId);
   if (!el) return;
@@ -82,6 +107,10 @@ function openModal(html) {
 }
 
 function closeModal(overlay) {
+  if (overlay && overlay.onClose) {
+    overlay.onClose();
+    overlay.onClose = null;
+  }
   if (overlay && overlay.parentNode) {
     overlay.parentNode.removeChild(overlay);
   }
@@ -103,7 +132,6 @@ async function loadMultiDatabaseStats(eventId) {
           Notes
           currentlyCheckedIn
           liveAttendeeCount
-          meetingNotes
           notesCount
         }
       }
@@ -214,8 +242,9 @@ async function openEventModal(event) {
   // Load MULTI-DATABASE stats first (demonstrates all 3 databases in one query!)
   await loadMultiDatabaseStats(event.id);
 
-  // Load checked-in students
+  // Load checked-in students, then keep the list live over a subscription
   await loadCheckedInStudents(event.id);
+  overlay.onClose = watchCheckIns(event.id);
 
   // Load meeting notes
   await loadMeetingNotes(event.id);
@@ -284,45 +313,97 @@ async function openEventModal(event) {
     });
 }
 
-async function loadCheckedInStudents(eventId) {
+// Live check-in state for the open event modal
+const liveCheckIns = { eventId: null, ids: new Set(), names: new Map(), connected: false };
+
+function renderCheckedIn() {
   const listEl = document.getElementById("checkin-list");
   const countEl = document.getElementById("checkin-count");
+  if (!listEl || !countEl) return;
+
+  const ids = [...liveCheckIns.ids].sort((a, b) => a - b);
+  countEl.textContent = ids.length;
+
+  if (ids.length === 0) {
+    listEl.innerHTML =
+      '<div class="empty-state">No students checked in yet</div>';
+    return;
+  }
+
+  listEl.innerHTML = ids
+    .map((id) => liveCheckIns.names.get(id) || `Student #${id}`)
+    .map((name) => `<div class="checkin-badge">${name}</div>`)
+    .join("");
+}
+
+function watchCheckIns(eventId) {
+  const subscription = `
+    subscription CheckInChanges($eventId: Int!) {
+      checkInChanges(eventId: $eventId) {
+        action
+        studentIds
+      }
+    }
+  `;
+
+  const stop = gqlSubscribe(
+    subscription,
+    { eventId },
+    (data) => {
+      const change = data.checkInChanges;
+      liveCheckIns.connected = true;
+      if (change.action === "snapshot" || change.action === "cleared") {
+        liveCheckIns.ids = new Set(change.studentIds);
+      } else if (change.action === "checked_in") {
+        change.studentIds.forEach((id) => liveCheckIns.ids.add(id));
+      } else {
+        // checked_out / persisted
+        change.studentIds.forEach((id) => liveCheckIns.ids.delete(id));
+      }
+      if (liveCheckIns.eventId === eventId) renderCheckedIn();
+    },
+    (err) => {
+      liveCheckIns.connected = false;
+      console.warn("Check-in subscription:", err.message);
+    }
+  );
+
+  return () => {
+    liveCheckIns.connected = false;
+    liveCheckIns.eventId = null;
+    stop();
+  };
+}
+
+async function loadCheckedInStudents(eventId) {
+  const listEl = document.getElementById("checkin-list");
 
   try {
     const query = `
       query CheckedIn($eventId: Int!) {
         checkedInStudents(eventId: $eventId)
-        students {
-          id
-          firstName
-          lastName
+      }
+    `;
+    const studentsQuery = `
+      query StudentNames($first: Int, $after: String) {
+        studentsConnection(first: $first, after: $after) {
+          edges { node { id firstName lastName } }
+          pageInfo { hasNextPage endCursor }
         }
       }
     `;
 
-    const data = await gqlRequest(query, { eventId });
-    const checkedInIds = data.checkedInStudents || [];
-    const allStudents = data.students || [];
-
-    countEl.textContent = checkedInIds.length;
-
-    if (checkedInIds.length === 0) {
-      listEl.innerHTML =
-        '<div class="empty-state">No students checked in yet</div>';
-      return;
-    }
-
-    // Map IDs to student names
-    const checkedInStudents = checkedInIds.map((id) => {
-      const student = allStudents.find((s) => s.id === parseInt(id));
-      return student
-        ? `${student.firstName} ${student.lastName}`
-        : `Student #${id}`;
-    });
+    const [data, allStudents] = await Promise.all([
+      gqlRequest(query, { eventId }),
+      gqlAllNodes(studentsQuery, {}, "studentsConnection"),
+    ]);
 
-    listEl.innerHTML = checkedInStudents
-      .map((name) => `<div class="checkin-badge">${name}</div>`)
-      .join("");
+    liveCheckIns.eventId = eventId;
+    liveCheckIns.ids = new Set(data.checkedInStudents || []);
+    liveCheckIns.names = new Map(
+      allStudents.map((s) => [s.id, `${s.firstName} ${s.lastName}`])
+    );
+    renderCheckedIn();
   } catch (err) {
     listEl.innerHTML = `<div class="status-text status-error">Error loading check-ins: ${err.message}</div>`;
   }
@@ -355,8 +436,8 @@ async function checkInStudent(eventId) {
     );
     studentIdInput.value = "";
 
-    // Refresh the list
-    await loadCheckedInStudents(eventId);
+    // The subscription pushes the new arrival; only refetch without it
+    if (!liveCheckIns.connected) await loadCheckedInStudents(eventId);
 
     setTimeout(() => hideStatus("checkin-status"), 3000);
   } catch (err) {
@@ -391,7 +472,7 @@ async function persistAttendance(eventId) {
     );
 
     // Refresh check-in list (should be empty now)
-    await loadCheckedInStudents(eventId);
+    if (!liveCheckIns.connected) await loadCheckedInStudents(eventId);
   } catch (err) {
     showStatus("persist-status", `Error: ${err.message}`, "error");
   }
@@ -554,19 +635,23 @@ async function loadStudentAttendance(studentId) {
 
   try {
     const query = `
-      query StudentAttendance($studentId: Int!) {
-        studentAttendance(studentId: $studentId) {
-          id
-          eventId
-          theDATE
-          theTime
-          eventName
+      query StudentAttendance($studentId: Int!, $first: Int, $after: String) {
+        studentAttendanceConnection(studentId: $studentId, first: $first, after: $after) {
+          edges {
+            node {
+              id
+              eventId
+              theDATE
+              theTime
+              eventName
+            }
+          }
+          pageInfo { hasNextPage endCursor }
         }
       }
     `;
 
-    const data = await gqlRequest(query, { studentId });
-    const attendance = data.studentAttendance || [];
+    const attendance = await gqlAllNodes(query, { studentId }, "studentAttendanceConnection");
 
     if (attendance.length === 0) {
       listEl.innerHTML =
@@ -653,16 +738,14 @@ async function initDashboard() {
   let volunteers = [];
   try {
     const query = `
-      query GetAllVolunteers {
-        volunteers {
-          id
-          firstName
-          lastName
+      query GetAllVolunteers($first: Int, $after: String) {
+        volunteersConnection(first: $first, after: $after) {
+          edges { node { id firstName lastName } }
+          pageInfo { hasNextPage endCursor }
         }
       }
     `;
-    const data = await gqlRequest(query);
-    volunteers = data.volunteers || [];
+    volunteers = await gqlAllNodes(query, {}, "volunteersConnection");
   } catch (err) {
     console.error("Error loading volunteers:", err);
   }
@@ -1734,17 +1817,15 @@ async function openVolunteerModal(volunteer, allEvents) {
   // Load volunteer records
   try {
     const query = `
-      query GetVolunteerRecords($volunteerId: Int!) {
-        volunteerRecords(volunteerId: $volunteerId) {
-          id
-          eventId
-          eventName
+      query GetVolunteerRecords($volunteerId: Int!, $first: Int, $after: String) {
+        volunteerRecordsConnection(volunteerId: $volunteerId, first: $first, after: $after) {
+          edges { node { id eventId eventName } }
+          pageInfo { hasNextPage endCursor }
         }
       }
     `;
 
-    const data = await gqlRequest(query, { volunteerId: volunteer.id });
-    const records = data.volunteerRecords || [];
+    const records = await gqlAllNodes(query, { volunteerId: volunteer.id }, "volunteerRecordsConnection");
 
     const recordsEl = document.getElementById("volunteer-records-list");
     if (records.length === 0) {
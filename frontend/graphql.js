@@ -0,0 +1,61 @@
+// GraphQL transport shared by every page (loaded before the page's script).
+const GRAPHQL_URL = "http://localhost:8000/graphql";
+
+// Automatic persisted queries: send the query's SHA-256 (by GET for reads,
+// so responses are HTTP-cacheable) and the full text only when the server
+// does not know the hash yet.
+const queryHashes = new Map();
+
+async function sha256Hex(text) {
+  if (!window.crypto || !crypto.subtle) return null; // not a secure context
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+}
+
+async function gqlSend(body, viaGet) {
+  if (viaGet) {
+    const params = new URLSearchParams({
+      variables: JSON.stringify(body.variables),
+      extensions: JSON.stringify(body.extensions),
+    });
+    const res = await fetch(`${GRAPHQL_URL}?${params}`);
+    return res.json();
+  }
+  const res = await fetch(GRAPHQL_URL, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  return res.json();
+}
+
+async function gqlPersisted(query, variables) {
+  if (!queryHashes.has(query)) queryHashes.set(query, await sha256Hex(query));
+  const hash = queryHashes.get(query);
+  if (!hash) return gqlSend({ query, variables }, false);
+
+  const extensions = { persistedQuery: { version: 1, sha256Hash: hash } };
+  const isRead = !/^\s*(mutation|subscription)\b/.test(query);
+  const json = await gqlSend({ variables, extensions }, isRead);
+  const missing = (json.errors || []).some(
+    (e) => e.extensions && e.extensions.code === "PERSISTED_QUERY_NOT_FOUND"
+  );
+  return missing ? gqlSend({ query, variables, extensions }, false) : json;
+}
+
+// Largest page the server returns (pagination.MAX_PAGE_SIZE)
+const PAGE_SIZE = 500;
+
+// Every node of a *Connection field, read page by page with the page's
+// gqlRequest. `query` takes $first and $after and selects
+// `field { edges { node { ... } } pageInfo { hasNextPage endCursor } }`.
+async function gqlAllNodes(query, variables, field) {
+  const nodes = [];
+  let after = null;
+  do {
+    const page = (await gqlRequest(query, { ...variables, first: PAGE_SIZE, after }))[field];
+    nodes.push(...page.edges.map((edge) => edge.node));
+    after = page.pageInfo.hasNextPage ? page.pageInfo.endCursor : null;
+  } while (after);
+  return nodes;
+}
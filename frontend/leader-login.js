@@ -1,14 +1,6 @@
-const GRAPHQL_URL = "http://localhost:8000/graphql";
-
 async function gqlRequest(query, variables = {}) {
   try {
-    const res = await fetch(GRAPHQL_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ query, variables }),
-    });
-
-    const json = await res.json();
+    const json = await gqlPersisted(query, variables);
 
     if (json.errors && json.errors.length > 0) {
       throw new Error(json.errors[0].message);
@@ -1,18 +1,10 @@
-const GRAPHQL_URL = "http://localhost:8000/graphql";
-
 // ============================================================
 // GraphQL Request Helper
 // ============================================================
 
 async function gqlRequest(query, variables = {}) {
   try {
-    const res = await fetch(GRAPHQL_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ query, variables }),
-    });
-
-    const json = await res.json();
+    const json = await gqlPersisted(query, variables);
     console.log("GraphQL response:", json);
 
     if (json.errors && json.errors.length > 0) {
@@ -110,32 +102,38 @@ async function renderStudentDashboard(studentId) {
 
   const query = `
     query StudentDashboard($studentId: Int!) {
-      studentById(studentId: $studentId) {
+      studentProfile(studentId: $studentId) {
         id
         firstName
         lastName
         guardianID
         guardianName
+        recentAttendance {
+          id
+          eventId
+          eventName
+          theDATE
+          theTime
+        }
       }
-      studentAttendance(studentId: $studentId) {
-        id
-        eventId
-        eventName
-        theDATE
-        theTime
-      }
-      events {
-        id
-        Type
-        Notes
+    }
+  `;
+  const eventsQuery = `
+    query UpcomingEvents($first: Int, $after: String) {
+      eventsConnection(first: $first, after: $after) {
+        edges { node { id Type Notes } }
+        pageInfo { hasNextPage endCursor }
       }
     }
   `;
 
   try {
-    const data = await gqlRequest(query, { studentId });
+    const [data, events] = await Promise.all([
+      gqlRequest(query, { studentId }),
+      gqlAllNodes(eventsQuery, {}, "eventsConnection"),
+    ]);
 
-    if (!data.studentById) {
+    if (!data.studentProfile) {
       app.innerHTML = `
         <div class="card">
           <div class="card-header">
@@ -154,9 +152,8 @@ async function renderStudentDashboard(studentId) {
       return;
     }
 
-    const student = data.studentById;
-    const attendance = data.studentAttendance || [];
-    const events = data.events || [];
+    const student = data.studentProfile;
+    const attendance = student.recentAttendance || [];
 
     // Build attendance list HTML
     const attendanceHTML =
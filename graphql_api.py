@@ -1,20 +1,38 @@
-from typing import List, Optional
+from typing import AsyncGenerator, List, Optional
 from datetime import datetime
 
 import strawberry
 from strawberry.fastapi import GraphQLRouter
-
-from database import (
-    get_mysql_conn,
-    get_mongo_collection,
-    get_redis_conn,
-    get_mongo_db
+from strawberry.types import Info
+
+from database import get_async_mongo_db
+from analytics import (
+    attendance_trend,
+    current_streak,
+    event_attendance,
+    group_attendance,
+    student_attendance_stats,
 )
-
-
-# Use consistent Redis key format
-def get_checkin_key(event_id: int) -> str:
-    return f"event:{event_id}:checkins"
+from archive import has_archived, history_key, student_history
+from attendance import persist_checkins
+from cascade import CascadeDelete, cascade_delete
+from checkin_events import checkin_events
+from checkin_store import checkin_store
+from fanout import StoreTimingExtension, fan_out
+from loaders import Loaders
+from notes import count_meeting_notes, meeting_notes, note_cursor
+from metrics import TracingExtension, track
+from outbox import outbox
+from pagination import (
+    Connection, Edge, ListSpec, PageInfo, clamp_list_limit, clamp_page_size, decode_cursor, encode_cursor, fetch_page,
+    selected_fields, within_list_limit
+)
+from persisted_queries import AllowList, DocumentCache
+from profiles import student_profiles
+from query_cache import query_cache
+from roster import EventNotFound, bulk_check_in
+from search import KINDS, clamp_limit, name_index, search_notes, split_kinds
+from unit_of_work import UnitOfWork, UnitOfWorkExtension
 
 
 # ---------- GraphQL Types ----------
@@ -52,6 +70,9 @@ class EventDetailsType:
     meetingNotes: List[str]
     notesCount: int
 
+    # Stores that timed out or failed; their fields hold empty defaults
+    unavailableStores: List[str] = strawberry.field(default_factory=list)
+
 
 @strawberry.type
 class EventTypeType:
@@ -78,6 +99,30 @@ class CheckInStatus:
     status: str
 
 
+@strawberry.type
+class CheckInChange:
+    """One change to an event's live check-ins, pushed to subscribers"""
+    eventId: int
+    # "snapshot" (full set), "checked_in", "checked_out", "persisted" or "cleared"
+    action: str
+    studentIds: List[int]
+    count: int
+
+
+@strawberry.type
+class CheckInFailure:
+    studentId: int
+    reason: str
+
+
+@strawberry.type
+class BulkCheckInResult:
+    eventId: int
+    checkedIn: List[int]
+    alreadyCheckedIn: List[int]
+    failed: List[CheckInFailure]
+
+
 @strawberry.type
 class PersistAttendanceResult:
     eventId: int
@@ -107,6 +152,28 @@ class SuccessResult:
     message: str
 
 
+@strawberry.type
+class TableCount:
+    table: str
+    rows: int
+
+
+@strawberry.type
+class BulkDeleteResult:
+    deleted: List[int]
+    notFound: List[int]
+    rows: List[TableCount]  # rows removed per table, dependents included
+
+    @classmethod
+    def of(cls, cascade: CascadeDelete, table: str, ids: List[int]) -> "BulkDeleteResult":
+        deleted = cascade.deleted.get(table, set())
+        return cls(
+            deleted=sorted(deleted),
+            notFound=sorted(set(ids) - deleted),
+            rows=[TableCount(table=t, rows=n) for t, n in sorted(cascade.rows.items())],
+        )
+
+
 @strawberry.type
 class GroupType:
     id: int
@@ -141,75 +208,313 @@ class VolunteerRecordType:
     eventName: Optional[str] = None
 
 
+@strawberry.type
+class EventAttendanceDay:
+    eventId: int
+    date: str
+    attendees: int
+    firstCheckIn: Optional[str] = None
+    lastCheckIn: Optional[str] = None
+
+
+@strawberry.type
+class AttendanceTrendPoint:
+    date: str
+    attendees: int
+    events: int
+
+
+@strawberry.type
+class StudentAttendanceStatsType:
+    studentId: int
+    totalAttended: int
+    firstSeen: str
+    lastSeen: str
+    currentStreak: int  # consecutive weeks attended, 0 once a whole week is missed
+    longestStreak: int
+    lastEventId: Optional[int] = None
+
+
+@strawberry.type
+class ProfileGroupType:
+    id: int
+    name: Optional[str] = None
+
+
+@strawberry.type
+class StudentProfileType:
+    """Everything the student portal shows, served from one precomputed document"""
+    id: int
+    firstName: str
+    lastName: str
+    guardianID: Optional[int] = None
+    guardianName: Optional[str] = None
+    groups: List[ProfileGroupType] = strawberry.field(default_factory=list)
+    recentAttendance: List[AttendanceRecordType] = strawberry.field(default_factory=list)
+    stats: Optional[StudentAttendanceStatsType] = None
+    builtAt: Optional[str] = None
+
+
+@strawberry.type
+class GroupAttendanceDay:
+    eventId: int
+    date: str
+    attended: int
+    members: int
+    rate: float
+
+
+@strawberry.type
+class GroupAttendanceStatsType:
+    groupId: int
+    eventDays: int
+    attended: int
+    memberSlots: int
+    rate: float
+    history: List[GroupAttendanceDay]
+
+
+@strawberry.type
+class SearchResult:
+    kind: str  # student, guardian, volunteer, leader, meeting_note or event_note
+    id: str
+    title: str
+    score: float
+    snippet: Optional[str] = None
+    eventId: Optional[int] = None
+
+
+@strawberry.type
+class SearchResults:
+    results: List[SearchResult]
+    unavailableStores: List[str]
+
+
+# ---------- List Specs (keyset pagination + projection) ----------
+
+STUDENT_LIST = ListSpec(
+    source="Student s",
+    columns={
+        "id": "s.ID",
+        "guardianID": "s.guardianID",
+        "firstName": "s.firstName",
+        "lastName": "s.lastName",
+        "guardianName": "CONCAT(g.firstName, ' ', g.lastName)",
+    },
+    order=["s.firstName", "s.ID"],
+    joins={"guardian": "LEFT JOIN Guardian g ON s.guardianID = g.ID"},
+    join_fields={"guardianName": "guardian"},
+)
+
+EVENT_LIST = ListSpec(
+    source="Event",
+    columns={"id": "ID", "Type": "Type", "Notes": "Notes", "eventTypeid": "event_typeID"},
+    order=["ID"],
+)
+
+VOLUNTEER_LIST = ListSpec(
+    source="Volunteer",
+    columns={"id": "ID", "firstName": "firstName", "lastName": "lastName"},
+    order=["firstName", "ID"],
+)
+
+VOLUNTEER_RECORD_LIST = ListSpec(
+    source="VolunteerRecord vr JOIN Volunteer v ON vr.volunteerID = v.ID",
+    columns={
+        "id": "vr.ID",
+        "volunteerId": "vr.volunteerID",
+        "eventId": "vr.eventID",
+        "volunteerName": "CONCAT(v.firstName, ' ', v.lastName)",
+        "eventName": "e.Type",
+    },
+    order=["vr.ID"],
+    descending=True,
+    joins={"event": "LEFT JOIN Event e ON vr.eventID = e.ID"},
+    join_fields={"eventName": "event"},
+)
+
+ATTENDANCE_LIST = ListSpec(
+    source="AttendanceStudent a",
+    columns={
+        "id": "a.ID",
+        "eventId": "a.eventID",
+        "studentId": "a.studentID",
+        "theDATE": "a.theDATE",
+        "theTime": "a.theTime",
+        "eventName": "e.Type",
+    },
+    # timeKey is theTime in seconds, -1 for NULL (like archive.history_key),
+    # so the key is never NULL and idx_attendance_student_timeline serves the order
+    order=["a.theDATE", "a.timeKey", "a.ID"],
+    descending=True,
+    joins={"event": "LEFT JOIN Event e ON a.eventID = e.ID"},
+    join_fields={"eventName": "event"},
+)
+ATTENDANCE_OF_STUDENT = "a.studentID = %s"
+
+# studentAttendance (unpaginated), newest first
+STUDENT_ATTENDANCE_SQL = """
+    SELECT a.ID        as id,
+           a.eventID   as eventId,
+           a.studentID as studentId,
+           a.theDATE,
+           a.theTime,
+           e.Type      as eventName
+    FROM AttendanceStudent a
+             LEFT JOIN Event e ON a.eventID = e.ID
+    WHERE a.studentID = %s
+    ORDER BY a.theDATE DESC, a.timeKey DESC, a.ID DESC
+    LIMIT %s
+"""
+
+
+def attendance_row(row: dict) -> dict:
+    """MySQL DATE/TIME values as the strings AttendanceRecordType exposes"""
+    for col in ("theDATE", "theTime"):
+        if row.get(col) is not None:
+            row[col] = str(row[col])
+    return row
+
+
+async def resolve_connection(info, spec, node_type, first, after, where=None, params=(), convert=None):
+    """Fetch one keyset page of `spec`, selecting only the requested node fields"""
+    fields = selected_fields(info, ("edges", "node"))
+    rows, page_info, cursors = await fetch_page(info.context["db"], spec, fields, first, after, where, params)
+    edges = [
+        Edge(cursor=cursor, node=node_type(**spec.complete(convert(row) if convert else row)))
+        for row, cursor in zip(rows, cursors)
+    ]
+    return Connection(edges=edges, pageInfo=page_info)
+
+
+async def attendance_connection(info, student_id: int, first, after) -> Connection["AttendanceRecordType"]:
+    """
+    A page of a student's attendance with archived rows merged in. Archive
+    rows get the same (theDATE, theTime, ID) cursors as MySQL rows, so a
+    cursor from either side continues the other.
+
+    Only archived rows that can land on this page are read: those older
+    than the cursor and, when the MySQL rows fill the page, newer than its
+    last one. Segments outside those dates are never opened, so paging
+    through recent attendance does not touch the archive at all.
+    """
+    db = info.context["db"]
+    fields = selected_fields(info, ("edges", "node"))
+    rows, page_info, cursors = await fetch_page(
+        db, ATTENDANCE_LIST, fields, first, after, [ATTENDANCE_OF_STUDENT], (student_id,)
+    )
+    page = [(history_key(*decode_cursor(cursor)), cursor, attendance_row(row)) for row, cursor in zip(rows, cursors)]
+    limit = clamp_page_size(first)
+    bound = history_key(*decode_cursor(after)) if after else None
+    floor = page[-1][0] if limit and len(page) == limit else None
+    for row in await student_history(db, student_id, older_than=bound, newer_than=floor):
+        key = history_key(row["theDATE"], row["theTime"], row["id"])
+        cursor = encode_cursor(list(key))
+        page.append((key, cursor, attendance_row({f: row[f] for f in fields if f in row} or row)))
+
+    page.sort(key=lambda item: item[0], reverse=True)
+    has_next = page_info.hasNextPage or len(page) > limit
+    if not has_next and floor is not None:
+        # Archived rows below the full page were not read; a conservative check
+        has_next = await has_archived(db, student_id, floor[0])
+    page = page[:limit]
+    edges = [
+        Edge(cursor=cursor, node=AttendanceRecordType(**ATTENDANCE_LIST.complete(row)))
+        for _, cursor, row in page
+    ]
+    return Connection(edges=edges, pageInfo=PageInfo(hasNextPage=has_next, endCursor=page[-1][1] if page else None))
+
+
+def meeting_note(event_id: int, doc: dict) -> "MeetingNoteType":
+    return MeetingNoteType(
+        id=str(doc["_id"]),
+        eventId=event_id,
+        content=doc.get("content", ""),
+        createdAt=doc["createdAt"].isoformat(),
+    )
+
+
+async def build_group(loader, group: dict) -> "GroupType":
+    """Assemble a GroupType from a group row using the request's GroupLoader"""
+    members = [StudentType(**m) for m in await loader.members(group['id'])]
+    leaders = [LeaderType(**l) for l in await loader.leaders(group['id'])]
+    return GroupType(
+        id=group['id'],
+        name=group['name'],
+        memberCount=len(members),
+        members=members,
+        leaders=leaders
+    )
+
+
 # ---------- Query Resolvers (READ) ----------
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def students(self) -> List[StudentType]:
-        """Get all students"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-                    SELECT s.ID                                 as id,
-                           s.guardianID,
-                           s.firstName,
-                           s.lastName,
-                           CONCAT(g.firstName, ' ', g.lastName) as guardianName
-                    FROM Student s
-                             LEFT JOIN Guardian g ON s.guardianID = g.ID
-                    ORDER BY s.firstName
-                    """)
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return [StudentType(**row) for row in rows]
+    async def students(self, info: Info, limit: Optional[int] = None) -> List[StudentType]:
+        """Get students (an error beyond GRAPHQL_MAX_LIST_SIZE; page with studentsConnection)"""
+        cap = clamp_list_limit(limit)
+
+        async def load():
+            db = info.context["db"]
+            return await db.fetchall("""
+                                     SELECT s.ID                                 as id,
+                                            s.guardianID,
+                                            s.firstName,
+                                            s.lastName,
+                                            CONCAT(g.firstName, ' ', g.lastName) as guardianName
+                                     FROM Student s
+                                              LEFT JOIN Guardian g ON s.guardianID = g.ID
+                                     ORDER BY s.firstName, s.ID
+                                     LIMIT %s
+                                     """, (cap + 1,))
+
+        rows = await query_cache.get_or_load("students", f"all:{cap}", load)
+        return [StudentType(**row) for row in within_list_limit(rows, cap, limit, "students")]
+
+    @strawberry.field
+    async def studentsConnection(
+            self, info: Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> Connection[StudentType]:
+        """Page through students ordered by first name"""
+        return await resolve_connection(info, STUDENT_LIST, StudentType, first, after)
 
     @strawberry.field
-    def studentById(self, studentId: int) -> Optional[StudentType]:
+    async def studentById(self, info: Info, studentId: int) -> Optional[StudentType]:
         """Get a single student by ID"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-                    SELECT s.ID                                 as id,
-                           s.guardianID,
-                           s.firstName,
-                           s.lastName,
-                           CONCAT(g.firstName, ' ', g.lastName) as guardianName
-                    FROM Student s
-                             LEFT JOIN Guardian g ON s.guardianID = g.ID
-                    WHERE s.ID = %s
-                    """, (studentId,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        db = info.context["db"]
+        row = await db.fetchone("""
+                                SELECT s.ID                                 as id,
+                                       s.guardianID,
+                                       s.firstName,
+                                       s.lastName,
+                                       CONCAT(g.firstName, ' ', g.lastName) as guardianName
+                                FROM Student s
+                                         LEFT JOIN Guardian g ON s.guardianID = g.ID
+                                WHERE s.ID = %s
+                                """, (studentId,))
         if row:
             return StudentType(**row)
         return None
 
     @strawberry.field
-    def studentAttendance(self, studentId: int) -> List[AttendanceRecordType]:
-        """Get all attendance records for a student"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT a.ID        as id,
-                   a.eventID   as eventId,
-                   a.studentID as studentId,
-                   a.theDATE,
-                   a.theTime,
-                   e.Type      as eventName
-            FROM AttendanceStudent a
-                     LEFT JOIN Event e ON a.eventID = e.ID
-            WHERE a.studentID = %s
-            ORDER BY a.theDATE DESC, a.theTime DESC
-            """,
-            (studentId,)
-        )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
+    async def studentAttendance(
+            self, info: Info, studentId: int, includeArchived: bool = False, limit: Optional[int] = None
+    ) -> List[AttendanceRecordType]:
+        """
+        Get a student's attendance records, newest first, with cold-storage
+        history if includeArchived (an error beyond GRAPHQL_MAX_LIST_SIZE;
+        page with studentAttendanceConnection)
+        """
+        cap = clamp_list_limit(limit)
+        db = info.context["db"]
+        rows = await db.fetchall(STUDENT_ATTENDANCE_SQL, (studentId, cap + 1))
+
+        if includeArchived:
+            rows = list(rows) + await student_history(db, studentId)
+            rows.sort(key=lambda row: history_key(row['theDATE'], row['theTime'], row['id']), reverse=True)
+        rows = within_list_limit(rows, cap, limit, "studentAttendance")
 
         return [
             AttendanceRecordType(
@@ -223,107 +528,133 @@ class Query:
         ]
 
     @strawberry.field
-    def events(self) -> List[EventTypeType]:
-        """Get all events"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT ID AS id, Type, Notes, event_typeID AS eventTypeid FROM Event ORDER BY ID"
+    async def studentAttendanceConnection(
+            self, info: Info, studentId: int, first: Optional[int] = None, after: Optional[str] = None,
+            includeArchived: bool = False
+    ) -> Connection[AttendanceRecordType]:
+        """Page through a student's attendance, newest first (archived history too if includeArchived)"""
+        if includeArchived:
+            return await attendance_connection(info, studentId, first, after)
+        return await resolve_connection(
+            info, ATTENDANCE_LIST, AttendanceRecordType, first, after,
+            where=[ATTENDANCE_OF_STUDENT], params=(studentId,), convert=attendance_row
         )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return [EventTypeType(**row) for row in rows]
 
     @strawberry.field
-    def eventById(self, eventId: int) -> Optional[EventTypeType]:
+    async def events(self, info: Info, limit: Optional[int] = None) -> List[EventTypeType]:
+        """Get events (an error beyond GRAPHQL_MAX_LIST_SIZE; page with eventsConnection)"""
+        cap = clamp_list_limit(limit)
+
+        async def load():
+            db = info.context["db"]
+            return await db.fetchall(
+                "SELECT ID AS id, Type, Notes, event_typeID AS eventTypeid FROM Event ORDER BY ID LIMIT %s", (cap + 1,)
+            )
+
+        rows = await query_cache.get_or_load("events", f"all:{cap}", load)
+        return [EventTypeType(**row) for row in within_list_limit(rows, cap, limit, "events")]
+
+    @strawberry.field
+    async def eventsConnection(
+            self, info: Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> Connection[EventTypeType]:
+        """Page through events ordered by ID"""
+        return await resolve_connection(info, EVENT_LIST, EventTypeType, first, after)
+
+    @strawberry.field
+    async def eventById(self, info: Info, eventId: int) -> Optional[EventTypeType]:
         """Get a single event by ID"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
+        db = info.context["db"]
+        row = await db.fetchone(
             "SELECT ID AS id, Type, Notes, event_typeID AS eventTypeid FROM Event WHERE ID = %s",
             (eventId,)
         )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
         if row:
             return EventTypeType(**row)
         return None
 
     @strawberry.field
-    def checkedInStudents(self, eventId: int) -> List[int]:
+    async def checkedInStudents(self, eventId: int) -> List[int]:
         """Get list of student IDs currently checked in via Redis"""
-        r = get_redis_conn()
-        key = get_checkin_key(eventId)
-        members = list(r.smembers(key))
-        return [int(m) for m in members]
+        return await checkin_store.members(eventId)
 
     @strawberry.field
-    def meetingNotes(self, eventId: int) -> List[MeetingNoteType]:
+    async def meetingNotes(self, eventId: int) -> List[MeetingNoteType]:
         """Get all meeting notes for an event from MongoDB"""
-        db = get_mongo_db()
-        coll = db["meeting_notes"]
+        docs, _ = await meeting_notes(eventId)
+        return [meeting_note(eventId, doc) for doc in docs]
 
-        docs = coll.find({"eventId": eventId}).sort("createdAt", -1)
-
-        return [
-            MeetingNoteType(
-                id=str(doc["_id"]),
-                eventId=doc["eventId"],
-                content=doc["content"],
-                createdAt=doc["createdAt"].isoformat(),
-            )
-            for doc in docs
-        ]
+    @strawberry.field
+    async def meetingNotesConnection(
+            self, eventId: int, first: Optional[int] = None, after: Optional[str] = None
+    ) -> Connection[MeetingNoteType]:
+        """Page through an event's meeting notes, newest first"""
+        docs, next_cursor = await meeting_notes(eventId, first=clamp_page_size(first), after=after)
+        edges = [Edge(cursor=note_cursor(doc), node=meeting_note(eventId, doc)) for doc in docs]
+        return Connection(
+            edges=edges,
+            pageInfo=PageInfo(hasNextPage=next_cursor is not None, endCursor=edges[-1].cursor if edges else None),
+        )
 
     @strawberry.field
-    def leaderById(self, leaderId: int) -> Optional[LeaderType]:
+    async def leaderById(self, info: Info, leaderId: int) -> Optional[LeaderType]:
         """Verify a leader exists by ID (for login)"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
+        db = info.context["db"]
+        row = await db.fetchone(
             "SELECT ID as id, firstName, lastName FROM Leader WHERE ID = %s",
             (leaderId,)
         )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
         if row:
             return LeaderType(**row)
         return None
 
     @strawberry.field
-    def eventDetails(self, eventId: int) -> Optional[EventDetailsType]:
+    async def eventDetails(self, info: Info, eventId: int) -> Optional[EventDetailsType]:
         """
         MULTI-DATABASE QUERY: Combines data from MySQL, Redis, and MongoDB
-        This demonstrates integration of all three database systems.
+        The three reads run concurrently, each with its own timeout; a slow
+        Redis or Mongo yields empty data and is listed in unavailableStores.
         """
-        # 1. Fetch event data from MySQL
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT ID AS id, Type, Notes, event_typeID AS eventTypeid FROM Event WHERE ID = %s",
-            (eventId,)
+        async def fetch_event():
+            db = info.context["db"]
+            return await db.fetchone(
+                "SELECT ID AS id, Type, Notes, event_typeID AS eventTypeid FROM Event WHERE ID = %s",
+                (eventId,)
+            )
+
+        async def fetch_checkins():
+            return await checkin_store.members(eventId)
+
+        fields = selected_fields(info)
+
+        async def fetch_notes():
+            # Only load note bodies when they are selected; the count alone
+            # is answered from the (eventId, createdAt) index
+            if "meetingNotes" in fields:
+                docs, _ = await meeting_notes(eventId)
+                contents = [doc.get("content", "") for doc in docs]
+                return contents, len(contents)
+            if "notesCount" in fields:
+                return [], await count_meeting_notes(eventId)
+            return [], 0
+
+        results = await fan_out(
+            {"mysql": fetch_event(), "redis": fetch_checkins(), "mongo": fetch_notes()},
+            defaults={"redis": [], "mongo": ([], 0)},
+            timings=info.context["store_timings"],
+            label=f"eventDetails({eventId})",
         )
-        event_row = cur.fetchone()
-        cur.close()
-        conn.close()
 
+        # The event row is required; without it there is nothing to return
+        mysql = results["mysql"]
+        if not mysql.ok:
+            raise Exception(f"MySQL {mysql.status} while loading event {eventId}: {mysql.error or ''}")
+        event_row = mysql.value
         if not event_row:
             return None
 
-        # 2. Fetch live check-ins from Redis
-        r = get_redis_conn()
-        key = get_checkin_key(eventId)
-        checked_in = list(r.smembers(key))
-        checked_in_ids = [int(c) for c in checked_in]
-
-        # 3. Fetch meeting notes from MongoDB
-        db = get_mongo_db()
-        coll = db["meeting_notes"]
-        docs = coll.find({"eventId": eventId}).sort("createdAt", -1)
-        notes_list = [doc.get("content", "") for doc in docs]
+        checked_in_ids = results["redis"].value
+        notes_list, notes_count = results["mongo"].value
 
         # Combine all data
         return EventDetailsType(
@@ -334,210 +665,246 @@ class Query:
             currentlyCheckedIn=checked_in_ids,
             liveAttendeeCount=len(checked_in_ids),
             meetingNotes=notes_list,
-            notesCount=len(notes_list)
+            notesCount=notes_count,
+            unavailableStores=[store for store, res in results.items() if not res.ok]
         )
 
-    @strawberry.field
-    def groups(self) -> List[GroupType]:
-        """Get all small groups with their members and leaders"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-
-        # Get all groups
-        cur.execute("SELECT ID as id, name FROM AGroup ORDER BY name")
-        groups = cur.fetchall()
-
-        result = []
-        for group in groups:
-            group_id = group['id']
-
-            # Get members for this group
-            cur.execute("""
-                        SELECT s.ID                                 as id,
-                               s.firstName,
-                               s.lastName,
-                               s.guardianID,
-                               CONCAT(g.firstName, ' ', g.lastName) as guardianName
-                        FROM GroupMember gm
-                                 JOIN Student s ON gm.studentID = s.ID
-                                 LEFT JOIN Guardian g ON s.guardianID = g.ID
-                        WHERE gm.groupID = %s
-                        ORDER BY s.firstName
-                        """, (group_id,))
-            members_data = cur.fetchall()
-            members = [StudentType(**m) for m in members_data]
-
-            # Get leaders for this group
-            cur.execute("""
-                        SELECT l.ID as id, l.firstName, l.lastName
-                        FROM GroupLeader gl
-                                 JOIN Leader l ON gl.leaderID = l.ID
-                        WHERE gl.groupID = %s
-                        ORDER BY l.firstName
-                        """, (group_id,))
-            leaders_data = cur.fetchall()
-            leaders = [LeaderType(**l) for l in leaders_data]
-
-            result.append(GroupType(
-                id=group['id'],
-                name=group['name'],
-                memberCount=len(members),
-                members=members,
-                leaders=leaders
-            ))
-
-        cur.close()
-        conn.close()
-        return result
+    # ==================== ATTENDANCE ANALYTICS ====================
 
     @strawberry.field
-    def groupById(self, groupId: int) -> Optional[GroupType]:
-        """Get a single group by ID with members and leaders"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
+    async def eventAttendanceStats(self, info: Info, eventId: int) -> List[EventAttendanceDay]:
+        """Attendees per day of an event, from the EventAttendanceDaily rollup"""
+        rows = await event_attendance(info.context["db"], eventId)
+        return [
+            EventAttendanceDay(
+                eventId=row["eventID"],
+                date=str(row["theDATE"]),
+                attendees=row["attendees"],
+                firstCheckIn=str(row["firstCheckIn"]) if row["firstCheckIn"] is not None else None,
+                lastCheckIn=str(row["lastCheckIn"]) if row["lastCheckIn"] is not None else None,
+            ) for row in rows
+        ]
 
-        # Get group
-        cur.execute("SELECT ID as id, name FROM AGroup WHERE ID = %s", (groupId,))
-        group = cur.fetchone()
+    @strawberry.field
+    async def attendanceTrend(
+            self, info: Info, since: Optional[str] = None, until: Optional[str] = None
+    ) -> List[AttendanceTrendPoint]:
+        """Attendees per day across all events (dates are YYYY-MM-DD, inclusive)"""
+        rows = await attendance_trend(info.context["db"], since, until)
+        return [
+            AttendanceTrendPoint(date=str(row["theDATE"]), attendees=int(row["attendees"]), events=row["events"])
+            for row in rows
+        ]
 
-        if not group:
-            cur.close()
-            conn.close()
+    @strawberry.field
+    async def studentAttendanceStats(self, info: Info, studentId: int) -> Optional[StudentAttendanceStatsType]:
+        """Totals, last seen and weekly streaks of a student (None if never attended)"""
+        row = await student_attendance_stats(info.context["db"], studentId)
+        if not row:
             return None
+        return StudentAttendanceStatsType(
+            studentId=row["studentID"],
+            totalAttended=row["totalAttended"],
+            firstSeen=str(row["firstSeen"]),
+            lastSeen=str(row["lastSeen"]),
+            currentStreak=row["currentStreak"],
+            longestStreak=row["longestStreak"],
+            lastEventId=row["lastEventID"],
+        )
 
-        # Get members
-        cur.execute("""
-                    SELECT s.ID                                 as id,
-                           s.firstName,
-                           s.lastName,
-                           s.guardianID,
-                           CONCAT(g.firstName, ' ', g.lastName) as guardianName
-                    FROM GroupMember gm
-                             JOIN Student s ON gm.studentID = s.ID
-                             LEFT JOIN Guardian g ON s.guardianID = g.ID
-                    WHERE gm.groupID = %s
-                    ORDER BY s.firstName
-                    """, (groupId,))
-        members_data = cur.fetchall()
-        members = [StudentType(**m) for m in members_data]
-
-        # Get leaders
-        cur.execute("""
-                    SELECT l.ID as id, l.firstName, l.lastName
-                    FROM GroupLeader gl
-                             JOIN Leader l ON gl.leaderID = l.ID
-                    WHERE gl.groupID = %s
-                    ORDER BY l.firstName
-                    """, (groupId,))
-        leaders_data = cur.fetchall()
-        leaders = [LeaderType(**l) for l in leaders_data]
-
-        cur.close()
-        conn.close()
+    @strawberry.field
+    async def studentProfile(self, info: Info, studentId: int) -> Optional[StudentProfileType]:
+        """The student portal's data (student, guardian, groups, recent attendance, stats) in one lookup"""
+        profile = await student_profiles.get(info.context["db"], studentId)
+        if profile is None:
+            return None
+        stats = profile["stats"]
+        return StudentProfileType(
+            id=profile["id"],
+            firstName=profile["firstName"],
+            lastName=profile["lastName"],
+            guardianID=profile["guardianID"],
+            guardianName=profile["guardianName"],
+            groups=[ProfileGroupType(**group) for group in profile["groups"]],
+            recentAttendance=[AttendanceRecordType(**row) for row in profile["recentAttendance"]],
+            stats=StudentAttendanceStatsType(
+                studentId=stats["studentID"],
+                totalAttended=stats["totalAttended"],
+                firstSeen=stats["firstSeen"],
+                lastSeen=stats["lastSeen"],
+                currentStreak=current_streak(stats["lastWeek"], stats["currentStreak"]),
+                longestStreak=stats["longestStreak"],
+                lastEventId=stats["lastEventID"],
+            ) if stats else None,
+            builtAt=profile["builtAt"],
+        )
 
-        return GroupType(
-            id=group['id'],
-            name=group['name'],
-            memberCount=len(members),
-            members=members,
-            leaders=leaders
+    @strawberry.field
+    async def groupAttendanceStats(self, info: Info, groupId: int) -> GroupAttendanceStatsType:
+        """Share of a group's members at each event-day any of them attended, and overall"""
+        rows = await group_attendance(info.context["db"], groupId)
+        history = [
+            GroupAttendanceDay(
+                eventId=row["eventID"],
+                date=str(row["theDATE"]),
+                attended=row["attended"],
+                members=row["members"],
+                rate=round(row["attended"] / row["members"], 4) if row["members"] else 0.0,
+            ) for row in rows
+        ]
+        attended = sum(day.attended for day in history)
+        slots = sum(day.members for day in history)
+        return GroupAttendanceStatsType(
+            groupId=groupId,
+            eventDays=len(history),
+            attended=attended,
+            memberSlots=slots,
+            rate=round(attended / slots, 4) if slots else 0.0,
+            history=history,
         )
-        checked_in_ids = list(r.smembers(key))
-        checked_in_list = [int(sid) for sid in checked_in_ids]
 
-        # 3. Fetch meeting notes from MongoDB
-        db = get_mongo_db()
-        coll = db["meeting_notes"]
-        notes_cursor = coll.find({"eventId": eventId})
-        notes_list = [doc.get("content", "") for doc in notes_cursor]
+    @strawberry.field
+    async def search(
+            self, info: Info, query: str, kinds: Optional[List[str]] = None, limit: Optional[int] = 20
+    ) -> SearchResults:
+        """
+        Ranked search over people's names (Redis prefix index) and note text
+        (Mongo text indexes). `kinds` narrows it to some of: student,
+        guardian, volunteer, leader, meeting_note, event_note.
+        """
+        unknown = set(kinds or ()) - set(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown search kinds: {', '.join(sorted(unknown))}")
+        limit = clamp_limit(limit)
+        people, notes = split_kinds(kinds)
+
+        calls = {}
+        if people:
+            calls["redis"] = name_index.search(query, people, limit)
+        if notes:
+            calls["mongo"] = search_notes(query, notes, limit)
+        results = await fan_out(
+            calls,
+            defaults={"redis": [], "mongo": []},
+            timings=info.context["store_timings"],
+            label=f"search({query!r})",
+        )
 
-        # 4. Combine all data into single response
-        return EventDetailsType(
-            id=event_row['id'],
-            Type=event_row['Type'],
-            Notes=event_row['Notes'],
-            eventTypeid=event_row['eventTypeid'],
-            currentlyCheckedIn=checked_in_list,
-            liveAttendeeCount=len(checked_in_list),
-            meetingNotes=notes_list,
-            notesCount=len(notes_list)
+        hits = [hit for res in results.values() for hit in res.value]
+        hits.sort(key=lambda hit: -hit["score"])
+        return SearchResults(
+            results=[SearchResult(**hit) for hit in hits[:limit]],
+            unavailableStores=[store for store, res in results.items() if not res.ok],
         )
 
     @strawberry.field
-    def volunteers(self) -> List[VolunteerType]:
-        """Get all volunteers"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT ID as id, firstName, lastName FROM Volunteer ORDER BY firstName")
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return [VolunteerType(**row) for row in rows]
+    async def groups(self, info: Info) -> List[GroupType]:
+        """Get all small groups with their members and leaders"""
+        db = info.context["db"]
+        groups = await db.fetchall("SELECT ID as id, name FROM AGroup ORDER BY name")
+
+        # One batched query each for members and leaders across all groups
+        loader = info.context["loaders"].groups
+        await loader.prime(g['id'] for g in groups)
+        return [await build_group(loader, g) for g in groups]
+
+    @strawberry.field
+    async def groupById(self, info: Info, groupId: int) -> Optional[GroupType]:
+        """Get a single group by ID with members and leaders"""
+        db = info.context["db"]
+        group = await db.fetchone("SELECT ID as id, name FROM AGroup WHERE ID = %s", (groupId,))
+
+        if not group:
+            return None
+        return await build_group(info.context["loaders"].groups, group)
 
     @strawberry.field
-    def volunteerById(self, volunteerId: int) -> Optional[VolunteerType]:
+    async def volunteers(self, info: Info, limit: Optional[int] = None) -> List[VolunteerType]:
+        """Get volunteers (an error beyond GRAPHQL_MAX_LIST_SIZE; page with volunteersConnection)"""
+        cap = clamp_list_limit(limit)
+
+        async def load():
+            db = info.context["db"]
+            return await db.fetchall(
+                "SELECT ID as id, firstName, lastName FROM Volunteer ORDER BY firstName, ID LIMIT %s", (cap + 1,)
+            )
+
+        rows = await query_cache.get_or_load("volunteers", f"all:{cap}", load)
+        return [VolunteerType(**row) for row in within_list_limit(rows, cap, limit, "volunteers")]
+
+    @strawberry.field
+    async def volunteersConnection(
+            self, info: Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> Connection[VolunteerType]:
+        """Page through volunteers ordered by first name"""
+        return await resolve_connection(info, VOLUNTEER_LIST, VolunteerType, first, after)
+
+    @strawberry.field
+    async def volunteerById(self, info: Info, volunteerId: int) -> Optional[VolunteerType]:
         """Get a single volunteer by ID"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT ID as id, firstName, lastName FROM Volunteer WHERE ID = %s", (volunteerId,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        db = info.context["db"]
+        row = await db.fetchone(
+            "SELECT ID as id, firstName, lastName FROM Volunteer WHERE ID = %s", (volunteerId,)
+        )
         if row:
             return VolunteerType(**row)
         return None
 
     @strawberry.field
-    def volunteerRecords(self, volunteerId: Optional[int] = None, eventId: Optional[int] = None) -> List[
-        VolunteerRecordType]:
-        """Get volunteer records, optionally filtered by volunteer or event"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-
+    async def volunteerRecords(
+            self, info: Info, volunteerId: Optional[int] = None, eventId: Optional[int] = None,
+            limit: Optional[int] = None
+    ) -> List[VolunteerRecordType]:
+        """
+        Get volunteer records, newest first, optionally filtered by volunteer
+        or event (an error beyond GRAPHQL_MAX_LIST_SIZE; page with volunteerRecordsConnection)
+        """
+        query = """
+                SELECT vr.ID                                as id,
+                       vr.volunteerID                       as volunteerId,
+                       vr.eventID                           as eventId,
+                       CONCAT(v.firstName, ' ', v.lastName) as volunteerName,
+                       e.Type                               as eventName
+                FROM VolunteerRecord vr
+                         JOIN Volunteer v ON vr.volunteerID = v.ID
+                         LEFT JOIN Event e ON vr.eventID = e.ID
+                """
+        params = ()
         if volunteerId:
-            cur.execute("""
-                        SELECT vr.ID                                as id,
-                               vr.volunteerID                       as volunteerId,
-                               vr.eventID                           as eventId,
-                               CONCAT(v.firstName, ' ', v.lastName) as volunteerName,
-                               e.Type                               as eventName
-                        FROM VolunteerRecord vr
-                                 JOIN Volunteer v ON vr.volunteerID = v.ID
-                                 LEFT JOIN Event e ON vr.eventID = e.ID
-                        WHERE vr.volunteerID = %s
-                        ORDER BY vr.ID DESC
-                        """, (volunteerId,))
+            query += " WHERE vr.volunteerID = %s"
+            params = (volunteerId,)
         elif eventId:
-            cur.execute("""
-                        SELECT vr.ID                                as id,
-                               vr.volunteerID                       as volunteerId,
-                               vr.eventID                           as eventId,
-                               CONCAT(v.firstName, ' ', v.lastName) as volunteerName,
-                               e.Type                               as eventName
-                        FROM VolunteerRecord vr
-                                 JOIN Volunteer v ON vr.volunteerID = v.ID
-                                 LEFT JOIN Event e ON vr.eventID = e.ID
-                        WHERE vr.eventID = %s
-                        ORDER BY vr.ID DESC
-                        """, (eventId,))
-        else:
-            cur.execute("""
-                        SELECT vr.ID                                as id,
-                               vr.volunteerID                       as volunteerId,
-                               vr.eventID                           as eventId,
-                               CONCAT(v.firstName, ' ', v.lastName) as volunteerName,
-                               e.Type                               as eventName
-                        FROM VolunteerRecord vr
-                                 JOIN Volunteer v ON vr.volunteerID = v.ID
-                                 LEFT JOIN Event e ON vr.eventID = e.ID
-                        ORDER BY vr.ID DESC
-                        """)
-
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
+            query += " WHERE vr.eventID = %s"
+            params = (eventId,)
+        cap = clamp_list_limit(limit)
+        query += " ORDER BY vr.ID DESC LIMIT %s"
+        params += (cap + 1,)
+
+        db = info.context["db"]
+        rows = within_list_limit(await db.fetchall(query, params), cap, limit, "volunteerRecords")
         return [VolunteerRecordType(**row) for row in rows]
 
+    @strawberry.field
+    async def volunteerRecordsConnection(
+            self,
+            info: Info,
+            volunteerId: Optional[int] = None,
+            eventId: Optional[int] = None,
+            first: Optional[int] = None,
+            after: Optional[str] = None
+    ) -> Connection[VolunteerRecordType]:
+        """Page through volunteer records, newest first, optionally filtered"""
+        where, params = [], []
+        if volunteerId:
+            where.append("vr.volunteerID = %s")
+            params.append(volunteerId)
+        elif eventId:
+            where.append("vr.eventID = %s")
+            params.append(eventId)
+        return await resolve_connection(
+            info, VOLUNTEER_RECORD_LIST, VolunteerRecordType, first, after, where=where, params=params
+        )
+
 
 # ---------- Mutation Resolvers (CREATE, UPDATE, DELETE) ----------
 
@@ -546,23 +913,23 @@ class Mutation:
     # ==================== STUDENT CRUD ====================
 
     @strawberry.mutation
-    def createStudent(
+    async def createStudent(
             self,
+            info: Info,
             firstName: str,
             lastName: str,
             guardianID: Optional[int] = None
     ) -> StudentType:
         """CREATE a new student"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
+        db = info.context["db"]
+        await db.execute(
             "INSERT INTO Student (firstName, lastName, guardianID) VALUES (%s, %s, %s)",
             (firstName, lastName, guardianID)
         )
-        conn.commit()
-        student_id = cur.lastrowid
-        cur.close()
-        conn.close()
+        student_id = db.lastrowid
+        await db.after_commit(query_cache.bump, "students")
+        await db.after_commit(name_index.index, "student", student_id, firstName, lastName)
+        await db.after_commit(student_profiles.refresh, [student_id])
 
         return StudentType(
             id=student_id,
@@ -572,17 +939,15 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def updateStudent(
+    async def updateStudent(
             self,
+            info: Info,
             studentId: int,
             firstName: Optional[str] = None,
             lastName: Optional[str] = None,
             guardianID: Optional[int] = None
     ) -> Optional[StudentType]:
         """UPDATE a student's information"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-
         # Build dynamic update query
         updates = []
         params = []
@@ -598,67 +963,59 @@ class Mutation:
             params.append(guardianID)
 
         if not updates:
-            cur.close()
-            conn.close()
             return None
 
         params.append(studentId)
         query = f"UPDATE Student SET {', '.join(updates)} WHERE id = %s"
 
-        cur.execute(query, params)
-        conn.commit()
+        db = info.context["db"]
+        await db.execute(query, params)
 
         # Fetch updated student
-        cur.execute("SELECT id, firstName, lastName, guardianID FROM Student WHERE id = %s", (studentId,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        row = await db.fetchone(
+            "SELECT id, firstName, lastName, guardianID FROM Student WHERE id = %s", (studentId,)
+        )
+        await db.after_commit(query_cache.bump, "students")
+        await db.after_commit(student_profiles.refresh, [studentId])
 
         if row:
+            await db.after_commit(name_index.index, "student", studentId, row["firstName"], row["lastName"])
             return StudentType(**row)
         return None
 
     @strawberry.mutation
-    def deleteStudent(self, studentId: int) -> SuccessResult:
-        """DELETE a student"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        # First delete related records
-        cur.execute("DELETE FROM AttendanceStudent WHERE studentID = %s", (studentId,))
-        cur.execute("DELETE FROM GroupMember WHERE studentID = %s", (studentId,))
-        cur.execute("DELETE FROM Student WHERE id = %s", (studentId,))
-
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
-
+    async def deleteStudent(self, info: Info, studentId: int) -> SuccessResult:
+        """DELETE a student with their attendance and group memberships"""
+        db = info.context["db"]
+        cascade = await cascade_delete(db, "Student", [studentId])
+        await db.after_commit(query_cache.bump, "students")
+        await db.after_commit(outbox.kick)
+        await db.after_commit(student_profiles.refresh, [studentId])
+
+        deleted = studentId in cascade.deleted.get("Student", ())
         return SuccessResult(
-            success=affected > 0,
-            message=f"Student {studentId} deleted successfully" if affected > 0 else "Student not found"
+            success=deleted,
+            message=f"Student {studentId} deleted successfully" if deleted else "Student not found"
         )
 
     # ==================== EVENT CRUD ====================
 
     @strawberry.mutation
-    def createEvent(
+    async def createEvent(
             self,
+            info: Info,
             Type: str,
             Notes: str,
             eventTypeId: int
     ) -> EventTypeType:
         """CREATE a new event"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
+        db = info.context["db"]
+        await db.execute(
             "INSERT INTO Event (Type, Notes, event_typeID) VALUES (%s, %s, %s)",
             (Type, Notes, eventTypeId)
         )
-        conn.commit()
-        event_id = cur.lastrowid
-        cur.close()
-        conn.close()
+        event_id = db.lastrowid
+        await db.after_commit(query_cache.bump, "events")
 
         return EventTypeType(
             id=event_id,
@@ -668,17 +1025,15 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def updateEvent(
+    async def updateEvent(
             self,
+            info: Info,
             eventId: int,
             Type: Optional[str] = None,
             Notes: Optional[str] = None,
             eventTypeId: Optional[int] = None
     ) -> Optional[EventTypeType]:
         """UPDATE an event's information"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-
         updates = []
         params = []
 
@@ -693,67 +1048,60 @@ class Mutation:
             params.append(eventTypeId)
 
         if not updates:
-            cur.close()
-            conn.close()
             return None
 
         params.append(eventId)
         query = f"UPDATE Event SET {', '.join(updates)} WHERE ID = %s"
 
-        cur.execute(query, params)
-        conn.commit()
+        db = info.context["db"]
+        await db.execute(query, params)
 
         # Fetch updated event
-        cur.execute(
+        row = await db.fetchone(
             "SELECT ID AS id, Type, Notes, event_typeID AS eventTypeid FROM Event WHERE ID = %s",
             (eventId,)
         )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        await db.after_commit(query_cache.bump, "events")
+        if Type is not None:
+            # Profiles show event names in their recent attendance
+            await db.after_commit(student_profiles.refresh_event, eventId)
 
         if row:
             return EventTypeType(**row)
         return None
 
     @strawberry.mutation
-    def deleteEvent(self, eventId: int) -> SuccessResult:
-        """DELETE an event"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        # Delete related records
-        cur.execute("DELETE FROM AttendanceStudent WHERE eventID = %s", (eventId,))
-        cur.execute("DELETE FROM AttendanceRecord WHERE eventID = %s", (eventId,))
-        cur.execute("DELETE FROM EventLeader WHERE eventID = %s", (eventId,))
-        cur.execute("DELETE FROM VolunteerRecord WHERE eventID = %s", (eventId,))
-        cur.execute("DELETE FROM Event WHERE ID = %s", (eventId,))
-
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
-
-        # Also delete from MongoDB
-        db = get_mongo_db()
-        coll = db["meeting_notes"]
-        coll.delete_many({"eventId": eventId})
-
-        # Clear Redis check-ins
-        r = get_redis_conn()
-        r.delete(get_checkin_key(eventId))
-
+    async def deleteEvent(self, info: Info, eventId: int) -> SuccessResult:
+        """DELETE an event with its attendance, leaders, volunteers and notes"""
+        db = info.context["db"]
+        cascade = await cascade_delete(db, "Event", [eventId])
+        await db.after_commit(query_cache.bump, "events")
+        # Mongo notes and Redis check-ins go through the outbox once this commits
+        await db.after_commit(outbox.kick)
+        await db.after_commit(student_profiles.refresh, cascade.students)
+
+        deleted = eventId in cascade.deleted.get("Event", ())
         return SuccessResult(
-            success=affected > 0,
-            message=f"Event {eventId} deleted successfully" if affected > 0 else "Event not found"
+            success=deleted,
+            message=f"Event {eventId} deleted successfully" if deleted else "Event not found"
         )
 
+    @strawberry.mutation
+    async def deleteEvents(self, info: Info, ids: List[int]) -> BulkDeleteResult:
+        """DELETE many events in one transaction (e.g. end-of-season cleanup)"""
+        db = info.context["db"]
+        cascade = await cascade_delete(db, "Event", ids)
+        await db.after_commit(query_cache.bump, "events")
+        await db.after_commit(outbox.kick)
+        await db.after_commit(student_profiles.refresh, cascade.students)
+        return BulkDeleteResult.of(cascade, "Event", ids)
+
     # ==================== CHECK-INS & NOTES ====================
 
     @strawberry.mutation
-    def addMeetingNote(self, eventId: int, content: str) -> MeetingNoteType:
+    async def addMeetingNote(self, eventId: int, content: str) -> MeetingNoteType:
         """Save a new meeting note for a given event into MongoDB"""
-        db = get_mongo_db()
+        db = get_async_mongo_db()
         coll = db["meeting_notes"]
 
         doc = {
@@ -762,7 +1110,8 @@ class Mutation:
             "createdAt": datetime.utcnow(),
         }
 
-        result = coll.insert_one(doc)
+        with track("mongo"):
+            result = await coll.insert_one(doc)
         doc["_id"] = result.inserted_id
 
         return MeetingNoteType(
@@ -773,63 +1122,42 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def checkIn(self, eventId: int, studentId: int) -> CheckInStatus:
+    async def checkIn(self, eventId: int, studentId: int) -> CheckInStatus:
         """Check in a student to an event (stored in Redis)"""
-        r = get_redis_conn()
-        key = get_checkin_key(eventId)
-        r.sadd(key, studentId)
+        await checkin_store.check_in(eventId, studentId)
         return CheckInStatus(eventId=eventId, studentId=studentId, status="checked_in")
 
     @strawberry.mutation
-    def persistAttendance(self, eventId: int) -> PersistAttendanceResult:
-        """Move checked-in set from Redis into AttendanceStudent in MySQL"""
-        r = get_redis_conn()
-        key = get_checkin_key(eventId)
-        members = list(r.smembers(key))
-
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        now = datetime.now()
-        date_str = now.date().isoformat()
-        time_str = now.time().replace(microsecond=0).isoformat()
-
-        count = 0
-        for m in members:
-            sid = int(m)
-            cur.execute(
-                """
-                INSERT INTO AttendanceStudent (eventID, studentID, theDATE, theTime)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (eventId, sid, date_str, time_str),
-            )
-            count += 1
-
-        conn.commit()
-        cur.close()
-        conn.close()
-
-        # Clear Redis key
-        r.delete(key)
+    async def checkInMany(self, info: Info, eventId: int, studentIds: List[int]) -> BulkCheckInResult:
+        """Check in many students at once: one event check, one ID query, one Redis pipeline"""
+        try:
+            result = await bulk_check_in(info.context["db"], eventId, studentIds)
+        except EventNotFound as e:
+            raise Exception(str(e))
+        return BulkCheckInResult(
+            eventId=eventId,
+            checkedIn=result["checkedIn"],
+            alreadyCheckedIn=result["alreadyCheckedIn"],
+            failed=[CheckInFailure(**f) for f in result["failed"]],
+        )
 
+    @strawberry.mutation
+    async def persistAttendance(self, eventId: int) -> PersistAttendanceResult:
+        """Move checked-in set from Redis into AttendanceStudent in MySQL"""
+        count = await persist_checkins(eventId)
         return PersistAttendanceResult(eventId=eventId, count=count)
 
     # ==================== SMALL GROUPS CRUD ====================
 
     @strawberry.mutation
-    def createGroup(self, name: str) -> GroupType:
+    async def createGroup(self, info: Info, name: str) -> GroupType:
         """CREATE a new small group"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
+        db = info.context["db"]
+        await db.execute(
             "INSERT INTO AGroup (name) VALUES (%s)",
             (name,)
         )
-        conn.commit()
-        group_id = cur.lastrowid
-        cur.close()
-        conn.close()
+        group_id = db.lastrowid
 
         return GroupType(
             id=group_id,
@@ -840,121 +1168,64 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def updateGroup(self, groupId: int, name: str) -> Optional[GroupType]:
+    async def updateGroup(self, info: Info, groupId: int, name: str) -> Optional[GroupType]:
         """UPDATE a group's name"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-
-        cur.execute("UPDATE AGroup SET name = %s WHERE ID = %s", (name, groupId))
-        conn.commit()
-
-        if cur.rowcount == 0:
-            cur.close()
-            conn.close()
+        db = info.context["db"]
+        affected = await db.execute("UPDATE AGroup SET name = %s WHERE ID = %s", (name, groupId))
+        if affected == 0:
             return None
 
-        # Get updated group with members and leaders
-        cur.execute("SELECT ID as id, name FROM AGroup WHERE ID = %s", (groupId,))
-        group = cur.fetchone()
-
-        # Get members
-        cur.execute("""
-                    SELECT s.ID                                 as id,
-                           s.firstName,
-                           s.lastName,
-                           s.guardianID,
-                           CONCAT(g.firstName, ' ', g.lastName) as guardianName
-                    FROM GroupMember gm
-                             JOIN Student s ON gm.studentID = s.ID
-                             LEFT JOIN Guardian g ON s.guardianID = g.ID
-                    WHERE gm.groupID = %s
-                    """, (groupId,))
-        members_data = cur.fetchall()
-        members = [StudentType(**m) for m in members_data]
-
-        # Get leaders
-        cur.execute("""
-                    SELECT l.ID as id, l.firstName, l.lastName
-                    FROM GroupLeader gl
-                             JOIN Leader l ON gl.leaderID = l.ID
-                    WHERE gl.groupID = %s
-                    """, (groupId,))
-        leaders_data = cur.fetchall()
-        leaders = [LeaderType(**l) for l in leaders_data]
-
-        cur.close()
-        conn.close()
+        group = await db.fetchone("SELECT ID as id, name FROM AGroup WHERE ID = %s", (groupId,))
+        await db.after_commit(student_profiles.refresh_group, groupId)
 
-        return GroupType(
-            id=group['id'],
-            name=group['name'],
-            memberCount=len(members),
-            members=members,
-            leaders=leaders
-        )
+        loader = info.context["loaders"].groups
+        loader.clear(groupId)
+        return await build_group(loader, group)
 
     @strawberry.mutation
-    def deleteGroup(self, groupId: int) -> SuccessResult:
-        """DELETE a group"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        # Delete related records
-        cur.execute("DELETE FROM GroupMember WHERE groupID = %s", (groupId,))
-        cur.execute("DELETE FROM GroupLeader WHERE groupID = %s", (groupId,))
-        cur.execute("DELETE FROM AGroup WHERE ID = %s", (groupId,))
-
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
-
+    async def deleteGroup(self, info: Info, groupId: int) -> SuccessResult:
+        """DELETE a group with its memberships"""
+        db = info.context["db"]
+        members = await db.fetchall("SELECT studentID FROM GroupMember WHERE groupID = %s", (groupId,))
+        cascade = await cascade_delete(db, "AGroup", [groupId])
+        await db.after_commit(student_profiles.refresh, [m["studentID"] for m in members])
+
+        deleted = groupId in cascade.deleted.get("AGroup", ())
         return SuccessResult(
-            success=affected > 0,
-            message=f"Group {groupId} deleted successfully" if affected > 0 else "Group not found"
+            success=deleted,
+            message=f"Group {groupId} deleted successfully" if deleted else "Group not found"
         )
 
     @strawberry.mutation
-    def addStudentToGroup(self, groupId: int, studentId: int) -> SuccessResult:
+    async def addStudentToGroup(self, info: Info, groupId: int, studentId: int) -> SuccessResult:
         """ADD a student to a small group"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
+        db = info.context["db"]
         try:
-            cur.execute(
+            await db.execute(
                 "INSERT INTO GroupMember (groupID, studentID) VALUES (%s, %s)",
                 (groupId, studentId)
             )
-            conn.commit()
-            cur.close()
-            conn.close()
+            await db.after_commit(student_profiles.refresh, [studentId])
             return SuccessResult(
                 success=True,
                 message=f"Student {studentId} added to group {groupId}"
             )
         except Exception as e:
-            conn.rollback()
-            cur.close()
-            conn.close()
             return SuccessResult(
                 success=False,
                 message=f"Error: {str(e)}"
             )
 
     @strawberry.mutation
-    def removeStudentFromGroup(self, groupId: int, studentId: int) -> SuccessResult:
+    async def removeStudentFromGroup(self, info: Info, groupId: int, studentId: int) -> SuccessResult:
         """REMOVE a student from a small group"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        cur.execute(
+        db = info.context["db"]
+        affected = await db.execute(
             "DELETE FROM GroupMember WHERE groupID = %s AND studentID = %s",
             (groupId, studentId)
         )
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
+        if affected:
+            await db.after_commit(student_profiles.refresh, [studentId])
 
         return SuccessResult(
             success=affected > 0,
@@ -962,46 +1233,32 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def addLeaderToGroup(self, groupId: int, leaderId: int) -> SuccessResult:
+    async def addLeaderToGroup(self, info: Info, groupId: int, leaderId: int) -> SuccessResult:
         """ADD a leader to a small group"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
+        db = info.context["db"]
         try:
-            cur.execute(
+            await db.execute(
                 "INSERT INTO GroupLeader (groupID, leaderID) VALUES (%s, %s)",
                 (groupId, leaderId)
             )
-            conn.commit()
-            cur.close()
-            conn.close()
             return SuccessResult(
                 success=True,
                 message=f"Leader {leaderId} added to group {groupId}"
             )
         except Exception as e:
-            conn.rollback()
-            cur.close()
-            conn.close()
             return SuccessResult(
                 success=False,
                 message=f"Error: {str(e)}"
             )
 
     @strawberry.mutation
-    def removeLeaderFromGroup(self, groupId: int, leaderId: int) -> SuccessResult:
+    async def removeLeaderFromGroup(self, info: Info, groupId: int, leaderId: int) -> SuccessResult:
         """REMOVE a leader from a small group"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        cur.execute(
+        db = info.context["db"]
+        affected = await db.execute(
             "DELETE FROM GroupLeader WHERE groupID = %s AND leaderID = %s",
             (groupId, leaderId)
         )
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
 
         return SuccessResult(
             success=affected > 0,
@@ -1011,18 +1268,16 @@ class Mutation:
     # ==================== VOLUNTEERS CRUD ====================
 
     @strawberry.mutation
-    def createVolunteer(self, firstName: str, lastName: str) -> VolunteerType:
+    async def createVolunteer(self, info: Info, firstName: str, lastName: str) -> VolunteerType:
         """CREATE a new volunteer"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
+        db = info.context["db"]
+        await db.execute(
             "INSERT INTO Volunteer (firstName, lastName) VALUES (%s, %s)",
             (firstName, lastName)
         )
-        conn.commit()
-        volunteer_id = cur.lastrowid
-        cur.close()
-        conn.close()
+        volunteer_id = db.lastrowid
+        await db.after_commit(query_cache.bump, "volunteers")
+        await db.after_commit(name_index.index, "volunteer", volunteer_id, firstName, lastName)
 
         return VolunteerType(
             id=volunteer_id,
@@ -1031,16 +1286,14 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def updateVolunteer(
+    async def updateVolunteer(
             self,
+            info: Info,
             volunteerId: int,
             firstName: Optional[str] = None,
             lastName: Optional[str] = None
     ) -> Optional[VolunteerType]:
         """UPDATE a volunteer's information"""
-        conn = get_mysql_conn()
-        cur = conn.cursor(dictionary=True)
-
         updates = []
         params = []
 
@@ -1052,87 +1305,66 @@ class Mutation:
             params.append(lastName)
 
         if not updates:
-            cur.close()
-            conn.close()
             return None
 
         params.append(volunteerId)
         query = f"UPDATE Volunteer SET {', '.join(updates)} WHERE ID = %s"
 
-        cur.execute(query, params)
-        conn.commit()
+        db = info.context["db"]
+        await db.execute(query, params)
 
         # Fetch updated volunteer
-        cur.execute("SELECT ID as id, firstName, lastName FROM Volunteer WHERE ID = %s", (volunteerId,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        row = await db.fetchone(
+            "SELECT ID as id, firstName, lastName FROM Volunteer WHERE ID = %s", (volunteerId,)
+        )
+        await db.after_commit(query_cache.bump, "volunteers")
 
         if row:
+            await db.after_commit(name_index.index, "volunteer", volunteerId, row["firstName"], row["lastName"])
             return VolunteerType(**row)
         return None
 
     @strawberry.mutation
-    def deleteVolunteer(self, volunteerId: int) -> SuccessResult:
-        """DELETE a volunteer"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        # Delete related records
-        cur.execute("DELETE FROM VolunteerRecord WHERE volunteerID = %s", (volunteerId,))
-        cur.execute("DELETE FROM Volunteer WHERE ID = %s", (volunteerId,))
-
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
-
+    async def deleteVolunteer(self, info: Info, volunteerId: int) -> SuccessResult:
+        """DELETE a volunteer with their event sign-ups"""
+        db = info.context["db"]
+        cascade = await cascade_delete(db, "Volunteer", [volunteerId])
+        await db.after_commit(query_cache.bump, "volunteers")
+        await db.after_commit(outbox.kick)
+
+        deleted = volunteerId in cascade.deleted.get("Volunteer", ())
         return SuccessResult(
-            success=affected > 0,
-            message=f"Volunteer {volunteerId} deleted successfully" if affected > 0 else "Volunteer not found"
+            success=deleted,
+            message=f"Volunteer {volunteerId} deleted successfully" if deleted else "Volunteer not found"
         )
 
     @strawberry.mutation
-    def addVolunteerToEvent(self, volunteerId: int, eventId: int) -> SuccessResult:
+    async def addVolunteerToEvent(self, info: Info, volunteerId: int, eventId: int) -> SuccessResult:
         """ADD a volunteer to an event"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
+        db = info.context["db"]
         try:
-            cur.execute(
+            await db.execute(
                 "INSERT INTO VolunteerRecord (volunteerID, eventID) VALUES (%s, %s)",
                 (volunteerId, eventId)
             )
-            conn.commit()
-            cur.close()
-            conn.close()
             return SuccessResult(
                 success=True,
                 message=f"Volunteer {volunteerId} added to event {eventId}"
             )
         except Exception as e:
-            conn.rollback()
-            cur.close()
-            conn.close()
             return SuccessResult(
                 success=False,
                 message=f"Error: {str(e)}"
             )
 
     @strawberry.mutation
-    def removeVolunteerFromEvent(self, volunteerId: int, eventId: int) -> SuccessResult:
+    async def removeVolunteerFromEvent(self, info: Info, volunteerId: int, eventId: int) -> SuccessResult:
         """REMOVE a volunteer from an event"""
-        conn = get_mysql_conn()
-        cur = conn.cursor()
-
-        cur.execute(
+        db = info.context["db"]
+        affected = await db.execute(
             "DELETE FROM VolunteerRecord WHERE volunteerID = %s AND eventID = %s",
             (volunteerId, eventId)
         )
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
 
         return SuccessResult(
             success=affected > 0,
@@ -1140,5 +1372,48 @@ class Mutation:
         )
 
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
-graphql_app = GraphQLRouter(schema)
\ No newline at end of file
+# ---------- Subscriptions ----------
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def checkInChanges(self, eventId: int) -> AsyncGenerator[CheckInChange, None]:
+        """
+        Live check-in deltas for an event. The first message is a snapshot of
+        the current set; later ones only carry the students that changed.
+        """
+        async def snapshot():
+            ids = await checkin_store.members(eventId)
+            return CheckInChange(eventId=eventId, action="snapshot", studentIds=ids, count=len(ids))
+
+        # Listen before reading the snapshot so no change falls in between
+        async with checkin_events.listen(eventId) as queue:
+            yield await snapshot()
+            while True:
+                message = await queue.get()
+                if message["action"] == "resync":
+                    yield await snapshot()
+                else:
+                    yield CheckInChange(**message)
+
+
+async def get_context():
+    """
+    Per-request context: one shared MySQL unit of work, fresh batch loaders
+    and timing buffers for every GraphQL operation
+    """
+    db = UnitOfWork()
+    try:
+        yield {"db": db, "loaders": Loaders(db), "store_timings": []}
+    finally:
+        # Normally returned by UnitOfWorkExtension; this covers aborted requests
+        await db.close()
+
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[AllowList, DocumentCache, UnitOfWorkExtension, StoreTimingExtension, TracingExtension],
+)
+graphql_app = GraphQLRouter(schema, context_getter=get_context)
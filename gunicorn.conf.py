@@ -0,0 +1,48 @@
+# gunicorn.conf.py
+"""
+Multi-worker deployment: gunicorn supervising uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker is a separate process with its own event loop, pools and
+clients. They are created in the worker (lifespan startup, or on first
+use) and never inherited from the master: database.reset_after_fork
+drops anything a fork copied. Nothing a request needs lives only in one
+worker. Caches, the search index, check-ins, persisted queries and
+profiles are in Redis, and the in-process query cache (memory backend)
+is kept coherent over Redis pub/sub (query_cache.py). A request can
+therefore go to any worker on any node.
+
+Sizing: every worker opens up to MYSQL_ASYNC_POOL_SIZE async plus
+MYSQL_POOL_MAX_SIZE sync connections, so MySQL's max_connections must
+cover WEB_CONCURRENCY times that on every node. Lower the pool sizes as
+workers are added.
+
+Settings (environment):
+    WEB_CONCURRENCY         workers (default: one per CPU)
+    BIND                    listen address (default 0.0.0.0:8000)
+    GUNICORN_PRELOAD        1 imports the app once in the master before forking
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (0: never)
+    GUNICORN_TIMEOUT        seconds a silent worker is given before it is restarted
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+# Long enough for the lifespan shutdown (check-in worker, pools) to finish
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started; pools open on first use")
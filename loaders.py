@@ -0,0 +1,93 @@
+# loaders.py
+"""
+Per-request batch loaders for the GraphQL resolvers.
+
+Instead of running one query per group for its members and another for its
+leaders, a loader collects the group IDs it is asked about and fetches each
+relation with a single `WHERE groupID IN (...)` query, then buckets the rows
+in memory. A fresh set of loaders is created for every GraphQL request (see
+`graphql_api.get_context`), so cached rows never leak between requests.
+"""
+import asyncio
+from typing import Dict, Iterable, List
+
+
+def in_placeholders(ids: List[int]) -> str:
+    """Return '%s, %s, ...' for a parameterised IN (...) clause."""
+    return ", ".join(["%s"] * len(ids))
+
+
+class GroupLoader:
+    """Batches GroupMember/GroupLeader lookups for one request."""
+
+    MEMBERS_SQL = """
+        SELECT gm.groupID                           as groupId,
+               s.ID                                 as id,
+               s.firstName,
+               s.lastName,
+               s.guardianID,
+               CONCAT(g.firstName, ' ', g.lastName) as guardianName
+        FROM GroupMember gm
+                 JOIN Student s ON gm.studentID = s.ID
+                 LEFT JOIN Guardian g ON s.guardianID = g.ID
+        WHERE gm.groupID IN ({ids})
+        ORDER BY s.firstName
+    """
+
+    LEADERS_SQL = """
+        SELECT gl.groupID as groupId, l.ID as id, l.firstName, l.lastName
+        FROM GroupLeader gl
+                 JOIN Leader l ON gl.leaderID = l.ID
+        WHERE gl.groupID IN ({ids})
+        ORDER BY l.firstName
+    """
+
+    def __init__(self, db):
+        self._db = db  # the request's UnitOfWork
+        self._members: Dict[int, List[dict]] = {}
+        self._leaders: Dict[int, List[dict]] = {}
+        self.query_count = 0
+        self._lock = asyncio.Lock()
+
+    async def prime(self, group_ids: Iterable[int]) -> None:
+        """Fetch members and leaders for every group not already loaded."""
+        group_ids = list(group_ids)
+        # Resolvers run concurrently; the lock stops a second caller from
+        # seeing a group's buckets before they are filled.
+        async with self._lock:
+            missing = [gid for gid in dict.fromkeys(group_ids) if gid not in self._members]
+            if not missing:
+                return
+
+            members = {gid: [] for gid in missing}
+            leaders = {gid: [] for gid in missing}
+            ids = in_placeholders(missing)
+            for row in await self._db.fetchall(self.MEMBERS_SQL.format(ids=ids), missing):
+                members[row.pop("groupId")].append(row)
+
+            for row in await self._db.fetchall(self.LEADERS_SQL.format(ids=ids), missing):
+                leaders[row.pop("groupId")].append(row)
+            self.query_count += 2
+
+            self._members.update(members)
+            self._leaders.update(leaders)
+
+    async def members(self, group_id: int) -> List[dict]:
+        await self.prime([group_id])
+        return self._members[group_id]
+
+    async def leaders(self, group_id: int) -> List[dict]:
+        await self.prime([group_id])
+        return self._leaders[group_id]
+
+    def clear(self, group_id: int) -> None:
+        """Forget cached rows for a group (call after mutating it)."""
+        self._members.pop(group_id, None)
+        self._leaders.pop(group_id, None)
+
+
+class Loaders:
+    """Bundle of all loaders for a single GraphQL request."""
+
+    def __init__(self, db):
+        self.groups = GroupLoader(db)
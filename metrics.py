@@ -0,0 +1,262 @@
+# metrics.py
+"""
+Request-level instrumentation and a Prometheus text exposition.
+
+Every HTTP request gets a `RequestStats` (set by the middleware in app.py)
+that counts MySQL, Mongo and Redis calls and their durations, the time
+spent waiting on the MySQL pool and per-resolver timings. The data access
+layer reports calls through `record_call` / `track`, and
+`TracingExtension` turns the stats of a GraphQL operation into histograms,
+an optional `extensions.tracing` block and an N+1 warning when an
+operation issues more than N_PLUS_ONE_THRESHOLD SQL queries.
+
+The histograms are rendered at /metrics by `render_metrics`. No client
+library is needed; the format is the plain Prometheus text format.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from inspect import isawaitable
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from strawberry.extensions import SchemaExtension
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "20"))
+# "header": only when the request sends X-GraphQL-Tracing: 1; "always"; "off"
+TRACING_MODE = os.getenv("GRAPHQL_TRACING", "header")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+
+STORES = ("mysql", "mongo", "redis")
+
+
+# ---------- Prometheus primitives ----------
+
+def _label_str(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # one slot per bucket, then sum and count
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = list(self._series.items())
+        for key, series in items:
+            for i, bound in enumerate(self.buckets):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {series[i]:g}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {series[-1]:g}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {series[-1]:g}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {value:g}")
+        return lines
+
+
+REGISTRY: list = []
+# Callables returning extra exposition lines (e.g. cache or pool gauges)
+COLLECTORS: List[Callable[[], Iterable[str]]] = []
+
+
+def register_collector(fn: Callable[[], Iterable[str]]) -> None:
+    COLLECTORS.append(fn)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collector in COLLECTORS:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+OPERATION_DURATION = Histogram(
+    "graphql_operation_duration_seconds", "GraphQL operation wall time", ("operation",)
+)
+RESOLVER_DURATION = Histogram(
+    "graphql_resolver_duration_seconds", "Wall time of top-level GraphQL resolvers", ("field",)
+)
+STORE_CALL_DURATION = Histogram(
+    "store_call_duration_seconds", "Duration of individual MySQL, Mongo and Redis calls", ("store",)
+)
+STORE_CALLS_PER_OPERATION = Histogram(
+    "graphql_store_calls_per_operation", "Store calls issued by one GraphQL operation",
+    ("store",), buckets=COUNT_BUCKETS
+)
+POOL_WAIT = Histogram("mysql_pool_wait_seconds", "Time spent waiting for a MySQL connection", ("pool",))
+N_PLUS_ONE = Counter(
+    "graphql_n_plus_one_total", "Operations that exceeded N_PLUS_ONE_THRESHOLD SQL queries", ("operation",)
+)
+
+
+# ---------- Per-request stats ----------
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls = dict.fromkeys(STORES, 0)
+        self.seconds = dict.fromkeys(STORES, 0.0)
+        self.pool_wait = 0.0
+        self.resolvers: List[dict] = []
+
+    def snapshot(self) -> dict:
+        return {
+            "durationMs": round((time.perf_counter() - self.started) * 1000, 2),
+            "calls": dict(self.calls),
+            "storeMs": {k: round(v * 1000, 2) for k, v in self.seconds.items()},
+            "poolWaitMs": round(self.pool_wait * 1000, 2),
+            "resolvers": self.resolvers,
+        }
+
+
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_stats", default=None)
+
+
+def record_call(store: str, seconds: float) -> None:
+    """Report one completed store call."""
+    STORE_CALL_DURATION.observe(seconds, store)
+    stats = current_stats.get()
+    if stats is not None:
+        stats.calls[store] += 1
+        stats.seconds[store] += seconds
+
+
+def record_pool_wait(seconds: float, pool: str = "async") -> None:
+    POOL_WAIT.observe(seconds, pool)
+    stats = current_stats.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+
+@contextmanager
+def track(store: str):
+    """`with track("mongo"): await coll.find(...)` times one store call."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_call(store, time.perf_counter() - start)
+
+
+# ---------- GraphQL extension ----------
+
+class TracingExtension(SchemaExtension):
+    """Per-operation histograms, N+1 detection and opt-in extensions.tracing."""
+
+    def on_operation(self):
+        stats = current_stats.get()
+        if stats is None:
+            # Not behind the HTTP middleware (e.g. schema.execute in a script)
+            stats = RequestStats()
+            current_stats.set(stats)
+        self._stats = stats
+        self._before = dict(stats.calls)
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+
+        name = self.execution_context.operation_name or "anonymous"
+        OPERATION_DURATION.observe(elapsed, name)
+        issued = {store: stats.calls[store] - self._before[store] for store in STORES}
+        for store, count in issued.items():
+            STORE_CALLS_PER_OPERATION.observe(count, store)
+        if issued["mysql"] > N_PLUS_ONE_THRESHOLD:
+            N_PLUS_ONE.inc(name)
+            print(
+                f"[N+1] GraphQL operation '{name}' issued {issued['mysql']} SQL queries "
+                f"(threshold {N_PLUS_ONE_THRESHOLD})"
+            )
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        # Only time top-level fields; nested fields are mostly attribute reads
+        if info.path.prev is not None:
+            return _next(root, info, *args, **kwargs)
+
+        start = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return self._await_resolver(result, info, start)
+        self._observe_resolver(info, start)
+        return result
+
+    async def _await_resolver(self, awaitable, info, start):
+        try:
+            return await awaitable
+        finally:
+            self._observe_resolver(info, start)
+
+    def _observe_resolver(self, info, start):
+        elapsed = time.perf_counter() - start
+        RESOLVER_DURATION.observe(elapsed, info.field_name)
+        stats = current_stats.get()
+        if stats is not None:
+            stats.resolvers.append({"field": info.path.key, "ms": round(elapsed * 1000, 2)})
+
+    def _tracing_enabled(self) -> bool:
+        if TRACING_MODE == "always":
+            return True
+        if TRACING_MODE != "header":
+            return False
+        context = self.execution_context.context
+        request = context.get("request") if isinstance(context, dict) else None
+        return request is not None and request.headers.get("x-graphql-tracing") == "1"
+
+    def get_results(self):
+        stats = getattr(self, "_stats", None)
+        if stats is None or not self._tracing_enabled():
+            return {}
+        return {"tracing": stats.snapshot()}
@@ -0,0 +1,249 @@
+# migrate.py
+"""
+Versioned schema migrations for the MySQL database.
+
+Migrations live in ./migrations as NNNN_description.sql and are applied in
+order. Applied versions are recorded in the `schema_migrations` table.
+Each statement that fails because the column, index or constraint already
+exists (or, for a DROP, is already gone) is skipped, so databases created
+from a current schema.sql can be migrated safely.
+
+Usage:
+    python migrate.py status            # list applied / pending migrations
+    python migrate.py up [--explain]    # apply pending migrations
+    python migrate.py explain           # EXPLAIN the hot queries
+
+Every command runs against each tenant schema in turn (tenants.py), or
+only one with --tenant NAME.
+"""
+import argparse
+import os
+import re
+import sys
+
+import mysql.connector
+
+from database import get_db_connection
+from tenants import selected, use_tenant
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# MySQL errors meaning "this statement already ran"
+ALREADY_APPLIED_ERRORS = {
+    1060,  # ER_DUP_FIELDNAME: duplicate column name
+    1061,  # ER_DUP_KEYNAME: duplicate index name
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY: index already dropped
+    1826,  # ER_FK_DUP_NAME: duplicate foreign key constraint name
+}
+
+# Hot queries and sample parameters for the EXPLAIN report; see also
+# hot_queries(), which adds the resolvers' own list queries
+HOT_QUERIES = {
+    "volunteerRecords(volunteerId)": (
+        """
+        SELECT vr.ID, vr.volunteerID, vr.eventID
+        FROM VolunteerRecord vr
+                 JOIN Volunteer v ON vr.volunteerID = v.ID
+        WHERE vr.volunteerID = %s
+        ORDER BY vr.ID DESC
+        """,
+        (1,),
+    ),
+    "volunteerRecords(eventId)": (
+        """
+        SELECT vr.ID, vr.volunteerID, vr.eventID
+        FROM VolunteerRecord vr
+                 JOIN Volunteer v ON vr.volunteerID = v.ID
+        WHERE vr.eventID = %s
+        ORDER BY vr.ID DESC
+        """,
+        (1,),
+    ),
+    "groups.members": (
+        """
+        SELECT gm.groupID, s.ID, s.firstName, s.lastName
+        FROM GroupMember gm
+                 JOIN Student s ON gm.studentID = s.ID
+                 LEFT JOIN Guardian g ON s.guardianID = g.ID
+        WHERE gm.groupID IN (%s, %s, %s)
+        ORDER BY s.firstName
+        """,
+        (1, 2, 3),
+    ),
+    "groups.leaders": (
+        """
+        SELECT gl.groupID, l.ID, l.firstName, l.lastName
+        FROM GroupLeader gl
+                 JOIN Leader l ON gl.leaderID = l.ID
+        WHERE gl.groupID IN (%s, %s, %s)
+        ORDER BY l.firstName
+        """,
+        (1, 2, 3),
+    ),
+    "deleteEvent cascade": (
+        "SELECT ID FROM EventLeader WHERE eventID = %s",
+        (1,),
+    ),
+}
+
+
+def hot_queries():
+    """
+    HOT_QUERIES plus the list queries built from the resolvers' own SQL and
+    ListSpecs, so the report EXPLAINs exactly what the API runs.
+    """
+    # graphql_api pulls in the whole API; only the EXPLAIN report needs it
+    from graphql_api import ATTENDANCE_LIST, ATTENDANCE_OF_STUDENT, STUDENT_ATTENDANCE_SQL, STUDENT_LIST
+    from pagination import encode_cursor, page_query
+
+    seek = encode_cursor(["2024-01-01", 0, 1])
+    queries = {
+        "studentAttendance": (STUDENT_ATTENDANCE_SQL, (1, 51)),
+        "studentAttendanceConnection": page_query(
+            ATTENDANCE_LIST, ATTENDANCE_LIST.columns, 50, None, [ATTENDANCE_OF_STUDENT], (1,)
+        ),
+        "studentAttendanceConnection(after)": page_query(
+            ATTENDANCE_LIST, ATTENDANCE_LIST.columns, 50, seek, [ATTENDANCE_OF_STUDENT], (1,)
+        ),
+        "studentsConnection": page_query(STUDENT_LIST, ["id", "firstName"], 50),
+    }
+    return {**queries, **HOT_QUERIES}
+
+
+def list_migrations():
+    """Return [(version, name, path)] sorted by version."""
+    found = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r"^(\d+)_(.+)\.sql$", filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return found
+
+
+def split_statements(sql: str):
+    """Split a migration file on ';' at line ends, dropping '--' comments."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    statements = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [s.strip() for s in statements if s.strip()]
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(200),
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def explain_hot_queries(cnx, title: str):
+    print(f"\n=== EXPLAIN ({title}) ===")
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        for label, (sql, params) in hot_queries().items():
+            cursor.execute("EXPLAIN " + sql, params)
+            print(f"\n-- {label}")
+            for row in cursor.fetchall():
+                print(
+                    f"  table={row.get('table')} type={row.get('type')} key={row.get('key')} "
+                    f"rows={row.get('rows')} extra={row.get('Extra')}"
+                )
+    finally:
+        cursor.close()
+
+
+def status():
+    cnx = get_db_connection()
+    cursor = cnx.cursor()
+    try:
+        ensure_migrations_table(cursor)
+        done = applied_versions(cursor)
+        for version, name, _ in list_migrations():
+            state = "applied" if version in done else "pending"
+            print(f"{version:04d}  {name:40s} {state}")
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def up(explain: bool = False):
+    cnx = get_db_connection()
+    cursor = cnx.cursor()
+    try:
+        ensure_migrations_table(cursor)
+        done = applied_versions(cursor)
+        pending = [m for m in list_migrations() if m[0] not in done]
+        if not pending:
+            print("Database is up to date.")
+            return
+
+        if explain:
+            explain_hot_queries(cnx, "before")
+
+        for version, name, path in pending:
+            print(f"Applying {version:04d}_{name} ...")
+            with open(path) as f:
+                statements = split_statements(f.read())
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except mysql.connector.Error as err:
+                    if err.errno in ALREADY_APPLIED_ERRORS:
+                        print(f"  skipped (already present): {err.msg}")
+                        continue
+                    raise
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            cnx.commit()
+            print(f"  done ({len(statements)} statements)")
+
+        if explain:
+            explain_hot_queries(cnx, "after")
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def explain():
+    cnx = get_db_connection()
+    try:
+        explain_hot_queries(cnx, "current schema")
+    finally:
+        cnx.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--tenant", help="only this tenant's schema (default: every tenant)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", parents=[common], help="list applied and pending migrations")
+    up_parser = sub.add_parser("up", parents=[common], help="apply pending migrations")
+    up_parser.add_argument("--explain", action="store_true", help="EXPLAIN hot queries before and after")
+    sub.add_parser("explain", parents=[common], help="EXPLAIN the hot queries")
+    args = parser.parse_args(argv)
+
+    tenants = selected(args.tenant)
+    for tenant in tenants:
+        with use_tenant(tenant):
+            if len(tenants) > 1:
+                print(f"== {tenant.id} ({tenant.db})")
+            if args.command == "status":
+                status()
+            elif args.command == "up":
+                up(explain=args.explain)
+            elif args.command == "explain":
+                explain()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
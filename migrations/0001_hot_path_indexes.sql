@@ -0,0 +1,41 @@
+-- Indexes and uniqueness for the hot query paths.
+-- Duplicates are removed first (keeping the oldest row) so the UNIQUE
+-- constraints can be added to databases that already have data.
+
+-- persistAttendance retries: one row per student per event per day
+DELETE a1 FROM AttendanceStudent a1
+    JOIN AttendanceStudent a2
+      ON a1.eventID = a2.eventID
+     AND a1.studentID = a2.studentID
+     AND a1.theDATE = a2.theDATE
+     AND a1.ID > a2.ID;
+ALTER TABLE AttendanceStudent
+    ADD CONSTRAINT uq_attendance_student_event_day UNIQUE (eventID, studentID, theDATE);
+
+-- studentAttendance: WHERE studentID = ? ORDER BY theDATE DESC, theTime DESC, ID DESC
+CREATE INDEX idx_attendance_student_history
+    ON AttendanceStudent (studentID, theDATE, theTime, ID);
+
+-- A volunteer signs up for an event once; also serves volunteerRecords(volunteerId)
+DELETE v1 FROM VolunteerRecord v1
+    JOIN VolunteerRecord v2
+      ON v1.volunteerID = v2.volunteerID
+     AND v1.eventID = v2.eventID
+     AND v1.ID > v2.ID;
+ALTER TABLE VolunteerRecord
+    ADD CONSTRAINT uq_volunteer_record UNIQUE (volunteerID, eventID);
+
+-- volunteerRecords(eventId): WHERE eventID = ? ORDER BY ID DESC
+CREATE INDEX idx_volunteer_record_event ON VolunteerRecord (eventID, ID);
+
+-- Event-scoped lookups and cascades
+CREATE INDEX idx_event_leader_event ON EventLeader (eventID, leaderID);
+CREATE INDEX idx_attendance_record_event ON AttendanceRecord (eventID, theDATE);
+
+-- Group member/leader joins: WHERE groupID IN (...) then join by student/leader
+CREATE INDEX idx_group_member_student ON GroupMember (studentID, groupID);
+CREATE INDEX idx_group_leader_leader ON GroupLeader (leaderID, groupID);
+
+-- students / volunteers lists ordered by first name (keyset pages)
+CREATE INDEX idx_student_first_name ON Student (firstName, ID);
+CREATE INDEX idx_volunteer_first_name ON Volunteer (firstName, ID);
@@ -0,0 +1,33 @@
+-- Attendance rollups maintained by analytics.py when attendance is persisted.
+-- Fill them for existing data afterwards with: python -m analytics rebuild
+
+CREATE TABLE IF NOT EXISTS EventAttendanceDaily(
+    eventID INT NOT NULL,
+    theDATE DATE NOT NULL,
+    attendees INT NOT NULL,
+    firstCheckIn TIME,
+    lastCheckIn TIME,
+    PRIMARY KEY (eventID, theDATE),
+    INDEX idx_event_attendance_date (theDATE)
+);
+
+CREATE TABLE IF NOT EXISTS GroupAttendanceDaily(
+    groupID INT NOT NULL,
+    eventID INT NOT NULL,
+    theDATE DATE NOT NULL,
+    attended INT NOT NULL,
+    members INT NOT NULL,
+    PRIMARY KEY (groupID, eventID, theDATE),
+    INDEX idx_group_attendance_event (eventID, theDATE)
+);
+
+CREATE TABLE IF NOT EXISTS StudentAttendanceStats(
+    studentID INT PRIMARY KEY,
+    totalAttended INT NOT NULL,
+    firstSeen DATE NOT NULL,
+    lastSeen DATE NOT NULL,
+    lastEventID INT,
+    lastWeek INT NOT NULL,
+    currentStreak INT NOT NULL,
+    longestStreak INT NOT NULL
+);
@@ -0,0 +1,12 @@
+-- Transactional outbox for Mongo/Redis/search cleanup after deletes (outbox.py)
+
+CREATE TABLE IF NOT EXISTS CleanupOutbox(
+    ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(40) NOT NULL,
+    payload JSON NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    lastError VARCHAR(500),
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    availableAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_cleanup_outbox_due (availableAt, ID)
+);
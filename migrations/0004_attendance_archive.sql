@@ -0,0 +1,24 @@
+-- Index of attendance moved to cold-storage segment files (archive.py).
+-- Archive old rows afterwards with: python -m archive run
+
+CREATE TABLE IF NOT EXISTS AttendanceArchiveSegment(
+    ID INT AUTO_INCREMENT PRIMARY KEY,
+    dataset VARCHAR(40) NOT NULL,
+    eventID INT NOT NULL,
+    year SMALLINT NOT NULL,
+    path VARCHAR(255) NOT NULL,
+    rowCount INT NOT NULL,
+    minDate DATE NOT NULL,
+    maxDate DATE NOT NULL,
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_archive_segment_path UNIQUE (path),
+    INDEX idx_archive_segment_event (eventID, dataset, minDate)
+);
+
+CREATE TABLE IF NOT EXISTS AttendanceArchiveStudent(
+    segmentID INT NOT NULL,
+    studentID INT NOT NULL,
+    rowCount INT NOT NULL,
+    PRIMARY KEY (studentID, segmentID),
+    INDEX idx_archive_student_segment (segmentID)
+);
@@ -0,0 +1,14 @@
+-- Index-friendly attendance order. theTime is nullable and a NULL would
+-- break keyset seeks, so the history is ordered by timeKey: theTime in
+-- seconds, -1 for NULL (like archive.history_key). A virtual column with
+-- an index is added without rebuilding the table.
+
+ALTER TABLE AttendanceStudent
+    ADD COLUMN timeKey INT AS (COALESCE(TIME_TO_SEC(theTime), -1)) VIRTUAL NOT NULL;
+
+-- studentAttendance(Connection): WHERE studentID = ? ORDER BY theDATE DESC, timeKey DESC, ID DESC
+CREATE INDEX idx_attendance_student_timeline
+    ON AttendanceStudent (studentID, theDATE, timeKey, ID);
+
+-- Superseded by idx_attendance_student_timeline
+DROP INDEX idx_attendance_student_history ON AttendanceStudent;
@@ -0,0 +1,261 @@
+# mysql_pool.py
+"""
+Thread-safe MySQL connection pool for the sync (mysql-connector) path.
+
+Replaces mysql.connector's fixed-size MySQLConnectionPool, which raises as
+soon as every slot is busy and hands out connections the server has
+already dropped. This pool:
+
+  * grows on demand from `min_size` up to `max_size` connections;
+  * queues callers when it is full and raises `PoolTimeout` only after
+    `timeout` seconds;
+  * pings connections that sat idle longer than `validate_after` seconds
+    before handing them out, and replaces dead ones;
+  * retires connections older than `max_lifetime`, and closes idle
+    connections above `min_size` after `idle_timeout`;
+  * reports size, in-use, waiters and wait time to metrics.
+
+Callers keep the mysql-connector API: `cnx = pool.get_connection()`,
+`cnx.cursor()`, `cnx.commit()`, and `cnx.close()` returns it to the pool.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+import mysql.connector
+import mysql.connector.errors
+
+from metrics import record_pool_wait
+
+
+class PoolTimeout(mysql.connector.errors.PoolError):
+    """No connection became available before the acquire deadline."""
+
+
+class PooledConnection:
+    """Proxy for a borrowed connection; close() hands it back to the pool."""
+
+    def __init__(self, pool: "ConnectionPool", raw, created: float):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_raw", raw)
+        object.__setattr__(self, "_created", created)
+        object.__setattr__(self, "_session_changed", False)
+
+    def __getattr__(self, name):
+        raw = self._raw
+        if raw is None:
+            raise mysql.connector.errors.OperationalError("Connection was returned to the pool")
+        return getattr(raw, name)
+
+    def __setattr__(self, name, value):
+        # e.g. cnx.autocommit = True; undone when the connection comes back
+        object.__setattr__(self, "_session_changed", True)
+        setattr(self._raw, name, value)
+
+    def close(self):
+        raw = self._raw
+        if raw is None:
+            return
+        object.__setattr__(self, "_raw", None)
+        self._pool._release(raw, self._created, self._session_changed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(
+            self,
+            connect: Callable[[], object],
+            min_size: int = 2,
+            max_size: int = 20,
+            timeout: float = 10.0,
+            max_lifetime: float = 1800.0,
+            validate_after: float = 30.0,
+            idle_timeout: float = 300.0,
+    ):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+        self.idle_timeout = idle_timeout
+
+        # (raw connection, created, last returned); the right end is the most recently used
+        self._idle: deque = deque()
+        self._size = 0
+        self._waiters = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.created = 0
+        self.recycled = 0
+        self.timeouts = 0
+
+    # ---------- Borrow / return ----------
+
+    def fill(self) -> None:
+        """Open connections up to min_size (called once at startup)."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                raw = self._open()
+            except Exception:
+                self._forget_slot()
+                raise
+            with self._cond:
+                self._idle.append((raw, time.monotonic(), time.monotonic()))
+                self._cond.notify()
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Borrow a connection, waiting up to `timeout` (default: the pool
+        timeout) for one to be returned when the pool is at max_size.
+        """
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        entry = None
+        with self._cond:
+            self._waiters += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise mysql.connector.errors.PoolError("Connection pool is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No MySQL connection available within {deadline - start:.1f}s "
+                            f"({self._size} in use)"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+        try:
+            raw, created = self._checked(entry)
+        except Exception:
+            self._forget_slot()
+            raise
+        record_pool_wait(time.monotonic() - start, "sync")
+        return PooledConnection(self, raw, created)
+
+    def _checked(self, entry):
+        """Connection for a reserved slot: the idle one if still usable, else a new one."""
+        now = time.monotonic()
+        if entry is not None:
+            raw, created, last_used = entry
+            if now - created >= self.max_lifetime:
+                self._discard(raw)
+            elif now - last_used >= self.validate_after and not self._alive(raw):
+                self._discard(raw)
+            else:
+                return raw, created
+        return self._open(), time.monotonic()
+
+    def _release(self, raw, created: float, session_changed: bool) -> None:
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+            if session_changed:
+                raw.autocommit = False
+        except mysql.connector.Error:
+            self._discard(raw)
+            self._forget_slot()
+            return
+
+        now = time.monotonic()
+        if now - created >= self.max_lifetime:
+            self._discard(raw)
+            self._forget_slot()
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                stale = [(raw, created, now)]
+            else:
+                self._idle.append((raw, created, now))
+                stale = self._reap_idle(now)
+            self._cond.notify()
+        for old, _, _ in stale:
+            self._discard(old)
+
+    def _reap_idle(self, now: float) -> List[tuple]:
+        """Pop idle connections above min_size that have not been used for idle_timeout (lock held)."""
+        stale = []
+        while self._size > self.min_size and self._idle and now - self._idle[0][2] >= self.idle_timeout:
+            stale.append(self._idle.popleft())
+            self._size -= 1
+        return stale
+
+    def _forget_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    # ---------- Connections ----------
+
+    def _open(self):
+        raw = self._connect()
+        self.created += 1
+        return raw
+
+    def _discard(self, raw) -> None:
+        self.recycled += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _alive(raw) -> bool:
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    # ---------- Lifecycle / stats ----------
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for raw, _, _ in idle:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "inUse": self._size - len(self._idle),
+                "waiters": self._waiters,
+                "maxSize": self.max_size,
+                "created": self.created,
+                "recycled": self.recycled,
+                "timeouts": self.timeouts,
+            }
@@ -0,0 +1,101 @@
+# notes.py
+"""
+MongoDB reads for meeting notes (GraphQL) and event notes (REST).
+
+Both collections are read by event, newest or oldest first. The indexes
+provisioned by `database.ensure_mongo_indexes` match those queries exactly.
+The event ID comes first for equality, then the timestamp and `_id` as a
+unique sort key. A page is therefore an index range scan with no
+in-memory sort. Queries project only the fields the caller uses and page
+with a keyset cursor on (timestamp, _id), the same opaque cursor format
+as pagination.py. Counts use `count_documents`, which the index answers
+without loading any notes.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from database import get_async_mongo_db
+from metrics import track
+from pagination import clamp_page_size, decode_cursor, encode_cursor
+
+MEETING_NOTES = "meeting_notes"
+EVENT_NOTES = "event_notes"
+
+
+def note_cursor(doc: dict, time_field: str = "createdAt") -> str:
+    stamp = doc[time_field]
+    return encode_cursor([stamp.isoformat() if isinstance(stamp, datetime) else stamp, str(doc["_id"])])
+
+
+def _seek(time_field: str, after: Optional[str], descending: bool, parse_time) -> dict:
+    """Filter for documents after the cursor in (time_field, _id) order."""
+    if not after:
+        return {}
+    try:
+        raw_time, raw_id = decode_cursor(after)
+        last_time, last_id = parse_time(raw_time), ObjectId(raw_id)
+    except (TypeError, InvalidId):
+        raise ValueError(f"Invalid cursor: {after!r}")
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {time_field: {op: last_time}},
+        {time_field: last_time, "_id": {op: last_id}},
+    ]}
+
+
+async def _page(coll, query: dict, time_field: str, descending: bool, projection: dict,
+                first: Optional[int]) -> Tuple[List[dict], Optional[str]]:
+    """Run one keyset page; returns (docs, cursor of the next page or None)."""
+    direction = -1 if descending else 1
+    cursor = coll.find(query, {**projection, time_field: 1}).sort(
+        [(time_field, direction), ("_id", direction)]
+    )
+    limit = clamp_page_size(first) if first is not None else None
+    if limit is not None:
+        cursor = cursor.limit(limit + 1)
+    with track("mongo"):
+        docs = await cursor.to_list(length=None)
+
+    next_cursor = None
+    if limit is not None and len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = note_cursor(docs[-1], time_field)
+    return docs, next_cursor
+
+
+# ---------- meeting_notes (GraphQL) ----------
+
+async def meeting_notes(
+        event_id: int,
+        fields: Tuple[str, ...] = ("content",),
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    An event's meeting notes, newest first, with only `fields` (plus _id and
+    createdAt) loaded. Without `first` every note is returned.
+    """
+    query = {"eventId": event_id, **_seek("createdAt", after, True, datetime.fromisoformat)}
+    projection = {f: 1 for f in fields}
+    return await _page(get_async_mongo_db()[MEETING_NOTES], query, "createdAt", True, projection, first)
+
+
+async def count_meeting_notes(event_id: int) -> int:
+    with track("mongo"):
+        return await get_async_mongo_db()[MEETING_NOTES].count_documents({"eventId": event_id})
+
+
+# ---------- event_notes (REST) ----------
+
+EVENT_NOTE_FIELDS = {"note": 1, "author": 1, "tags": 1}
+
+
+async def event_notes(
+        event_id: int, first: Optional[int] = None, after: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """An event's REST notes, oldest first (created_at is an ISO string)."""
+    query = {"mysql_event_id": event_id, **_seek("created_at", after, False, str)}
+    return await _page(get_async_mongo_db()[EVENT_NOTES], query, "created_at", False, EVENT_NOTE_FIELDS, first)
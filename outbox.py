@@ -0,0 +1,210 @@
+# outbox.py
+"""
+Transactional outbox for cleanup outside MySQL.
+
+A delete that also has to clean up MongoDB notes, Redis check-ins or the
+search index cannot do so inside its MySQL transaction. It therefore
+writes the cleanup as rows of the CleanupOutbox table, in the same
+transaction as the delete. The work exists exactly when the delete
+committed: a rollback removes it, and a crash after the commit leaves it
+queued.
+
+`OutboxProcessor.drain` claims due rows in a short transaction (SELECT
+... FOR UPDATE SKIP LOCKED, so several processes can drain at once) by
+counting the attempt and leasing them for LEASE_SECONDS, then commits and
+runs their handlers with no MySQL transaction open. A finished job is
+deleted; a failed one is retried with exponential backoff. A process that
+dies mid-job leaves it to be claimed again when the lease runs out, and so
+does a MySQL error while recording a job's outcome: the drain logs it and
+moves on, and the lease re-delivers the job (a retry then comes after
+LEASE_SECONDS rather than the backoff).
+Handlers are idempotent, so running one twice is harmless. A mutation
+registers `db.after_commit(outbox.kick)` so cleanup normally happens right
+away; `run()` polls every OUTBOX_POLL_SECONDS for anything left behind.
+
+Each tenant (tenants.py) has its own CleanupOutbox table: a kick drains the
+tenant it was registered in, and `run()` polls every tenant in turn.
+"""
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, Iterable
+
+from checkin_store import checkin_store
+from database import MYSQL_ERRORS, async_mysql_conn, get_async_mongo_db
+from loaders import in_placeholders
+from metrics import Counter, track
+from search import name_index
+from tenants import all_tenants, current, use_tenant
+
+POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+BATCH_SIZE = 100
+# IDs per outbox row, so one huge bulk delete becomes several small jobs
+PAYLOAD_CHUNK = 1000
+MAX_BACKOFF_SECONDS = 3600
+# How long a claimed job is hidden from other drains while its handler runs
+LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+OUTBOX_JOBS = Counter("cleanup_outbox_jobs_total", "Cleanup outbox jobs by kind and outcome", ("kind", "outcome"))
+
+INSERT_SQL = "INSERT INTO CleanupOutbox (kind, payload) VALUES (%s, %s)"
+
+
+# ---------- Handlers ----------
+
+async def delete_event_documents(payload: dict) -> None:
+    """Meeting notes, REST event notes and Redis check-ins of deleted events."""
+    event_ids = payload["eventIds"]
+    db = get_async_mongo_db()
+    with track("mongo"):
+        await db["meeting_notes"].delete_many({"eventId": {"$in": event_ids}})
+        await db["event_notes"].delete_many({"mysql_event_id": {"$in": event_ids}})
+    for event_id in event_ids:
+        await checkin_store.clear(event_id)
+
+
+async def remove_from_search(payload: dict) -> None:
+    for kind, person_id in payload["people"]:
+        await name_index.remove(kind, person_id)
+
+
+HANDLERS: Dict[str, Callable[[dict], Awaitable[None]]] = {
+    "event_documents": delete_event_documents,
+    "search_remove": remove_from_search,
+}
+
+
+# ---------- Enqueue ----------
+
+async def enqueue(conn, kind: str, key: str, values: Iterable) -> None:
+    """Queue `kind` for `values` on the caller's connection (inside its transaction)."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown outbox job kind '{kind}'")
+    values = list(values)
+    for i in range(0, len(values), PAYLOAD_CHUNK):
+        await conn.execute(INSERT_SQL, (kind, json.dumps({key: values[i:i + PAYLOAD_CHUNK]})))
+
+
+# ---------- Processing ----------
+
+class OutboxProcessor:
+    def __init__(self):
+        # Per tenant id: a kick only coalesces with a drain of the same tenant
+        self._draining: Dict[str, asyncio.Task] = {}
+        self._again: Dict[str, bool] = {}
+        self._stopped = False
+
+    async def kick(self) -> None:
+        """Start draining the current tenant in the background (coalesces concurrent kicks)."""
+        tenant_id = current().id
+        draining = self._draining.get(tenant_id)
+        if draining is not None and not draining.done():
+            self._again[tenant_id] = True
+            return
+        # The task inherits the caller's context, and with it the tenant
+        self._draining[tenant_id] = asyncio.create_task(self._drain_until_idle(tenant_id))
+
+    async def _drain_until_idle(self, tenant_id: str) -> None:
+        try:
+            while True:
+                self._again[tenant_id] = False
+                await self.drain()
+                if not self._again[tenant_id]:
+                    return
+        except MYSQL_ERRORS as e:
+            print(f"Outbox drain failed, retrying on the next poll: {e}")
+
+    async def drain(self, limit: int = BATCH_SIZE) -> int:
+        """Run every due job (up to `limit` per round). Returns jobs completed."""
+        done = 0
+        while True:
+            rows = await self._claim(limit)
+            for row in rows:
+                done += await self._run(row)
+            if len(rows) < limit:
+                return done
+
+    async def _claim(self, limit: int) -> list:
+        """Lease up to `limit` due jobs to this drain; the transaction ends before any handler runs."""
+        async with async_mysql_conn() as conn:
+            await conn.begin()
+            try:
+                rows = await conn.fetchall(
+                    """
+                    SELECT ID, kind, payload, attempts
+                    FROM CleanupOutbox
+                    WHERE availableAt <= NOW()
+                    ORDER BY ID
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    (limit,),
+                )
+                if rows:
+                    ids = [row["ID"] for row in rows]
+                    await conn.execute(
+                        f"""
+                        UPDATE CleanupOutbox
+                        SET attempts = attempts + 1, availableAt = NOW() + INTERVAL %s SECOND
+                        WHERE ID IN ({in_placeholders(ids)})
+                        """,
+                        [LEASE_SECONDS] + ids,
+                    )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        return rows
+
+    async def _run(self, row: dict) -> int:
+        kind = row["kind"]
+        try:
+            await HANDLERS[kind](json.loads(row["payload"]))
+        except Exception as e:
+            backoff = min(2 ** row["attempts"] * 5, MAX_BACKOFF_SECONDS)
+            print(f"Outbox job {row['ID']} ({kind}) failed, retrying in {backoff}s: {e}")
+            await self._record(
+                row,
+                """
+                UPDATE CleanupOutbox
+                SET lastError = %s, availableAt = NOW() + INTERVAL %s SECOND
+                WHERE ID = %s
+                """,
+                (str(e)[:500], backoff, row["ID"]),
+            )
+            OUTBOX_JOBS.inc(kind, "retry")
+            return 0
+        if not await self._record(row, "DELETE FROM CleanupOutbox WHERE ID = %s", (row["ID"],)):
+            OUTBOX_JOBS.inc(kind, "retry")
+            return 0
+        OUTBOX_JOBS.inc(kind, "done")
+        return 1
+
+    async def _record(self, row: dict, sql: str, params: tuple) -> bool:
+        """Record a job's outcome; on a MySQL error leave the job to its lease."""
+        try:
+            async with async_mysql_conn() as conn:
+                await conn.execute(sql, params)
+            return True
+        except MYSQL_ERRORS as e:
+            print(f"Outbox job {row['ID']} ({row['kind']}) not recorded, re-delivered after its lease: {e}")
+            return False
+
+    async def run(self) -> None:
+        """Poll for due jobs until stop() (retries and jobs left by other processes)."""
+        while not self._stopped:
+            for tenant in all_tenants():
+                with use_tenant(tenant):
+                    try:
+                        await self.drain()
+                    except asyncio.CancelledError:
+                        raise
+                    except MYSQL_ERRORS as e:
+                        print(f"Outbox poll failed ({tenant.id}): {e}")
+            await asyncio.sleep(POLL_SECONDS)
+
+    def stop(self) -> None:
+        self._stopped = True
+
+
+outbox = OutboxProcessor()
@@ -0,0 +1,210 @@
+# pagination.py
+"""
+Keyset (cursor) pagination and column projection for list queries.
+
+A `ListSpec` describes one list: its FROM clause, the SQL expression behind
+each GraphQL field, optional joins that are only added when a field needs
+them, and the sort key. `fetch_page` selects only the requested fields
+(plus the sort key), seeks past the `after` cursor with a row-value
+comparison such as `(s.firstName, s.ID) > (%s, %s)` and reads `first + 1`
+rows to learn whether another page exists. Work is therefore proportional
+to the page size, not the table size.
+
+Cursors are opaque base64-encoded JSON arrays holding the sort-key values
+of the last row on the page. Sort keys must never be NULL (a NULL makes
+the row-value comparison NULL and silently skips the row). A nullable
+column is ordered through an indexed NOT NULL generated column, such as
+AttendanceStudent.timeKey, rather than a COALESCE expression, which would
+keep MySQL from reading the order off the index.
+
+The older unpaginated list fields read at most GRAPHQL_MAX_LIST_SIZE rows
+(`clamp_list_limit`) instead of whole tables. They read one row more than
+that, and `within_list_limit` turns a longer list into an error naming the
+Connection field to page through, so a list is never cut short silently.
+"""
+import base64
+import json
+import os
+from typing import Dict, Generic, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+import strawberry
+from strawberry.types.nodes import SelectedField
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Rows an unpaginated list field returns at most (and by default)
+MAX_LIST_SIZE = int(os.getenv("GRAPHQL_MAX_LIST_SIZE", "1000"))
+
+
+@strawberry.type
+class PageInfo:
+    hasNextPage: bool
+    endCursor: Optional[str] = None
+
+
+@strawberry.type
+class Edge(Generic[T]):
+    cursor: str
+    node: T
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    edges: List[Edge[T]]
+    pageInfo: PageInfo
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([str(v) if not isinstance(v, (int, float, type(None))) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class ListSpec:
+    """SQL recipe for one paginated list."""
+
+    def __init__(
+            self,
+            source: str,
+            columns: Dict[str, str],
+            order: List[str],
+            descending: bool = False,
+            joins: Optional[Dict[str, str]] = None,
+            join_fields: Optional[Dict[str, str]] = None,
+    ):
+        self.source = source          # FROM clause incl. mandatory joins
+        self.columns = columns        # GraphQL field -> SQL expression
+        self.order = order            # sort-key SQL expressions, unique overall
+        self.descending = descending
+        self.joins = joins or {}      # join name -> JOIN clause
+        self.join_fields = join_fields or {}  # GraphQL field -> join name it needs
+
+    def complete(self, row: dict) -> dict:
+        """Row with every GraphQL field present (unselected ones as None)."""
+        return {**dict.fromkeys(self.columns), **row}
+
+    def select_list(self, fields: Iterable[str]) -> Tuple[str, str]:
+        wanted = [f for f in self.columns if f in set(fields)] or list(self.columns)
+        select = [f"{self.columns[f]} AS {f}" for f in wanted]
+        select += [f"{expr} AS _k{i}" for i, expr in enumerate(self.order)]
+        needed = {self.join_fields[f] for f in wanted if f in self.join_fields}
+        joins = " ".join(self.joins[name] for name in self.joins if name in needed)
+        return ", ".join(select), joins
+
+
+def clamp_page_size(first: Optional[int]) -> int:
+    if first is None:
+        return DEFAULT_PAGE_SIZE
+    if first < 0:
+        raise ValueError("first must be non-negative")
+    return min(first, MAX_PAGE_SIZE)
+
+
+def clamp_list_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return MAX_LIST_SIZE
+    if limit < 0:
+        raise ValueError("limit must be non-negative")
+    return min(limit, MAX_LIST_SIZE)
+
+
+def within_list_limit(rows: List[T], limit: int, requested: Optional[int], field: str) -> List[T]:
+    """
+    Rows of an unpaginated list read with LIMIT `limit` + 1. Beyond `limit`
+    they are trimmed only if the client asked for at most that many.
+    """
+    if len(rows) <= limit:
+        return rows
+    if requested is not None and requested <= limit:
+        return rows[:limit]
+    raise ValueError(f"{field} has more than {limit} rows; page through {field}Connection instead")
+
+
+def page_query(
+        spec: ListSpec,
+        fields: Iterable[str],
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        where: Optional[List[str]] = None,
+        params: Sequence = (),
+) -> Tuple[str, list]:
+    """The SQL and parameters `fetch_page` runs (also EXPLAINed by migrate.py)."""
+    limit = clamp_page_size(first)
+    select, joins = spec.select_list(fields)
+    conditions = list(where or [])
+    params = list(params)
+
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(spec.order):
+            raise ValueError(f"Invalid cursor: {after!r}")
+        op = "<" if spec.descending else ">"
+        keys = ", ".join(spec.order)
+        conditions.append(f"({keys}) {op} ({', '.join(['%s'] * len(values))})")
+        params += values
+
+    direction = "DESC" if spec.descending else "ASC"
+    sql = f"SELECT {select} FROM {spec.source} {joins}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr in spec.order)
+    sql += " LIMIT %s"
+    params.append(limit + 1)
+    return sql, params
+
+
+async def fetch_page(
+        conn,
+        spec: ListSpec,
+        fields: Iterable[str],
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        where: Optional[List[str]] = None,
+        params: Sequence = (),
+) -> Tuple[List[dict], PageInfo, List[str]]:
+    """
+    Run one keyset-paginated query. Returns (rows, pageInfo, cursors) where
+    each row only contains the requested fields.
+    """
+    limit = clamp_page_size(first)
+    sql, params = page_query(spec, fields, first, after, where, params)
+    rows = await conn.fetchall(sql, params)
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    cursors = []
+    for row in rows:
+        cursors.append(encode_cursor([row.pop(f"_k{i}") for i in range(len(spec.order))]))
+    page_info = PageInfo(hasNextPage=has_next, endCursor=cursors[-1] if cursors else None)
+    return rows, page_info, cursors
+
+
+def _collect(selections, path: Sequence[str], out: Set[str]) -> None:
+    for sel in selections:
+        if not isinstance(sel, SelectedField):
+            # Inline fragment or fragment spread: same level, recurse
+            _collect(sel.selections, path, out)
+        elif not path:
+            out.add(sel.name)
+        elif sel.name == path[0]:
+            _collect(sel.selections, path[1:], out)
+
+
+def selected_fields(info, path: Sequence[str] = ()) -> Set[str]:
+    """
+    Names of the GraphQL fields selected under `path` of the current field,
+    e.g. path=("edges", "node") for a connection.
+    """
+    out: Set[str] = set()
+    for field in info.selected_fields:
+        _collect(field.selections, path, out)
+    out.discard("__typename")
+    return out
@@ -0,0 +1,326 @@
+# persisted_queries.py
+"""
+Automatic persisted queries (APQ) and a parsed-document cache for /graphql.
+
+Clients send the SHA-256 of the query instead of its text, following the
+Apollo APQ protocol:
+
+    GET  /graphql?extensions={"persistedQuery":{"version":1,"sha256Hash":"..."}}&variables=...
+    POST /graphql  {"extensions": {"persistedQuery": {...}}, "variables": {...}}
+
+An unknown hash is answered with a `PersistedQueryNotFound` error. The
+client then sends the query text and the hash once, the server checks
+that the hash matches and registers it. From then on the hash alone is
+enough. Queries sent by GET can be cached by browsers and proxies
+(Cache-Control max-age is PERSISTED_QUERY_GET_MAX_AGE seconds, off by
+default), and strawberry refuses mutations over GET.
+
+`PersistedQueryMiddleware` resolves the hash before strawberry sees the
+request. It keeps an in-process LRU of hash -> text, shared between
+workers through Redis (`pq:<hash>`). `DocumentCache` is a schema
+extension that keeps an LRU of parsed and validated documents keyed by
+the same hash, so hot operations skip parsing and validation altogether.
+
+Modes (PERSISTED_QUERIES):
+    auto       register any query on first use (default)
+    allowlist  only serve queries from the manifest, with or without the
+               hash; everything else is rejected (by the `AllowList`
+               schema extension, so WebSocket operations are covered too)
+    off        plain GraphQL; the document cache still applies
+
+The allow-list manifest (PERSISTED_QUERY_MANIFEST, default
+persisted_queries.json) maps hash -> query text. It is generated from the
+frontend with `python -m query_manifest extract frontend/*.js`
+(query_manifest.py).
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+
+from database import get_async_redis
+from metrics import Counter
+from query_manifest import MANIFEST_PATH, query_hash
+
+MODE = os.getenv("PERSISTED_QUERIES", "auto")
+GET_MAX_AGE = int(os.getenv("PERSISTED_QUERY_GET_MAX_AGE", "0"))
+CACHE_SIZE = int(os.getenv("PERSISTED_QUERY_CACHE_SIZE", "512"))
+REDIS_TTL = 30 * 24 * 3600
+MAX_QUERY_BYTES = 64 * 1024
+
+PERSISTED_QUERIES = Counter(
+    "graphql_persisted_queries_total", "Persisted query lookups by outcome", ("outcome",)
+)
+DOCUMENT_CACHE = Counter(
+    "graphql_document_cache_total", "Parsed-document cache lookups", ("result",)
+)
+
+
+class LRU:
+    """Small thread-safe LRU mapping."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class PersistedQueryError(Exception):
+    # APQ clients expect PersistedQueryNotFound with 200; malformed requests get 400
+    def __init__(self, message: str, code: str, status: int = 200):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+# ---------- Query store ----------
+
+class PersistedQueryStore:
+    def __init__(self, mode: str = MODE, manifest_path: str = MANIFEST_PATH):
+        if mode not in ("auto", "allowlist", "off"):
+            raise ValueError(f"Unknown PERSISTED_QUERIES mode '{mode}'")
+        self.mode = mode
+        self._queries = LRU(CACHE_SIZE)
+        self._allowed: Dict[str, str] = {}
+        if mode == "allowlist":
+            with open(manifest_path) as f:
+                self._allowed = json.load(f)
+            print(f"Persisted queries: allow-list of {len(self._allowed)} operations")
+
+    @staticmethod
+    def redis_key(sha: str) -> str:
+        return f"pq:{sha}"
+
+    async def resolve(self, sha: str, query: Optional[str]) -> str:
+        """Query text for a request carrying `sha` (and maybe the text itself)."""
+        if query is not None and not isinstance(query, str):
+            raise PersistedQueryError("query must be a string", "BAD_REQUEST", status=400)
+        if query is not None:
+            if query_hash(query) != sha:
+                PERSISTED_QUERIES.inc("mismatch")
+                raise PersistedQueryError("provided sha does not match query", "PERSISTED_QUERY_HASH_MISMATCH")
+            if self.mode == "allowlist":
+                return self.check_allowed(query, sha)
+            await self._register(sha, query)
+            return query
+
+        if self.mode == "allowlist":
+            known = self._allowed.get(sha)
+        else:
+            known = await self._lookup(sha)
+        if known is None:
+            PERSISTED_QUERIES.inc("miss")
+            raise PersistedQueryError("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+        PERSISTED_QUERIES.inc("hit")
+        return known
+
+    def check_allowed(self, query: str, sha: Optional[str] = None) -> str:
+        """In allow-list mode, reject any query that is not in the manifest."""
+        if self.mode != "allowlist":
+            return query
+        if (sha or query_hash(query)) not in self._allowed:
+            PERSISTED_QUERIES.inc("rejected")
+            raise PersistedQueryError("PersistedQueryNotAllowed", "PERSISTED_QUERY_NOT_ALLOWED")
+        return query
+
+    async def _lookup(self, sha: str) -> Optional[str]:
+        query = self._queries.get(sha)
+        if query is None:
+            try:
+                query = await get_async_redis().get(self.redis_key(sha))
+            except Exception as e:
+                print(f"Persisted query lookup failed: {e}")
+            if query is not None:
+                self._queries.put(sha, query)
+        return query
+
+    async def _register(self, sha: str, query: str) -> None:
+        if len(query.encode("utf-8")) > MAX_QUERY_BYTES:
+            raise PersistedQueryError("query too large to persist", "PERSISTED_QUERY_TOO_LARGE")
+        if self._queries.get(sha) is not None:
+            return
+        self._queries.put(sha, query)
+        PERSISTED_QUERIES.inc("registered")
+        try:
+            await get_async_redis().set(self.redis_key(sha), query, ex=REDIS_TTL)
+        except Exception as e:
+            # Other workers will ask the client for the text again
+            print(f"Persisted query registration failed: {e}")
+
+
+persisted_queries = PersistedQueryStore()
+
+
+# ---------- HTTP middleware ----------
+
+def _persisted_hash(extensions: Any) -> Optional[str]:
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    pq = extensions.get("persistedQuery")
+    if isinstance(pq, dict) and isinstance(pq.get("sha256Hash"), str):
+        return pq["sha256Hash"].lower()
+    return None
+
+
+def _error_body(err: PersistedQueryError) -> bytes:
+    return json.dumps({"errors": [{"message": str(err), "extensions": {"code": err.code}}]}).encode()
+
+
+class PersistedQueryMiddleware:
+    """ASGI middleware that swaps persisted-query hashes for query text on `path`."""
+
+    def __init__(self, app, path: str = "/graphql", store: PersistedQueryStore = persisted_queries):
+        self.app = app
+        self.path = path.rstrip("/")
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].rstrip("/") != self.path or self.store.mode == "off":
+            await self.app(scope, receive, send)
+            return
+        try:
+            if scope["method"] == "GET":
+                await self._get(scope, receive, send)
+            elif scope["method"] == "POST":
+                await self._post(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        except PersistedQueryError as err:
+            await self._reply(send, _error_body(err), err.status)
+
+    async def _get(self, scope, receive, send):
+        params = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        args = dict(params)
+        sha = _persisted_hash(args.get("extensions"))
+        if sha is None:
+            await self.app(scope, receive, send)
+            return
+
+        args["query"] = await self.store.resolve(sha, args.get("query"))
+        scope = dict(scope, query_string=urlencode(args).encode("latin-1"))
+        await self.app(scope, receive, self._cacheable(send))
+
+    async def _post(self, scope, receive, send):
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            sha = _persisted_hash(payload.get("extensions"))
+            if sha is not None:
+                payload["query"] = await self.store.resolve(sha, payload.get("query"))
+                body = json.dumps(payload).encode()
+
+        headers = [(k, v) for k, v in scope["headers"] if k != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode()))
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(dict(scope, headers=headers), replay, send)
+
+    @staticmethod
+    def _cacheable(send):
+        """Add Cache-Control to successful persisted GET responses."""
+        async def wrapped(message):
+            if message["type"] == "http.response.start" and GET_MAX_AGE > 0 and message["status"] == 200:
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"]
+                headers.append((b"cache-control", f"public, max-age={GET_MAX_AGE}".encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+        return wrapped
+
+    @staticmethod
+    async def _reply(send, body: bytes, status: int = 200):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ---------- Allow-list ----------
+
+class AllowList(SchemaExtension):
+    """
+    In allow-list mode, reject every document that is not in the manifest.
+    This runs in the schema, so it covers operations sent as query text
+    over HTTP and over WebSocket (graphql-transport-ws), which the HTTP
+    middleware never sees.
+    """
+
+    def on_validate(self):
+        ctx = self.execution_context
+        if persisted_queries.mode == "allowlist" and ctx.query is not None:
+            try:
+                persisted_queries.check_allowed(ctx.query)
+            except PersistedQueryError as err:
+                ctx.pre_execution_errors = [GraphQLError(str(err), extensions={"code": err.code})]
+        yield
+
+
+# ---------- Parsed-document cache ----------
+
+# hash -> parsed DocumentNode that passed validation
+_documents = LRU(CACHE_SIZE)
+
+
+class DocumentCache(SchemaExtension):
+    """
+    Reuse the parsed and validated document of a query seen before, keyed
+    by the query's SHA-256 (the persisted-query hash).
+    """
+
+    def on_parse(self):
+        ctx = self.execution_context
+        self._key = query_hash(ctx.query) if ctx.query else None
+        self._document = _documents.get(self._key) if self._key else None
+        if self._document is not None:
+            ctx.graphql_document = self._document
+        DOCUMENT_CACHE.inc("miss" if self._document is None else "hit")
+        yield
+
+    def on_validate(self):
+        ctx = self.execution_context
+        if self._document is not None and ctx.pre_execution_errors is None:
+            # Like strawberry's ValidationCache: errors set beforehand skip validation
+            ctx.pre_execution_errors = []
+        yield
+        if self._document is None and self._key and ctx.graphql_document is not None and not ctx.pre_execution_errors:
+            _documents.put(self._key, ctx.graphql_document)
@@ -0,0 +1,226 @@
+# profiles.py
+"""
+Precomputed student profile documents for the student/parent portal.
+
+The portal used to join Student, Guardian, AttendanceStudent and Event on
+every visit. Parents tend to open it all at once after Sunday services, so
+each student's page is now kept as one JSON document in Redis
+(`profile:student:<id>`), and `studentProfile(studentId)` serves it with a
+single GET:
+
+    id, firstName, lastName, guardianID, guardianName
+    groups              [{id, name}] the student belongs to
+    recentAttendance    the latest PROFILE_RECENT_ATTENDANCE rows, newest first
+    stats               the StudentAttendanceStats row (analytics.py), or null
+    builtAt             when the document was built
+
+Writes rebuild only the profiles they touch, once their transaction has
+committed. Persisted check-ins (attendance.py, checkin_worker.py) rebuild
+the students checked in; student, group and membership mutations rebuild
+the students concerned; renaming or deleting an event rebuilds the
+students who attended it; archiving (archive.py) rebuilds the students
+whose rows moved. A rebuild loads a whole batch of students with one
+query per table, and a student that no longer exists has their document
+deleted.
+
+A missing document (first visit, expired after PROFILE_TTL seconds,
+Redis flushed) is built on the spot from MySQL and stored. Warm every
+profile before a busy day with:
+
+    python -m profiles rebuild
+"""
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from database import async_mysql_conn, close_async_connections, get_async_redis
+from loaders import in_placeholders
+from metrics import Counter
+from tenants import selected, tenant_key, use_tenant
+
+RECENT_ATTENDANCE = int(os.getenv("PROFILE_RECENT_ATTENDANCE", "50"))
+TTL = int(os.getenv("PROFILE_TTL", str(7 * 24 * 3600)))
+CHUNK = 500
+
+PROFILE_READS = Counter("student_profile_reads_total", "Student profile lookups", ("result",))
+PROFILE_BUILDS = Counter("student_profile_builds_total", "Student profile documents rebuilt", ("outcome",))
+
+
+def profile_key(student_id: int) -> str:
+    return tenant_key(f"profile:student:{student_id}")
+
+
+# ---------- Building ----------
+
+async def build_profiles(conn, student_ids: List[int]) -> Dict[int, dict]:
+    """Profile documents of the given students (those that exist), four queries in all."""
+    if not student_ids:
+        return {}
+    marks = in_placeholders(student_ids)
+    students = await conn.fetchall(
+        f"""
+        SELECT s.ID                                 AS id,
+               s.firstName,
+               s.lastName,
+               s.guardianID,
+               CONCAT(g.firstName, ' ', g.lastName) AS guardianName
+        FROM Student s
+                 LEFT JOIN Guardian g ON s.guardianID = g.ID
+        WHERE s.ID IN ({marks})
+        """,
+        student_ids,
+    )
+    profiles = {
+        row["id"]: {**row, "groups": [], "recentAttendance": [], "stats": None}
+        for row in students
+    }
+    if not profiles:
+        return {}
+
+    groups = await conn.fetchall(
+        f"""
+        SELECT gm.studentID, g.ID AS id, g.name
+        FROM GroupMember gm
+                 JOIN AGroup g ON g.ID = gm.groupID
+        WHERE gm.studentID IN ({marks})
+        ORDER BY g.name, g.ID
+        """,
+        student_ids,
+    )
+    for row in groups:
+        profiles[row["studentID"]]["groups"].append({"id": row["id"], "name": row["name"]})
+
+    attendance = await conn.fetchall(
+        f"""
+        SELECT r.id, r.eventId, r.studentId, r.theDATE, r.theTime, e.Type AS eventName
+        FROM (SELECT a.ID        AS id,
+                     a.eventID   AS eventId,
+                     a.studentID AS studentId,
+                     a.theDATE,
+                     a.theTime,
+                     ROW_NUMBER() OVER (PARTITION BY a.studentID
+                                        ORDER BY a.theDATE DESC, a.timeKey DESC, a.ID DESC) AS n
+              FROM AttendanceStudent a
+              WHERE a.studentID IN ({marks})) r
+                 LEFT JOIN Event e ON e.ID = r.eventId
+        WHERE r.n <= %s
+        ORDER BY r.studentId, r.n
+        """,
+        list(student_ids) + [RECENT_ATTENDANCE],
+    )
+    for row in attendance:
+        row["theDATE"], row["theTime"] = str(row["theDATE"]), str(row["theTime"])
+        profiles[row["studentId"]]["recentAttendance"].append(row)
+
+    stats = await conn.fetchall(
+        f"""
+        SELECT studentID, totalAttended, firstSeen, lastSeen, lastEventID, lastWeek, currentStreak, longestStreak
+        FROM StudentAttendanceStats
+        WHERE studentID IN ({marks})
+        """,
+        student_ids,
+    )
+    for row in stats:
+        row["firstSeen"], row["lastSeen"] = str(row["firstSeen"]), str(row["lastSeen"])
+        profiles[row["studentID"]]["stats"] = row
+
+    built_at = datetime.now().isoformat(timespec="seconds")
+    for profile in profiles.values():
+        profile["builtAt"] = built_at
+    return profiles
+
+
+class StudentProfiles:
+    async def get(self, db, student_id: int) -> Optional[dict]:
+        """A student's profile: one Redis GET, built from MySQL on a miss."""
+        try:
+            raw = await get_async_redis().get(profile_key(student_id))
+        except Exception as e:
+            # A Redis outage should cost latency, not availability
+            print(f"Profile read failed ({student_id}): {e}")
+            raw = None
+        if raw is not None:
+            PROFILE_READS.inc("hit")
+            return json.loads(raw)
+
+        PROFILE_READS.inc("miss")
+        profile = (await build_profiles(db, [student_id])).get(student_id)
+        if profile is not None:
+            await self._store({student_id: profile}, [])
+        return profile
+
+    async def refresh(self, student_ids: Iterable[int]) -> None:
+        """Rebuild the profiles of `student_ids` from committed data (after-commit hook)."""
+        student_ids = sorted(set(student_ids))
+        if not student_ids:
+            return
+        try:
+            async with async_mysql_conn() as conn:
+                for i in range(0, len(student_ids), CHUNK):
+                    chunk = student_ids[i:i + CHUNK]
+                    profiles = await build_profiles(conn, chunk)
+                    await self._store(profiles, [sid for sid in chunk if sid not in profiles])
+        except Exception as e:
+            # Stale until PROFILE_TTL at worst; the next write or a rebuild fixes it
+            PROFILE_BUILDS.inc("failed", amount=len(student_ids))
+            print(f"Profile refresh failed for {len(student_ids)} students: {e}")
+
+    async def refresh_event(self, event_id: int) -> None:
+        """Rebuild the profiles of everyone who attended the event (renamed or deleted)."""
+        async with async_mysql_conn() as conn:
+            rows = await conn.fetchall(
+                "SELECT DISTINCT studentID FROM AttendanceStudent WHERE eventID = %s", (event_id,)
+            )
+        await self.refresh(row["studentID"] for row in rows)
+
+    async def refresh_group(self, group_id: int) -> None:
+        """Rebuild the profiles of a group's members (renamed group)."""
+        async with async_mysql_conn() as conn:
+            rows = await conn.fetchall("SELECT studentID FROM GroupMember WHERE groupID = %s", (group_id,))
+        await self.refresh(row["studentID"] for row in rows)
+
+    async def _store(self, profiles: Dict[int, dict], gone: List[int]) -> None:
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)
+            for student_id, profile in profiles.items():
+                pipe.set(profile_key(student_id), json.dumps(profile, default=str), ex=TTL)
+            if gone:
+                pipe.delete(*[profile_key(sid) for sid in gone])
+            await pipe.execute()
+        except Exception as e:
+            print(f"Profile write failed: {e}")
+            return
+        PROFILE_BUILDS.inc("stored", amount=len(profiles))
+        PROFILE_BUILDS.inc("deleted", amount=len(gone))
+
+
+student_profiles = StudentProfiles()
+
+
+# ---------- Rebuild ----------
+
+async def rebuild() -> int:
+    """Build every student's profile. Returns the number of students."""
+    async with async_mysql_conn() as conn:
+        rows = await conn.fetchall("SELECT ID FROM Student ORDER BY ID")
+    await student_profiles.refresh(row["ID"] for row in rows)
+    return len(rows)
+
+
+async def main() -> None:
+    try:
+        for tenant in selected():
+            with use_tenant(tenant):
+                print(f"{tenant.id}: built {await rebuild()} student profiles")
+    finally:
+        await close_async_connections()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m profiles rebuild")
+    asyncio.run(main())
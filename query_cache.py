@@ -0,0 +1,204 @@
+# query_cache.py
+"""
+Read-through cache for hot, rarely-changing MySQL list queries.
+
+Each cached result belongs to a namespace ("students", "events",
+"volunteers") that has a version stamp. Entries are stored together with
+the version they were loaded under; a read only counts as a hit when the
+entry's version matches the namespace's current version. Mutations call
+`bump(namespace)`, which makes every older entry unreachable, so stale
+rows are never served even before their TTL runs out.
+
+Backends (QUERY_CACHE_BACKEND):
+    redis   shared by every worker; version and entry are fetched with a
+            single MGET (default)
+    memory  in-process, size-bounded LRU, no network round trip on a hit
+    off     always load from MySQL
+
+With several workers (gunicorn.conf.py) each one has its own memory
+cache. A bump is applied locally and published on the Redis channel
+INVALIDATION_CHANNEL; `listen()`, started with the app, applies the other
+workers' bumps. Bumps published while a worker's subscription was down
+are lost, so it drops its whole cache whenever it (re)subscribes.
+
+Keys live in the current tenant's namespace (tenants.py).
+
+Entries are stored as serialized JSON and expire after QUERY_CACHE_TTL
+seconds; the memory backend keeps at most QUERY_CACHE_MAX_ENTRIES.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from redis.exceptions import RedisError
+
+from database import get_async_redis
+from tenants import tenant_key
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+RECONNECT_DELAY = 1.0
+
+
+class QueryCache:
+    def __init__(self, backend: str = None, ttl: int = None, max_entries: int = None):
+        self.backend = backend or os.getenv("QUERY_CACHE_BACKEND", "redis")
+        if self.backend not in ("redis", "memory", "off"):
+            raise ValueError(f"Unknown QUERY_CACHE_BACKEND '{self.backend}'")
+        self.ttl = ttl or int(os.getenv("QUERY_CACHE_TTL", "300"))
+        self.max_entries = max_entries or int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float, str]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        # Added to every local version; raised to drop the whole memory cache
+        self._epoch = 0
+        # Tells this process's own bumps apart on the invalidation channel
+        self._origin = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------- Keys ----------
+
+    @staticmethod
+    def version_key(namespace: str) -> str:
+        return tenant_key(f"cache:{namespace}:version")
+
+    @staticmethod
+    def entry_key(namespace: str, key: str) -> str:
+        return tenant_key(f"cache:{namespace}:entry:{key}")
+
+    # ---------- Public API ----------
+
+    async def get_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for (namespace, key), or call `loader`,
+        cache its JSON-serializable result and return it.
+        """
+        if self.backend == "off":
+            return await loader()
+
+        try:
+            version, payload = await self._read(namespace, key)
+        except Exception as e:
+            # A cache outage should cost latency, not availability
+            print(f"Query cache read failed ({namespace}:{key}): {e}")
+            return await loader()
+
+        if payload is not None:
+            self.hits += 1
+            return json.loads(payload)
+
+        self.misses += 1
+        # `version` was read before loading, so a bump that races with the
+        # load leaves this entry under an already-stale version.
+        value = await loader()
+        try:
+            await self._write(namespace, key, version, json.dumps(value, default=str))
+        except Exception as e:
+            print(f"Query cache write failed ({namespace}:{key}): {e}")
+        return value
+
+    async def bump(self, namespace: str) -> None:
+        """Invalidate every entry in the namespace."""
+        if self.backend == "redis":
+            await get_async_redis().incr(self.version_key(namespace))
+        elif self.backend == "memory":
+            namespace = tenant_key(namespace)
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            message = json.dumps({"origin": self._origin, "namespace": namespace})
+            try:
+                await get_async_redis().publish(INVALIDATION_CHANNEL, message)
+            except Exception as e:
+                # Other workers serve this namespace until QUERY_CACHE_TTL
+                print(f"Query cache invalidation not published ({namespace}): {e}")
+
+    async def listen(self) -> None:
+        """Apply other workers' bumps to this memory cache until cancelled (memory backend)."""
+        if self.backend != "memory":
+            return
+        while True:
+            pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.clear()
+                while True:
+                    raw = await pubsub.get_message(timeout=1.0)
+                    if raw is None or raw.get("type") != "message":
+                        continue
+                    try:
+                        message = json.loads(raw["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    if message.get("origin") != self._origin:
+                        namespace = message["namespace"]
+                        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            except (RedisError, OSError) as e:
+                print(f"Query cache invalidation channel lost: {e}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except RedisError:
+                    pass
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def clear(self) -> None:
+        """Drop every memory entry, including loads still in flight."""
+        self._epoch += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+    # ---------- Backends ----------
+
+    async def _read(self, namespace: str, key: str) -> Tuple[int, Any]:
+        if self.backend == "redis":
+            raw_version, raw_entry = await get_async_redis().mget(
+                self.version_key(namespace), self.entry_key(namespace, key)
+            )
+            version = int(raw_version or 0)
+            if raw_entry:
+                # Stored as "<version>\n<json>"
+                entry_version, _, payload = raw_entry.partition("\n")
+                if int(entry_version) == version:
+                    return version, payload
+            return version, None
+
+        namespace = tenant_key(namespace)
+        version = self._epoch + self._versions.get(namespace, 0)
+        entry = self._entries.get((namespace, key))
+        if entry is not None:
+            entry_version, expires_at, payload = entry
+            if entry_version == version and expires_at > time.monotonic():
+                self._entries.move_to_end((namespace, key))
+                return version, payload
+            del self._entries[(namespace, key)]
+        return version, None
+
+    async def _write(self, namespace: str, key: str, version: int, payload: str) -> None:
+        if self.backend == "redis":
+            entry = f"{version}\n{payload}"
+            await get_async_redis().set(self.entry_key(namespace, key), entry, ex=self.ttl)
+            return
+
+        namespace = tenant_key(namespace)
+        self._entries[(namespace, key)] = (version, time.monotonic() + self.ttl, payload)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+query_cache = QueryCache()
@@ -0,0 +1,53 @@
+# query_manifest.py
+"""
+Allow-list manifest for persisted queries (persisted_queries.py).
+
+The manifest (PERSISTED_QUERY_MANIFEST, default persisted_queries.json)
+maps SHA-256 hash -> query text for every GraphQL operation the frontend
+sends. It is generated from the frontend's template literals with:
+
+    python -m query_manifest extract frontend/*.js
+
+This module only reads files and hashes text. It imports nothing that
+connects to a database or needs secrets, so the Docker build can run it.
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Dict
+
+MANIFEST_PATH = os.getenv(
+    "PERSISTED_QUERY_MANIFEST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "persisted_queries.json")
+)
+
+# Template literals without ${...} interpolation (GraphQL $variables are fine)
+OPERATION_RE = re.compile(r"`(\s*(?:query|mutation|subscription|\{)(?:[^`$]|\$(?!\{))*)`")
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def extract(paths) -> Dict[str, str]:
+    """hash -> query for every GraphQL template literal in the given JS files."""
+    found = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        for match in OPERATION_RE.finditer(source):
+            text = match.group(1)
+            if re.match(r"\s*(query|mutation|subscription)\b|\s*\{\s*\w", text):
+                found[query_hash(text)] = text
+    return found
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] != "extract":
+        sys.exit("usage: python -m query_manifest extract frontend/*.js")
+    manifest = extract(sys.argv[2:])
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(manifest)} operations to {MANIFEST_PATH}")
@@ -0,0 +1,159 @@
+# roster.py
+"""
+Bulk check-in: many students into one event with a fixed number of queries.
+
+`bulk_check_in` validates the event once, checks every student ID with one
+set-based `WHERE ID IN (...)` query per STUDENT_CHUNK IDs, and writes all
+valid IDs to Redis in one pipeline (`checkin_store.check_in_many`). The
+result says which students were newly checked in, which already were, and
+which failed and why.
+
+`import_roster` does the same for a streamed CSV or NDJSON body, one batch
+of IMPORT_BATCH IDs at a time. Memory stays flat for long rosters, and bad
+lines are reported with their line numbers instead of failing the upload.
+"""
+import csv
+import json
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from checkin_store import checkin_store
+from database import async_mysql_conn
+from loaders import in_placeholders
+
+STUDENT_CHUNK = 1000
+IMPORT_BATCH = 500
+
+# Column names accepted for the student ID in a CSV roster (case-insensitive)
+ID_COLUMNS = ("studentid", "student_id", "id")
+
+
+class EventNotFound(Exception):
+    pass
+
+
+class PooledQueries:
+    """
+    fetchone/fetchall that borrow a pooled connection per statement, so a
+    slowly streamed upload does not hold a connection between batches.
+    """
+
+    async def fetchone(self, sql, params=()):
+        async with async_mysql_conn() as conn:
+            return await conn.fetchone(sql, params)
+
+    async def fetchall(self, sql, params=()):
+        async with async_mysql_conn() as conn:
+            return await conn.fetchall(sql, params)
+
+
+def new_result(event_id: int) -> Dict:
+    return {"eventId": event_id, "checkedIn": [], "alreadyCheckedIn": [], "failed": []}
+
+
+async def event_exists(db, event_id: int) -> bool:
+    return await db.fetchone("SELECT ID FROM Event WHERE ID = %s", (event_id,)) is not None
+
+
+async def existing_students(db, student_ids: List[int]) -> set:
+    """The subset of `student_ids` present in Student, one query per chunk."""
+    found = set()
+    for i in range(0, len(student_ids), STUDENT_CHUNK):
+        chunk = student_ids[i:i + STUDENT_CHUNK]
+        rows = await db.fetchall(
+            f"SELECT ID FROM Student WHERE ID IN ({in_placeholders(chunk)})", chunk
+        )
+        found.update(row["ID"] for row in rows)
+    return found
+
+
+async def _check_in_batch(db, event_id: int, student_ids: Iterable[int], result: Dict) -> None:
+    student_ids = list(dict.fromkeys(student_ids))
+    if not student_ids:
+        return
+    known = await existing_students(db, student_ids)
+    valid = []
+    for sid in student_ids:
+        if sid in known:
+            valid.append(sid)
+        else:
+            result["failed"].append({"studentId": sid, "reason": "student not found"})
+
+    added = await checkin_store.check_in_many(event_id, valid)
+    for sid, is_new in zip(valid, added):
+        result["checkedIn" if is_new else "alreadyCheckedIn"].append(sid)
+
+
+async def bulk_check_in(db, event_id: int, student_ids: Iterable[int]) -> Dict:
+    """Check in many students at once. Raises EventNotFound for an unknown event."""
+    if not await event_exists(db, event_id):
+        raise EventNotFound(f"Event {event_id} not found")
+    result = new_result(event_id)
+    await _check_in_batch(db, event_id, student_ids, result)
+    return result
+
+
+# ---------- Streaming roster import ----------
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+def _ndjson_id(line: str) -> int:
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = next(value[k] for k in value if k.lower() in ID_COLUMNS)
+    return int(value)
+
+
+async def import_roster(
+        db,
+        event_id: int,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+) -> Dict:
+    """
+    Check in every student listed in a CSV (header row with a studentID/id
+    column, or a bare list of IDs) or NDJSON (`{"studentId": 1}` or `1`
+    per line) body.
+    """
+    if not await event_exists(db, event_id):
+        raise EventNotFound(f"Event {event_id} not found")
+
+    ndjson = bool(content_type) and "json" in content_type
+    result = new_result(event_id)
+    batch: List[int] = []
+    id_column: Optional[int] = None
+    line_no = 0
+
+    async for line in _lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            if ndjson:
+                batch.append(_ndjson_id(line))
+            else:
+                cells = next(csv.reader([line]))
+                if line_no == 1 and not cells[0].strip().isdigit():
+                    names = [c.strip().lower() for c in cells]
+                    id_column = next((names.index(n) for n in ID_COLUMNS if n in names), 0)
+                    continue
+                batch.append(int(cells[id_column or 0]))
+        except (ValueError, IndexError, StopIteration, TypeError):
+            result["failed"].append({"line": line_no, "reason": f"unreadable line: {line[:80]!r}"})
+            continue
+
+        if len(batch) >= IMPORT_BATCH:
+            await _check_in_batch(db, event_id, batch, result)
+            batch = []
+
+    await _check_in_batch(db, event_id, batch, result)
+    return result
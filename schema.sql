@@ -24,7 +24,8 @@ CREATE TABLE Leader(
 CREATE TABLE Volunteer(
     ID INT AUTO_INCREMENT PRIMARY KEY,
     firstName VARCHAR(60),
-    lastName VARCHAR(60)
+    lastName VARCHAR(60),
+    INDEX idx_volunteer_first_name (firstName, ID)
 );
 
 CREATE TABLE AGroup(
@@ -43,7 +44,8 @@ CREATE TABLE Student(
     guardianID INT,
     firstName VARCHAR(60),
     lastName VARCHAR(60),
-    FOREIGN KEY (guardianID) REFERENCES Guardian(ID)
+    FOREIGN KEY (guardianID) REFERENCES Guardian(ID),
+    INDEX idx_student_first_name (firstName, ID)
 );
 
 
@@ -53,7 +55,8 @@ CREATE TABLE GroupMember(
     studentID INT,
     FOREIGN KEY (groupID) REFERENCES AGroup(ID),
     FOREIGN KEY (studentID) REFERENCES Student(ID),
-    UNIQUE (groupID, studentID)
+    UNIQUE (groupID, studentID),
+    INDEX idx_group_member_student (studentID, groupID)
 );
 
 CREATE TABLE EventLeader(
@@ -61,7 +64,8 @@ CREATE TABLE EventLeader(
     leaderID INT,
     eventID INT,
     FOREIGN KEY (leaderID) REFERENCES Leader(ID),
-    FOREIGN KEY (eventID) REFERENCES Event(ID)
+    FOREIGN KEY (eventID) REFERENCES Event(ID),
+    INDEX idx_event_leader_event (eventID, leaderID)
 );
 
 CREATE TABLE AttendanceRecord(
@@ -70,7 +74,8 @@ CREATE TABLE AttendanceRecord(
     theDATE DATE,
     theTime TIME,
     RSVP VARCHAR(10),
-    FOREIGN KEY (eventID) REFERENCES Event(ID)
+    FOREIGN KEY (eventID) REFERENCES Event(ID),
+    INDEX idx_attendance_record_event (eventID, theDATE)
 );
 
 CREATE TABLE VolunteerRecord(
@@ -78,7 +83,9 @@ CREATE TABLE VolunteerRecord(
     volunteerID INT,
     eventID INT,
     FOREIGN KEY (volunteerID) REFERENCES Volunteer(ID),
-    FOREIGN KEY (eventID) REFERENCES Event(ID)
+    FOREIGN KEY (eventID) REFERENCES Event(ID),
+    CONSTRAINT uq_volunteer_record UNIQUE (volunteerID, eventID),
+    INDEX idx_volunteer_record_event (eventID, ID)
 );
 
 CREATE TABLE GroupLeader(
@@ -87,7 +94,8 @@ CREATE TABLE GroupLeader(
     leaderID INT,
     FOREIGN KEY (groupID) REFERENCES AGroup(ID),
     FOREIGN KEY (leaderID) REFERENCES Leader(ID),
-    UNIQUE (groupID, leaderID)
+    UNIQUE (groupID, leaderID),
+    INDEX idx_group_leader_leader (leaderID, groupID)
 );
 
 CREATE TABLE AttendanceStudent(
@@ -96,6 +104,77 @@ CREATE TABLE AttendanceStudent(
     studentID INT,
     theDATE DATE,
     theTime TIME,
+    -- theTime in seconds, -1 for NULL: the NULL-safe history sort key
+    timeKey INT AS (COALESCE(TIME_TO_SEC(theTime), -1)) VIRTUAL NOT NULL,
     FOREIGN KEY (eventID) REFERENCES Event(ID),
-    FOREIGN KEY (studentID) REFERENCES Student(ID)
+    FOREIGN KEY (studentID) REFERENCES Student(ID),
+    CONSTRAINT uq_attendance_student_event_day UNIQUE (eventID, studentID, theDATE),
+    INDEX idx_attendance_student_timeline (studentID, theDATE, timeKey, ID)
+);
+
+-- Attendance rollups (analytics.py), keyed for dashboard lookups
+CREATE TABLE EventAttendanceDaily(
+    eventID INT NOT NULL,
+    theDATE DATE NOT NULL,
+    attendees INT NOT NULL,
+    firstCheckIn TIME,
+    lastCheckIn TIME,
+    PRIMARY KEY (eventID, theDATE),
+    INDEX idx_event_attendance_date (theDATE)
+);
+
+CREATE TABLE GroupAttendanceDaily(
+    groupID INT NOT NULL,
+    eventID INT NOT NULL,
+    theDATE DATE NOT NULL,
+    attended INT NOT NULL,
+    members INT NOT NULL,
+    PRIMARY KEY (groupID, eventID, theDATE),
+    INDEX idx_group_attendance_event (eventID, theDATE)
+);
+
+CREATE TABLE StudentAttendanceStats(
+    studentID INT PRIMARY KEY,
+    totalAttended INT NOT NULL,
+    firstSeen DATE NOT NULL,
+    lastSeen DATE NOT NULL,
+    lastEventID INT,
+    lastWeek INT NOT NULL,
+    currentStreak INT NOT NULL,
+    longestStreak INT NOT NULL
+);
+
+-- Cleanup of Mongo/Redis data queued by deletes (outbox.py)
+CREATE TABLE CleanupOutbox(
+    ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(40) NOT NULL,
+    payload JSON NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    lastError VARCHAR(500),
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    availableAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_cleanup_outbox_due (availableAt, ID)
+);
+
+-- Cold-storage index of archived attendance segments (archive.py)
+CREATE TABLE AttendanceArchiveSegment(
+    ID INT AUTO_INCREMENT PRIMARY KEY,
+    dataset VARCHAR(40) NOT NULL,
+    eventID INT NOT NULL,
+    year SMALLINT NOT NULL,
+    path VARCHAR(255) NOT NULL,
+    rowCount INT NOT NULL,
+    minDate DATE NOT NULL,
+    maxDate DATE NOT NULL,
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_archive_segment_path UNIQUE (path),
+    INDEX idx_archive_segment_event (eventID, dataset, minDate)
+);
+
+CREATE TABLE AttendanceArchiveStudent(
+    segmentID INT NOT NULL,
+    studentID INT NOT NULL,
+    rowCount INT NOT NULL,
+    PRIMARY KEY (studentID, segmentID),
+    INDEX idx_archive_student_segment (segmentID)
 );
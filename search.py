@@ -0,0 +1,296 @@
+# search.py
+"""
+Search across people (students, guardians, volunteers, leaders) and notes.
+
+Names live in a Redis prefix index: one sorted set per kind
+(`search:names:student`, ...), every member scored 0, so Redis keeps the
+members in lexicographic order. Each person gets one
+member per rotation of their normalized name ("ana maria lopez", "maria
+lopez ana", "lopez ana maria"), so a query matches the start of any first,
+middle or last name. The member also carries the kind, ID and display
+name:
+
+    lopez ana maria \\x00 student \\x00 42 \\x00 Ana Maria Lopez
+
+A lookup reads the range [query, query + U+10FFFF] of each requested
+kind's set with ZRANGEBYLEX, page by page, costing O(log N + hits read)
+no matter how large the roster is. Nothing is loaded from MySQL.
+Whole-word matches sort first in the range (a space, or the end of the
+term, sorts before any letter), so paging stops once `limit` people are
+found and every whole-word match has been read, or after SCAN_MAX
+members. Whole-word matches are therefore always ranked against each
+other; partial matches are ranked among those read. The members written
+for each person are also stored in the `search:names:docs` hash, so an
+update or delete can remove exactly them.
+
+The student and volunteer mutations keep the index current through
+`after_commit`, and deletes of any kind remove people through the
+cleanup outbox. The app has no mutations for guardians and leaders:
+they are loaded into MySQL directly, so run `python -m search rebuild`
+afterwards (`ensure_built` only fills a missing index at startup).
+
+Notes use the Mongo text indexes declared in `database.MONGO_INDEXES`
+(meeting_notes.content; event_notes.note and tags), ranked by textScore.
+Mongo keeps those indexes up to date on every insert by itself.
+"""
+import asyncio
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from database import async_mysql_conn, close_async_connections, get_async_mongo_db, get_async_redis
+from metrics import track
+from tenants import selected, tenant_key, use_tenant
+
+INDEX_KEY = "search:names"  # one sorted set per kind: search:names:<kind>
+DOCS_KEY = "search:names:docs"
+BUILD_LOCK_KEY = "search:names:building"
+SEP = "\x00"
+# Sorts after any UTF-8 encoded character: closes the [prefix, prefix + LEX_MAX] range
+LEX_MAX = "\U0010ffff"
+REBUILD_BATCH = 1000
+MAX_LIMIT = 50
+# Members read per ZRANGEBYLEX page, and at most per kind and query
+SCAN_PAGE = 200
+SCAN_MAX = 2000
+
+# Person kinds and the table each is indexed from
+PEOPLE = {
+    "student": "SELECT ID AS id, firstName, lastName FROM Student",
+    "guardian": "SELECT ID AS id, firstName, lastName FROM Guardian",
+    "volunteer": "SELECT ID AS id, firstName, lastName FROM Volunteer",
+    "leader": "SELECT ID AS id, firstName, lastName FROM Leader",
+}
+NOTE_KINDS = ("meeting_note", "event_note")  # see NOTE_SOURCES
+KINDS = tuple(PEOPLE) + NOTE_KINDS
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(re.sub(r"[^\w\s'-]", " ", text).split())
+
+
+def display_name(first: Optional[str], last: Optional[str]) -> str:
+    return " ".join(part for part in (first, last) if part)
+
+
+def name_terms(name: str) -> List[str]:
+    """Every rotation of the name's tokens, so each token can start a match."""
+    tokens = normalize(name).split()
+    return list(dict.fromkeys(" ".join(tokens[i:] + tokens[:i]) for i in range(len(tokens))))
+
+
+def _members(kind: str, person_id: int, name: str) -> List[str]:
+    return [SEP.join((term, kind, str(person_id), name)) for term in name_terms(name)]
+
+
+def index_key(kind: str) -> str:
+    return tenant_key(f"{INDEX_KEY}:{kind}")
+
+
+def whole_word(term: str, prefix: str) -> bool:
+    return term == prefix or term.startswith(prefix + " ")
+
+
+def match_score(term: str, prefix: str, name: str) -> float:
+    """Whole-word matches beat partial ones; matches on the first name
+    (the unrotated term) beat later names; shorter names rank higher."""
+    score = len(prefix) / len(term)
+    if whole_word(term, prefix):
+        score += 1.0
+    if term == normalize(name):
+        score += 0.5
+    return score
+
+
+class NameIndex:
+    """Redis prefix index over people's names."""
+
+    async def index(self, kind: str, person_id: int, first: Optional[str], last: Optional[str]) -> None:
+        """Add a person or replace their previous entry."""
+        redis = get_async_redis()
+        doc_id = f"{kind}:{person_id}"
+        name = display_name(first, last)
+        members = _members(kind, person_id, name)
+        old = await redis.hget(tenant_key(DOCS_KEY), doc_id)
+        pipe = redis.pipeline(transaction=True)
+        if old:
+            pipe.zrem(index_key(kind), *json.loads(old))
+        if members:
+            pipe.zadd(index_key(kind), {m: 0 for m in members})
+            pipe.hset(tenant_key(DOCS_KEY), doc_id, json.dumps(members))
+        else:
+            pipe.hdel(tenant_key(DOCS_KEY), doc_id)
+        await pipe.execute()
+
+    async def remove(self, kind: str, person_id: int) -> None:
+        redis = get_async_redis()
+        doc_id = f"{kind}:{person_id}"
+        old = await redis.hget(tenant_key(DOCS_KEY), doc_id)
+        if not old:
+            return
+        pipe = redis.pipeline(transaction=True)
+        pipe.zrem(index_key(kind), *json.loads(old))
+        pipe.hdel(tenant_key(DOCS_KEY), doc_id)
+        await pipe.execute()
+
+    async def search(self, query: str, kinds: Iterable[str], limit: int) -> List[dict]:
+        """People whose name has a token starting with `query`, best matches first."""
+        prefix = normalize(query)
+        kinds = [kind for kind in PEOPLE if kind in set(kinds)]
+        if not prefix or not kinds:
+            return []
+        found = await asyncio.gather(*(self._search_kind(kind, prefix, limit) for kind in kinds))
+        hits = [hit for group in found for hit in group]
+        return sorted(hits, key=lambda hit: (-hit["score"], hit["title"]))[:limit]
+
+    async def _search_kind(self, kind: str, prefix: str, limit: int) -> List[dict]:
+        redis = get_async_redis()
+        best: Dict[str, dict] = {}
+        low, scanned = f"[{prefix}", 0
+        while scanned < SCAN_MAX:
+            page = await redis.zrangebylex(index_key(kind), low, f"[{prefix}{LEX_MAX}", start=0, num=SCAN_PAGE)
+            for member in page:
+                term, _, person_id, name = member.split(SEP, 3)
+                score = round(match_score(term, prefix, name), 4)
+                if person_id not in best or score > best[person_id]["score"]:
+                    best[person_id] = {"kind": kind, "id": person_id, "title": name, "snippet": None,
+                                       "eventId": None, "score": score}
+            scanned += len(page)
+            if len(page) < SCAN_PAGE:
+                break
+            # Past the whole-word matches, the rest only compete on length
+            if len(best) >= limit and not whole_word(page[-1].split(SEP, 1)[0], prefix):
+                break
+            low = f"({page[-1]}"
+        return list(best.values())
+
+    async def rebuild(self) -> int:
+        """Re-index every person from MySQL into fresh keys, then swap them in."""
+        redis = get_async_redis()
+        tmp_docs = tenant_key(f"{DOCS_KEY}:rebuild")
+        tmp_indexes = {kind: f"{index_key(kind)}:rebuild" for kind in PEOPLE}
+        await redis.delete(tmp_docs, *tmp_indexes.values())
+        count = 0
+        async with async_mysql_conn() as conn:
+            for kind, sql in PEOPLE.items():
+                tmp_index = tmp_indexes[kind]
+                rows = await conn.fetchall(sql)
+                for i in range(0, len(rows), REBUILD_BATCH):
+                    pipe = redis.pipeline(transaction=False)
+                    for row in rows[i:i + REBUILD_BATCH]:
+                        name = display_name(row["firstName"], row["lastName"])
+                        members = _members(kind, row["id"], name)
+                        if members:
+                            pipe.zadd(tmp_index, {m: 0 for m in members})
+                            pipe.hset(tmp_docs, f"{kind}:{row['id']}", json.dumps(members))
+                            count += 1
+                    await pipe.execute()
+
+        built = [kind for kind in PEOPLE if await redis.exists(tmp_indexes[kind])]
+        pipe = redis.pipeline(transaction=True)
+        # INDEX_KEY itself is the single set of earlier versions
+        pipe.delete(tenant_key(INDEX_KEY), tenant_key(DOCS_KEY), *(index_key(kind) for kind in PEOPLE))
+        for kind in built:
+            pipe.rename(tmp_indexes[kind], index_key(kind))
+        if count:
+            pipe.rename(tmp_docs, tenant_key(DOCS_KEY))
+        await pipe.execute()
+        return count
+
+    async def ensure_built(self) -> None:
+        """Build the index if it does not exist yet (one process at a time)."""
+        redis = get_async_redis()
+        if await redis.exists(*(index_key(kind) for kind in PEOPLE)):
+            return
+        if not await redis.set(tenant_key(BUILD_LOCK_KEY), "1", nx=True, ex=300):
+            return
+        try:
+            count = await self.rebuild()
+            print(f"Search index built: {count} people")
+        finally:
+            await redis.delete(tenant_key(BUILD_LOCK_KEY))
+
+
+name_index = NameIndex()
+
+
+# ---------- Notes (Mongo text indexes) ----------
+
+def _snippet(text: Optional[str], length: int = 160) -> Optional[str]:
+    if not text:
+        return None
+    return text if len(text) <= length else text[:length].rsplit(" ", 1)[0] + "…"
+
+
+async def _text_search(collection: str, query: str, projection: dict, limit: int) -> List[dict]:
+    score = {"$meta": "textScore"}
+    cursor = (
+        get_async_mongo_db()[collection]
+        .find({"$text": {"$search": query}}, {**projection, "score": score})
+        .sort([("score", score)])
+        .limit(limit)
+    )
+    with track("mongo"):
+        return await cursor.to_list(length=None)
+
+
+# kind -> (collection, text field, event ID field)
+NOTE_SOURCES = {
+    "meeting_note": ("meeting_notes", "content", "eventId"),
+    "event_note": ("event_notes", "note", "mysql_event_id"),
+}
+
+
+async def _note_hits(kind: str, query: str, limit: int) -> List[dict]:
+    collection, text_field, event_field = NOTE_SOURCES[kind]
+    docs = await _text_search(collection, query, {text_field: 1, event_field: 1}, limit)
+    return [{
+        "kind": kind,
+        "id": str(doc["_id"]),
+        "title": _snippet(doc.get(text_field), 60) or "",
+        "snippet": _snippet(doc.get(text_field)),
+        "eventId": doc.get(event_field),
+        # textScore is unbounded; squash it into [0, 1) next to name scores
+        "score": round(doc["score"] / (1 + doc["score"]), 4),
+    } for doc in docs]
+
+
+async def search_notes(query: str, kinds: Iterable[str], limit: int) -> List[dict]:
+    """Meeting and event notes matching `query`, ranked by Mongo's textScore."""
+    kinds = set(kinds)
+    if not query.strip():
+        return []
+    found = await asyncio.gather(*(_note_hits(kind, query, limit) for kind in NOTE_SOURCES if kind in kinds))
+    hits = [hit for group in found for hit in group]
+    return sorted(hits, key=lambda hit: -hit["score"])[:limit]
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or 20, MAX_LIMIT))
+
+
+def split_kinds(kinds: Optional[Sequence[str]]):
+    """(person kinds, note kinds) to search; all of them when `kinds` is empty."""
+    wanted = set(kinds or KINDS)
+    return [k for k in PEOPLE if k in wanted], [k for k in NOTE_KINDS if k in wanted]
+
+
+async def main() -> None:
+    try:
+        for tenant in selected():
+            with use_tenant(tenant):
+                print(f"{tenant.id}: search index rebuilt, {await name_index.rebuild()} people")
+    finally:
+        await close_async_connections()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m search rebuild")
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+# static_assets.py
+"""
+In-memory, precompressed serving of the frontend/ directory.
+
+Every file is read once at startup, fingerprinted with a SHA-256 of its
+content, and compressed ahead of time with gzip and, if the optional
+`brotli` package is installed, brotli. A request only picks the best
+variant for its Accept-Encoding and writes bytes from memory. Nothing is
+read from disk per request.
+
+    /assets/app.3f2a9c1b7d4e.js   fingerprinted: Cache-Control immutable, one year
+    /app.js, /index.html, /       stable names: no-cache, revalidated by ETag
+
+The HTML pages are rewritten at load time to reference the fingerprinted
+script and stylesheet URLs. Browsers therefore revalidate only the small
+HTML page (a 304 when unchanged) and take everything else from their cache
+until a deploy changes the fingerprint. Each variant has its own strong
+ETag, and `If-None-Match` is answered with 304 Not Modified.
+
+Changes to frontend/ are picked up on restart.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+ASSET_PREFIX = "/assets/"
+INDEX_PAGE = "leader-login.html"
+# Below this size compression does not pay for its headers
+MIN_COMPRESS_SIZE = 512
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class Asset:
+    """One file with its precompressed variants (encoding -> bytes)."""
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type == "application/javascript":
+            self.media_type += "; charset=utf-8"
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.fingerprinted = f"{stem}.{self.digest}{ext}"
+
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(body, quality=11)
+            for encoding, data in compressed.items():
+                if len(data) < len(body):
+                    self.variants[encoding] = data
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(asset: Asset, accept_encoding: Optional[str]) -> str:
+    accepted = _accepted(accept_encoding or "")
+    for encoding in ("br", "gzip"):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in asset.variants and q > 0:
+            return encoding
+    return "identity"
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags
+
+
+class StaticAssets:
+    def __init__(self, directory: str = FRONTEND_DIR):
+        self.directory = directory
+        self.assets: Dict[str, Asset] = {}
+        self.fingerprinted: Dict[str, Asset] = {}
+
+    def load(self) -> None:
+        files = sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name)) and not name.startswith(".")
+        )
+        # Scripts and styles first: the pages embed their fingerprinted names
+        pages = [name for name in files if name.endswith(".html")]
+        for name in [n for n in files if n not in pages] + pages:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                body = f.read()
+            if name in pages:
+                body = self._link_fingerprints(body)
+            asset = Asset(name, body)
+            self.assets[name] = asset
+            self.fingerprinted[asset.fingerprinted] = asset
+        sizes = sum(len(a.variants["identity"]) for a in self.assets.values())
+        print(f"Static assets: {len(self.assets)} files, {sizes} bytes, brotli={'on' if brotli else 'off'}")
+
+    def _link_fingerprints(self, html: bytes) -> bytes:
+        """Point src/href attributes at the fingerprinted URLs."""
+        def replace(match):
+            asset = self.assets.get(match.group(2))
+            if asset is None or asset.name.endswith(".html"):
+                # Pages keep their stable names (links between pages)
+                return match.group(0)
+            return f'{match.group(1)}="{ASSET_PREFIX}{asset.fingerprinted}"'
+
+        return re.sub(r'\b(src|href)="([^"/:]+)"', replace, html.decode("utf-8")).encode("utf-8")
+
+    def respond(self, request: Request, asset: Asset, cache_control: str) -> Response:
+        encoding = choose_encoding(asset, request.headers.get("accept-encoding"))
+        etag = asset.etag(encoding)
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if not_modified(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+static_assets = StaticAssets()
+static_assets.load()
+
+router = APIRouter()
+
+
+@router.api_route(ASSET_PREFIX + "{name}", methods=["GET", "HEAD"], include_in_schema=False)
+async def fingerprinted_asset(name: str, request: Request):
+    asset = static_assets.fingerprinted.get(name)
+    if asset is None:
+        return Response(status_code=404)
+    return static_assets.respond(request, asset, IMMUTABLE)
+
+
+def _stable_route(path: str, name: str):
+    async def serve(request: Request):
+        return static_assets.respond(request, static_assets.assets[name], REVALIDATE)
+
+    router.add_api_route(path, serve, methods=["GET", "HEAD"], include_in_schema=False)
+
+
+_stable_route("/", INDEX_PAGE)
+for _name in static_assets.assets:
+    _stable_route(f"/{_name}", _name)
@@ -0,0 +1,215 @@
+# tenants.py
+"""
+Tenants: one deployment serving many churches.
+
+Every church (tenant) has its own MySQL schema and Mongo database, and a
+prefix for its Redis keys. All of them share one process and one set of
+pools: a pooled MySQL connection is switched to the tenant's schema when
+it is borrowed (COM_INIT_DB, only when it last served another tenant),
+so fifty churches cost one pool instead of fifty containers. Per-tenant
+pool quotas (database.py) keep one large church from holding every
+connection.
+
+The tenant of a request comes from its host name: grace.youth.example.org
+with TENANT_HOST_SUFFIX=.youth.example.org, or a host listed for the
+tenant in the tenants file. DEFAULT_TENANT, if set, serves requests for
+any other host.
+
+The X-Tenant-ID header (TENANT_HEADER) is set by the client and proves
+nothing, so it only selects a tenant when TRUST_TENANT_HEADER=1, for
+deployments behind a proxy that sets it and strips it from client
+requests. Otherwise a header naming another tenant than the host is
+rejected, and one naming the host's own tenant is ignored.
+
+`TenantMiddleware` sets `current()` for the request; an unknown tenant is
+answered with 404 before any data is touched. Code outside a request
+(workers, CLIs) runs `with use_tenant(t):` for each tenant it serves.
+
+Tenants are configured by TENANTS_FILE (default tenants.json):
+
+    {"grace": {"db": "youth_grace", "mongoDb": "youth_grace", "poolQuota": 8,
+               "hosts": ["youth.gracechurch.org"]},
+     "hope": {}}
+
+or by TENANTS=grace,hope, with TENANT_DB_TEMPLATE (default "youth_{tenant}")
+and TENANT_MONGO_TEMPLATE (default "youth_ministry_{tenant}") naming the
+databases. With neither, the deployment is single-tenant: one "default"
+tenant on DB_NAME / MONGO_DB_NAME with unprefixed Redis keys, exactly as
+before. In multi-tenant mode Redis keys are prefixed with "t:<tenant>:".
+
+Each tenant schema is created from schema.sql and migrated with
+`python migrate.py up` (all tenants, or --tenant NAME).
+"""
+import json
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+TENANTS_FILE = os.getenv(
+    "TENANTS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants.json")
+)
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant-ID").lower().encode("latin-1")
+HOST_SUFFIX = os.getenv("TENANT_HOST_SUFFIX", "")
+# Only behind a proxy that sets TENANT_HEADER itself and drops the client's
+TRUST_HEADER = os.getenv("TRUST_TENANT_HEADER", "0") == "1"
+DB_TEMPLATE = os.getenv("TENANT_DB_TEMPLATE", "youth_{tenant}")
+MONGO_TEMPLATE = os.getenv("TENANT_MONGO_TEMPLATE", "youth_ministry_{tenant}")
+TENANT_ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+
+
+class UnknownTenant(LookupError):
+    """No tenant could be resolved, or the one named is not configured."""
+
+
+class Tenant:
+    def __init__(
+            self,
+            tenant_id: str,
+            db: str,
+            mongo_db: str,
+            redis_prefix: str,
+            pool_quota: Optional[int] = None,
+            hosts: Optional[List[str]] = None,
+    ):
+        self.id = tenant_id
+        self.db = db
+        self.mongo_db = mongo_db
+        self.redis_prefix = redis_prefix
+        self.pool_quota = pool_quota    # None: database.TENANT_POOL_QUOTA
+        self.hosts = [h.lower() for h in hosts or []]
+
+    def __repr__(self) -> str:
+        return f"Tenant({self.id!r})"
+
+
+def _load() -> Dict[str, Tenant]:
+    config = None
+    if os.path.exists(TENANTS_FILE):
+        with open(TENANTS_FILE) as f:
+            config = json.load(f)
+    elif os.getenv("TENANTS"):
+        config = {name.strip(): {} for name in os.environ["TENANTS"].split(",") if name.strip()}
+    if not config:
+        default = Tenant(
+            "default",
+            os.getenv("DB_NAME", "youth_db"),
+            os.getenv("MONGO_DB_NAME", "youth_ministry"),
+            redis_prefix="",
+        )
+        return {default.id: default}
+
+    tenants = {}
+    for tenant_id, options in config.items():
+        if not TENANT_ID_RE.match(tenant_id):
+            raise ValueError(f"Invalid tenant id {tenant_id!r} (lowercase letters, digits, - and _)")
+        tenants[tenant_id] = Tenant(
+            tenant_id,
+            options.get("db") or DB_TEMPLATE.format(tenant=tenant_id.replace("-", "_")),
+            options.get("mongoDb") or MONGO_TEMPLATE.format(tenant=tenant_id.replace("-", "_")),
+            redis_prefix=f"t:{tenant_id}:",
+            pool_quota=options.get("poolQuota"),
+            hosts=options.get("hosts"),
+        )
+    return tenants
+
+
+TENANTS = _load()
+MULTI_TENANT = list(TENANTS) != ["default"]
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT") or (None if MULTI_TENANT else "default")
+_BY_HOST = {host: tenant for tenant in TENANTS.values() for host in tenant.hosts}
+
+_current: ContextVar[Optional[Tenant]] = ContextVar("tenant", default=None)
+
+
+def get(tenant_id: str) -> Tenant:
+    try:
+        return TENANTS[tenant_id]
+    except KeyError:
+        raise UnknownTenant(f"Unknown tenant '{tenant_id}'")
+
+
+def all_tenants() -> List[Tenant]:
+    return list(TENANTS.values())
+
+
+def current() -> Tenant:
+    """The tenant of the running request or `use_tenant` block."""
+    tenant = _current.get()
+    if tenant is not None:
+        return tenant
+    if DEFAULT_TENANT is not None:
+        return get(DEFAULT_TENANT)
+    raise UnknownTenant("No tenant selected for this request")
+
+
+@contextmanager
+def use_tenant(tenant: Tenant) -> Iterator[Tenant]:
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+def tenant_key(key: str) -> str:
+    """A Redis key in the current tenant's namespace."""
+    return current().redis_prefix + key
+
+
+def selected(tenant_id: Optional[str] = None) -> List[Tenant]:
+    """Tenants a CLI should work on: the one named (or TENANT), else all of them."""
+    tenant_id = tenant_id or os.getenv("TENANT")
+    return [get(tenant_id)] if tenant_id else all_tenants()
+
+
+# ---------- Request routing ----------
+
+def resolve(headers: Dict[bytes, bytes]) -> Optional[Tenant]:
+    """The tenant of a request (by host, see above), None if it names none."""
+    named = headers.get(TENANT_HEADER, b"").decode("latin-1").strip().lower()
+    if named and TRUST_HEADER:
+        return get(named)
+    host = headers.get(b"host", b"").decode("latin-1").split(":", 1)[0].lower()
+    tenant = None
+    if host in _BY_HOST:
+        tenant = _BY_HOST[host]
+    elif HOST_SUFFIX and host.endswith(HOST_SUFFIX):
+        tenant = get(host[:-len(HOST_SUFFIX)])
+    if named:
+        host_tenant = tenant or (get(DEFAULT_TENANT) if DEFAULT_TENANT else None)
+        if host_tenant is None or host_tenant.id != named:
+            raise UnknownTenant(f"{TENANT_HEADER.decode()} does not match the tenant of this host")
+    return tenant
+
+
+class TenantMiddleware:
+    """ASGI middleware that selects the request's tenant (404 for unknown or mismatched tenants)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        try:
+            tenant = resolve(dict(scope["headers"]))
+        except UnknownTenant as e:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 4404})
+                return
+            body = json.dumps({"detail": str(e)}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 404,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        if tenant is None:
+            await self.app(scope, receive, send)
+            return
+        with use_tenant(tenant):
+            await self.app(scope, receive, send)
@@ -0,0 +1,79 @@
+# tests/conftest.py
+"""
+Shared test setup. The modules under test read their configuration from
+the environment at import time, so placeholder secrets are set before any
+of them is imported; no test opens a real database connection.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+for name, value in {
+    "MYSQL_PASSWORD": "test",
+    "MONGO_URI": "mongodb://127.0.0.1:1",
+    "REDIS_PASSWORD": "test",
+    "REDIS_HOST": "127.0.0.1",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+class FakeDb:
+    """
+    Stand-in for an async MySQL connection (database.AsyncConnection API).
+    Every statement is recorded in `calls` as (method, sql, params) with the
+    SQL whitespace collapsed. Reads are answered by `answer(sql, params)`,
+    a list of row dicts; writes report `affect(sql, params)` rows. Tests
+    pass `answer` or subclass for anything more stateful. Transaction and
+    close calls are recorded as ("begin", None, None) and so on.
+    """
+
+    def __init__(self, answer=None):
+        if answer is not None:
+            self.answer = answer
+        self.calls = []
+        self.broken = False
+        self.lastrowid = None
+
+    def answer(self, sql, params):
+        return []
+
+    def affect(self, sql, params):
+        return 1
+
+    def _record(self, method, sql, params):
+        sql = " ".join(sql.split())
+        self.calls.append((method, sql, params))
+        return sql
+
+    def statements(self, method=None):
+        return [sql for m, sql, _ in self.calls if method in (None, m)]
+
+    async def fetchall(self, sql, params=()):
+        params = list(params)
+        return [dict(row) for row in self.answer(self._record("fetchall", sql, params), params)]
+
+    async def fetchone(self, sql, params=()):
+        params = list(params)
+        rows = self.answer(self._record("fetchone", sql, params), params)
+        return dict(rows[0]) if rows else None
+
+    async def execute(self, sql, params=()):
+        params = list(params)
+        return self.affect(self._record("execute", sql, params), params)
+
+    async def executemany(self, sql, rows):
+        self._record("executemany", sql, [tuple(row) for row in rows])
+
+    async def begin(self):
+        self.calls.append(("begin", None, None))
+
+    async def commit(self):
+        self.calls.append(("commit", None, None))
+
+    async def rollback(self):
+        self.calls.append(("rollback", None, None))
+
+    async def close(self):
+        self.calls.append(("close", None, None))
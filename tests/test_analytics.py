@@ -0,0 +1,113 @@
+# tests/test_analytics.py
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+import analytics
+from analytics import current_streak, student_stats, update_rollups, week_of
+from conftest import FakeDb
+
+
+def stats_db(last_weeks=(), history=()):
+    """Answers the StudentAttendanceStats and history reads; there are no archived segments."""
+    last_weeks = dict(last_weeks)
+
+    def answer(sql, params):
+        if "FROM StudentAttendanceStats" in sql:
+            return [{"studentID": sid, "lastWeek": last_weeks[sid]} for sid in params if sid in last_weeks]
+        if "FROM AttendanceStudent" in sql:
+            return [row for row in history if row["studentID"] in params]
+        return []
+
+    return FakeDb(answer)
+
+
+def upserts(conn):
+    return [row for method, _, rows in conn.calls if method == "executemany" for row in rows]
+
+
+def row(day, event_id=1, student_id=1):
+    return {"studentID": student_id, "eventID": event_id, "theDATE": day}
+
+
+@pytest.fixture
+def today(monkeypatch):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return cls(2024, 5, 15)   # a Wednesday
+
+    monkeypatch.setattr(analytics, "date", FixedDate)
+    return FixedDate.today()
+
+
+def test_week_of_matches_mysql_week_expression():
+    # WEEK_SQL relies on TO_DAYS('2024-01-01') % 7 == 2, and TO_DAYS() == toordinal() + 365
+    assert (date(2024, 1, 1).toordinal() + 365) % 7 == 2
+
+
+def test_weeks_start_on_monday():
+    monday = date(2024, 1, 1)
+    assert week_of(monday) == week_of(monday + timedelta(days=6))
+    assert week_of(monday - timedelta(days=1)) == week_of(monday) - 1
+    assert week_of(monday + timedelta(days=7)) == week_of(monday) + 1
+
+
+def test_current_streak_survives_one_quiet_week(today):
+    this_week = week_of(today)
+    assert current_streak(this_week, 4) == 4
+    assert current_streak(this_week - 1, 4) == 4
+    assert current_streak(this_week - 2, 4) == 0
+
+
+def test_student_stats_counts_runs_of_consecutive_weeks():
+    rows = [
+        row("2024-01-01"), row("2024-01-03", event_id=2),      # week A, twice
+        row("2024-01-08"), row("2024-01-15"),                  # A+1, A+2
+        row("2024-02-05"),                                     # gap
+        row(date(2024, 2, 12), event_id=9),                    # next week, date object
+    ]
+    stats = student_stats(1, rows)
+    assert stats == (1, 6, "2024-01-01", date(2024, 2, 12), 9, week_of(date(2024, 2, 12)), 2, 3)
+
+
+def test_student_stats_single_row():
+    assert student_stats(5, [row("2024-03-04")])[-2:] == (1, 1)
+
+
+def test_update_rollups_is_incremental_for_new_weeks():
+    conn = stats_db(last_weeks={1: week_of(date(2024, 1, 1))})
+    asyncio.run(update_rollups(conn, [(7, 1, "2024-01-08", "18:00:00"), (7, 2, "2024-01-08", None)]))
+
+    assert sum("INSERT INTO EventAttendanceDaily" in sql for sql in conn.statements("execute")) == 1
+    increments = [(sql, params) for method, sql, params in conn.calls
+                  if method == "execute" and "StudentAttendanceStats" in sql]
+    assert len(increments) == 1
+    assert increments[0][1] == [1, 2]
+    assert "MAX(a.theDATE)" in increments[0][0]
+    assert upserts(conn) == []
+
+
+def test_update_rollups_recomputes_backfilled_students():
+    history = [
+        {"ID": 1, "studentID": 1, "eventID": 7, "theDATE": "2024-01-01", "theTime": None},
+        {"ID": 2, "studentID": 1, "eventID": 7, "theDATE": "2024-01-15", "theTime": None},
+    ]
+    conn = stats_db(last_weeks={1: week_of(date(2024, 1, 15))}, history=history)
+    asyncio.run(update_rollups(conn, [(7, 1, "2024-01-08", None)]))   # older than the last week
+
+    assert not any("SELECT a.studentID" in sql for sql in conn.statements("execute"))
+    assert upserts(conn) == [student_stats(1, history)]
+
+
+def test_refresh_students_deletes_stats_without_history():
+    conn = stats_db()
+    asyncio.run(analytics.refresh_students(conn, [3]))
+    assert conn.calls[-1] == ("execute", "DELETE FROM StudentAttendanceStats WHERE studentID IN (%s)", [3])
+
+
+def test_update_rollups_ignores_empty_batches():
+    conn = stats_db()
+    asyncio.run(update_rollups(conn, []))
+    assert conn.calls == []
@@ -0,0 +1,128 @@
+# tests/test_archive.py
+import asyncio
+import os
+from datetime import date, time, timedelta
+
+import pytest
+
+import archive
+from archive import DATASETS, _seconds, history_key, read_segment, student_history, student_rows, write_segment
+from conftest import FakeDb
+
+COLUMNS = DATASETS["attendance_student"][1]
+ROWS = [
+    {"ID": 1, "studentID": 10, "theDATE": date(2023, 1, 1), "theTime": timedelta(hours=18)},
+    {"ID": 2, "studentID": 11, "theDATE": date(2023, 1, 1), "theTime": None},
+    {"ID": 2 ** 40, "studentID": 10, "theDATE": date(2023, 1, 8), "theTime": "18:30:05"},
+]
+
+
+@pytest.fixture
+def segment(tmp_path):
+    path = str(tmp_path / "attendance_student" / "year=2023" / "event=7" / "part-1.col")
+    write_segment(path, COLUMNS, ROWS)
+    return path
+
+
+def test_round_trip(segment):
+    assert read_segment(segment) == {
+        "ID": [1, 2, 2 ** 40],
+        "studentID": [10, 11, 10],
+        "theDATE": [date(2023, 1, 1), date(2023, 1, 1), date(2023, 1, 8)],
+        "theTime": [timedelta(hours=18), None, timedelta(hours=18, minutes=30, seconds=5)],
+    }
+    assert os.listdir(os.path.dirname(segment)) == ["part-1.col"]
+
+
+def test_string_columns_round_trip(tmp_path):
+    path = str(tmp_path / "record.col")
+    rows = [
+        {"ID": 1, "theDATE": date(2022, 5, 1), "theTime": time(9, 15), "RSVP": "yes"},
+        {"ID": 2, "theDATE": date(2022, 5, 1), "theTime": 60, "RSVP": None},
+    ]
+    write_segment(path, DATASETS["attendance_record"][1], rows)
+    assert read_segment(path, ["RSVP", "theTime"]) == {
+        "RSVP": ["yes", None],
+        "theTime": [timedelta(hours=9, minutes=15), timedelta(seconds=60)],
+    }
+
+
+def test_reads_only_requested_columns(segment):
+    assert read_segment(segment, ["studentID"]) == {"studentID": [10, 11, 10]}
+
+
+def test_empty_segment(tmp_path):
+    path = str(tmp_path / "empty.col")
+    write_segment(path, COLUMNS, [])
+    assert read_segment(path) == {"ID": [], "studentID": [], "theDATE": [], "theTime": []}
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "junk.col"
+    path.write_bytes(b"not a segment at all")
+    with pytest.raises(ValueError):
+        read_segment(str(path))
+
+
+def test_student_rows_picks_only_those_students(segment):
+    assert [row["ID"] for row in student_rows(segment, {10})] == [1, 2 ** 40]
+    assert student_rows(segment, {99}) == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, -1),
+    (0, 0),
+    (timedelta(hours=1, seconds=2), 3602),
+    (time(1, 0, 2), 3602),
+    ("01:00:02", 3602),
+    ("01:00:02.750", 3602),
+])
+def test_seconds(value, expected):
+    assert _seconds(value) == expected
+
+
+def test_history_key_orders_null_times_first_within_a_day():
+    keys = [
+        history_key(date(2023, 1, 1), timedelta(hours=9), 5),
+        history_key("2023-01-01", None, 9),
+        history_key(date(2022, 12, 31), timedelta(hours=23), 1),
+        history_key("2023-01-01", "09:00:00", "4"),
+    ]
+    assert sorted(keys) == [
+        ("2022-12-31", 82800, 1),
+        ("2023-01-01", -1, 9),
+        ("2023-01-01", 32400, 4),
+        ("2023-01-01", 32400, 5),
+    ]
+
+
+def archive_db(segments):
+    def answer(sql, params):
+        if "AttendanceArchiveSegment" in sql:
+            return segments
+        return [{"ID": event_id, "Type": f"Event {event_id}"} for event_id in params]
+
+    return FakeDb(answer)
+
+
+def segment_params(db):
+    return [params for _, sql, params in db.calls if "AttendanceArchiveSegment" in sql]
+
+
+def test_student_history_filters_by_cursor_keys(segment, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(archive, "MULTI_TENANT", False)
+    db = archive_db([{"ID": 1, "eventID": 7, "path": os.path.relpath(segment, tmp_path)}])
+
+    everything = asyncio.run(student_history(db, 10))
+    assert [row["id"] for row in everything] == [2 ** 40, 1]
+    assert everything[0]["eventName"] == "Event 7"
+    assert segment_params(db)[-1] == [10]
+
+    older = asyncio.run(student_history(db, 10, older_than=history_key("2023-01-08", "18:30:05", 2 ** 40)))
+    assert [row["id"] for row in older] == [1]
+    assert segment_params(db)[-1] == [10, "2023-01-08"]
+
+    newer = asyncio.run(student_history(db, 10, newer_than=history_key("2023-01-01", timedelta(hours=18), 1)))
+    assert [row["id"] for row in newer] == [2 ** 40]
+    assert segment_params(db)[-1] == [10, "2023-01-01"]
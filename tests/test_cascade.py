@@ -0,0 +1,173 @@
+# tests/test_cascade.py
+import asyncio
+import re
+
+import pytest
+
+import cascade
+from cascade import LOGICAL_REFERENCES, REFERENCES, SET_NULL, cascade_delete, load_graph, parse_references
+from conftest import FakeDb
+
+SCHEMA = """
+CREATE TABLE Parent (
+    ID INT PRIMARY KEY
+);
+
+CREATE TABLE Child (
+    ID INT PRIMARY KEY,
+    parentID INT,
+    otherID INT,
+    FOREIGN KEY (parentID) REFERENCES Parent(ID),
+    foreign key (otherID) references Other (ID)
+);
+"""
+
+
+class TableDb(FakeDb):
+    """In-memory tables answering the statement shapes cascade.py issues."""
+
+    STATEMENT = re.compile(
+        r"^(SELECT (?:DISTINCT )?(?P<columns>.+?) FROM|UPDATE|DELETE FROM) (?P<table>\w+)"
+        r"(?: SET (?P<set>\w+) = NULL)? WHERE (?P<column>\w+) IN \((?P<marks>[%s, ]+)\)$"
+    )
+
+    def __init__(self, **tables):
+        super().__init__()
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+
+    def _match(self, sql, params):
+        m = self.STATEMENT.match(sql)
+        assert m, sql
+        assert m["marks"].count("%s") == len(params)
+        rows = self.tables.setdefault(m["table"], [])
+        return m, rows, [row for row in rows if row.get(m["column"]) in set(params)]
+
+    def answer(self, sql, params):
+        m, _, hits = self._match(sql, params)
+        columns = [c.strip() for c in m["columns"].split(",")]
+        out = []
+        for row in hits:
+            picked = {c: row[c] for c in columns}
+            if picked not in out:
+                out.append(picked)
+        return out
+
+    def affect(self, sql, params):
+        m, rows, hits = self._match(sql, params)
+        if m["set"]:
+            for row in hits:
+                row[m["set"]] = None
+        else:
+            rows[:] = [row for row in rows if row not in hits]
+        return len(hits)
+
+
+@pytest.fixture
+def side_effects(monkeypatch):
+    calls = {"event_days": [], "students": [], "outbox": []}
+
+    async def refresh_event_days(db, days):
+        calls["event_days"].extend(sorted(days))
+
+    async def refresh_students(db, ids):
+        calls["students"].extend(sorted(ids))
+
+    async def enqueue(db, kind, field, values):
+        calls["outbox"].append((kind, field, values))
+
+    monkeypatch.setattr(cascade, "refresh_event_days", refresh_event_days)
+    monkeypatch.setattr(cascade, "refresh_students", refresh_students)
+    monkeypatch.setattr(cascade, "enqueue", enqueue)
+    return calls
+
+
+def school(**extra):
+    return TableDb(
+        Event=[{"ID": 1, "event_typeID": 1}, {"ID": 2, "event_typeID": 1}],
+        EVENT_TYPE=[{"ID": 1}],
+        Student=[{"ID": 10, "guardianID": 3}, {"ID": 11, "guardianID": 3}, {"ID": 12, "guardianID": None}],
+        Guardian=[{"ID": 3}],
+        AttendanceStudent=[
+            {"ID": 100, "eventID": 1, "studentID": 10, "theDATE": "2024-01-07"},
+            {"ID": 101, "eventID": 1, "studentID": 11, "theDATE": "2024-01-07"},
+            {"ID": 102, "eventID": 2, "studentID": 10, "theDATE": "2024-01-14"},
+        ],
+        AttendanceArchiveSegment=[{"ID": 5, "eventID": 1}],
+        AttendanceArchiveStudent=[{"segmentID": 5, "studentID": 12}],
+        GroupMember=[{"groupID": 1, "studentID": 10}],
+        **extra,
+    )
+
+
+def test_parse_references():
+    assert parse_references(SCHEMA) == [("Child", "parentID", "Parent"), ("Child", "otherID", "Other")]
+
+
+def test_load_graph_adds_logical_references(tmp_path):
+    path = tmp_path / "schema.sql"
+    path.write_text(SCHEMA)
+    graph = load_graph(str(path))
+    assert graph["Parent"] == [("Child", "parentID")]
+    for table, column, parent in LOGICAL_REFERENCES:
+        assert (table, column) in graph[parent]
+
+
+def test_schema_graph_covers_set_null_and_rollups():
+    for table, column in SET_NULL:
+        assert any((table, column) in children for children in REFERENCES.values())
+    assert ("AttendanceStudent", "eventID") in REFERENCES["Event"]
+    assert ("StudentAttendanceStats", "studentID") in REFERENCES["Student"]
+
+
+def test_deleting_an_event_cascades_through_attendance_and_archive(side_effects):
+    db = school()
+    result = asyncio.run(cascade_delete(db, "Event", [1, 99]))
+
+    assert result.deleted["Event"] == {1}
+    assert [row["ID"] for row in db.tables["AttendanceStudent"]] == [102]
+    assert db.tables["AttendanceArchiveSegment"] == []
+    assert db.tables["AttendanceArchiveStudent"] == []
+    assert result.rows["AttendanceStudent"] == 2
+    # Event-days of the deleted event are gone with it; its students' stats are recomputed
+    assert side_effects["event_days"] == []
+    assert side_effects["students"] == [10, 11, 12]
+    assert side_effects["outbox"] == [("event_documents", "eventIds", [1])]
+
+
+def test_deleting_a_student_recomputes_surviving_event_days(side_effects):
+    db = school(StudentAttendanceStats=[{"studentID": 10}])
+    result = asyncio.run(cascade_delete(db, "Student", [10]))
+
+    assert result.students == {10}
+    assert db.tables["GroupMember"] == []
+    assert db.tables["StudentAttendanceStats"] == []
+    assert [row["ID"] for row in db.tables["AttendanceStudent"]] == [101]
+    assert side_effects["event_days"] == [(1, "2024-01-07"), (2, "2024-01-14")]
+    assert side_effects["students"] == []
+    assert side_effects["outbox"] == [("search_remove", "people", [["student", 10]])]
+
+
+def test_set_null_references_are_cleared_not_deleted(side_effects):
+    db = school()
+    asyncio.run(cascade_delete(db, "Guardian", [3]))
+
+    assert [row["guardianID"] for row in db.tables["Student"]] == [None, None, None]
+    assert len(db.tables["AttendanceStudent"]) == 3
+    assert side_effects["outbox"] == [("search_remove", "people", [["guardian", 3]])]
+
+
+def test_statements_are_chunked(side_effects, monkeypatch):
+    monkeypatch.setattr(cascade, "CHUNK", 2)
+    db = school()
+    asyncio.run(cascade_delete(db, "Student", [10, 11, 12]))
+
+    assert db.tables["Student"] == []
+    assert all(statement.count("%s") <= 2 for statement in db.statements())
+    assert sum(s.startswith("DELETE FROM Student ") for s in db.statements()) == 2
+
+
+def test_nothing_to_delete(side_effects):
+    db = school()
+    result = asyncio.run(cascade_delete(db, "Event", [42]))
+    assert result.deleted == {} and result.rows == {}
+    assert side_effects["outbox"] == []
@@ -0,0 +1,133 @@
+# tests/test_checkin_events.py
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+import checkin_events
+import graphql_api
+from checkin_events import CheckInBroadcaster, resync_message
+from checkin_store import checkin_store
+from graphql_api import schema
+
+
+class FakePubSub:
+    """Redis pub/sub whose incoming messages (or errors) the test feeds through `inbox`."""
+
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.remove(channel)
+
+    async def aclose(self):
+        self.closed = True
+
+    async def get_message(self, timeout):
+        try:
+            item = await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def publish(self, event_id, action, ids):
+        data = json.dumps({"eventId": event_id, "action": action, "studentIds": ids, "count": len(ids)})
+        self.inbox.put_nowait({"type": "message", "channel": checkin_store.channel(event_id), "data": data})
+
+
+@pytest.fixture
+def pubsub(monkeypatch):
+    fake = FakePubSub()
+    monkeypatch.setattr(checkin_events, "RECONNECT_DELAY", 0)
+
+    class Redis:
+        def pubsub(self, ignore_subscribe_messages):
+            return fake
+
+    monkeypatch.setattr(checkin_events, "get_async_redis", Redis)
+    return fake
+
+
+async def settle(pubsub=None):
+    """Let the reader task catch up (with `pubsub`, until its inbox is empty)."""
+    while pubsub is not None and not pubsub.inbox.empty():
+        await asyncio.sleep(0)
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_one_subscription_fans_out_to_every_listener(pubsub):
+    async def run():
+        broadcaster = CheckInBroadcaster()
+        async with broadcaster.listen(5) as first, broadcaster.listen(5) as second:
+            assert pubsub.channels == [checkin_store.channel(5)]
+            pubsub.publish(5, "checked_in", [7])
+            changes = await first.get(), await second.get()
+        await settle()
+        return changes
+
+    first, second = asyncio.run(run())
+    assert first == second == {"eventId": 5, "action": "checked_in", "studentIds": [7], "count": 1}
+    assert pubsub.channels == [] and pubsub.closed
+
+
+def test_full_queue_is_replaced_by_a_resync(pubsub, monkeypatch):
+    monkeypatch.setattr(checkin_events, "QUEUE_SIZE", 2)
+
+    async def run():
+        broadcaster = CheckInBroadcaster()
+        async with broadcaster.listen(5) as queue:
+            for student_id in (1, 2, 3):
+                pubsub.publish(5, "checked_in", [student_id])
+            await settle(pubsub)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert asyncio.run(run()) == [resync_message(5)]
+
+
+def test_lost_connection_resyncs_every_listener(pubsub):
+    async def run():
+        broadcaster = CheckInBroadcaster()
+        async with broadcaster.listen(5) as five, broadcaster.listen(6) as six:
+            pubsub.inbox.put_nowait(RedisConnectionError("connection reset"))
+            return await five.get(), await six.get()
+
+    assert asyncio.run(run()) == (resync_message(5), resync_message(6))
+
+
+def test_subscription_starts_with_a_snapshot_and_resyncs(monkeypatch):
+    checked_in = [[3], [3, 4, 9]]
+    queue = asyncio.Queue()
+
+    async def members(event_id):
+        return checked_in.pop(0)
+
+    @asynccontextmanager
+    async def listen(event_id):
+        yield queue
+
+    monkeypatch.setattr(graphql_api.checkin_store, "members", members)
+    monkeypatch.setattr(graphql_api.checkin_events, "listen", listen)
+
+    async def run():
+        stream = await schema.subscribe("subscription { checkInChanges(eventId: 5) { action studentIds count } }")
+        queue.put_nowait({"eventId": 5, "action": "checked_in", "studentIds": [4], "count": 2})
+        queue.put_nowait(resync_message(5))
+        changes = [(await stream.__anext__()).data["checkInChanges"] for _ in range(3)]
+        await stream.aclose()
+        return changes
+
+    assert asyncio.run(run()) == [
+        {"action": "snapshot", "studentIds": [3], "count": 1},
+        {"action": "checked_in", "studentIds": [4], "count": 2},
+        {"action": "snapshot", "studentIds": [3, 4, 9], "count": 3},
+    ]
@@ -0,0 +1,282 @@
+# tests/test_graphql_schema.py
+"""Operations run end to end through the real schema and its extensions, on a fake connection."""
+import asyncio
+import json
+from urllib.parse import urlencode
+
+import mysql.connector
+import pytest
+from fastapi import FastAPI
+
+import graphql_api
+import migrate
+import pagination
+import persisted_queries
+import unit_of_work
+from conftest import FakeDb
+from graphql_api import schema
+from loaders import Loaders
+
+STUDENT = {"id": 7, "guardianID": None, "firstName": "Ann", "lastName": "Lee", "guardianName": None}
+
+
+class SchoolDb(FakeDb):
+    def answer(self, sql, params):
+        return [STUDENT] if "FROM Student" in sql and params == [7] else []
+
+    def affect(self, sql, params):
+        if "FAIL" in params:
+            raise RuntimeError("disk full")
+        if sql.startswith("INSERT INTO Student"):
+            self.lastrowid = 8
+        return 1
+
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = SchoolDb()
+
+    async def borrow():
+        return conn
+
+    monkeypatch.setattr(unit_of_work, "get_async_mysql_conn", borrow)
+    return conn
+
+
+@pytest.fixture
+def hooks(monkeypatch):
+    ran = []
+
+    def hook(name):
+        async def record(*args):
+            ran.append((name, args))
+        return record
+
+    monkeypatch.setattr(graphql_api.query_cache, "bump", hook("bump"))
+    monkeypatch.setattr(graphql_api.name_index, "index", hook("index"))
+    monkeypatch.setattr(graphql_api.student_profiles, "refresh", hook("refresh"))
+    return ran
+
+
+def execute(query, variables=None):
+    async def run():
+        uow = unit_of_work.UnitOfWork()
+        context = {"db": uow, "loaders": Loaders(uow), "store_timings": []}
+        try:
+            return await schema.execute(query, variable_values=variables, context_value=context)
+        finally:
+            await uow.close()
+
+    return asyncio.run(run())
+
+
+def cache_count(result):
+    return persisted_queries.DOCUMENT_CACHE._values.get((result,), 0)
+
+
+def test_query(db):
+    result = execute("query Student($id: Int!) { studentById(studentId: $id) { id firstName } }", {"id": 7})
+    assert result.errors is None
+    assert result.data == {"studentById": {"id": 7, "firstName": "Ann"}}
+    assert [method for method, _, _ in db.calls] == ["fetchone", "close"]
+
+
+def test_mutation_commits_then_runs_hooks(db, hooks):
+    result = execute('mutation { createStudent(firstName: "Bo", lastName: "Kim") { id firstName } }')
+    assert result.errors is None
+    assert result.data == {"createStudent": {"id": 8, "firstName": "Bo"}}
+    assert [method for method, _, _ in db.calls] == ["begin", "execute", "commit", "close"]
+    assert [name for name, _ in hooks] == ["bump", "index", "refresh"]
+
+
+def test_failed_mutation_rolls_back_without_hooks(db, hooks):
+    result = execute("""
+        mutation {
+            a: createStudent(firstName: "Bo", lastName: "Kim") { id }
+            b: createStudent(firstName: "Cy", lastName: "FAIL") { id }
+        }
+    """)
+    assert "disk full" in result.errors[0].message
+    assert [method for method, _, _ in db.calls] == ["begin", "execute", "execute", "rollback", "close"]
+    assert hooks == []
+
+
+def test_failed_commit_turns_the_result_into_an_error(db, hooks, monkeypatch):
+    async def commit():
+        raise mysql.connector.errors.OperationalError("Lost connection to MySQL server")
+
+    monkeypatch.setattr(db, "commit", commit)
+    result = execute('mutation { createStudent(firstName: "Bo", lastName: "Kim") { id } }')
+    assert result.data is None
+    assert result.errors[0].message.startswith("Transaction failed: ")
+    assert [method for method, _, _ in db.calls] == ["begin", "execute", "close"]
+    assert hooks == []
+
+
+def test_repeated_document_is_served_from_the_cache(db):
+    query = "{ studentById(studentId: 7) { lastName } }"
+    hits, misses = cache_count("hit"), cache_count("miss")
+
+    first = execute(query)
+    second = execute(query)
+
+    assert first.data == second.data == {"studentById": {"lastName": "Lee"}}
+    assert second.errors is None
+    assert (cache_count("miss") - misses, cache_count("hit") - hits) == (1, 1)
+    assert persisted_queries._documents.get(persisted_queries.query_hash(query)) is not None
+
+
+def test_invalid_document_is_rejected_and_not_cached(db):
+    query = "{ studentById(studentId: 7) { nickname } }"
+    for _ in range(2):
+        result = execute(query)
+        assert result.data is None
+        assert "nickname" in result.errors[0].message
+    assert persisted_queries._documents.get(persisted_queries.query_hash(query)) is None
+
+
+def test_list_past_the_cap_is_an_error_not_a_truncation(db, monkeypatch):
+    monkeypatch.setattr(pagination, "MAX_LIST_SIZE", 2)
+    db.answer = lambda sql, params: [{"id": i, "volunteerId": 1, "eventId": i} for i in (3, 2, 1)]
+
+    result = execute("{ volunteerRecords(volunteerId: 1) { id } }")
+    assert result.data is None
+    assert "volunteerRecordsConnection" in result.errors[0].message
+    assert db.calls[0][2] == [1, 3]
+
+    result = execute("{ volunteerRecords(volunteerId: 1, limit: 2) { id } }")
+    assert result.data == {"volunteerRecords": [{"id": 3}, {"id": 2}]}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def graphql_http(db, monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(persisted_queries, "get_async_redis", lambda: redis)
+    app = FastAPI()
+    app.include_router(graphql_api.graphql_app, prefix="/graphql")
+    store = persisted_queries.PersistedQueryStore(mode="auto")
+    return persisted_queries.PersistedQueryMiddleware(app, store=store), redis
+
+
+def request(app, method, body=None, query_string=b""):
+    """One ASGI request; returns (status, JSON body)."""
+    raw = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+        "method": method, "path": "/graphql", "raw_path": b"/graphql", "root_path": "",
+        "query_string": query_string, "client": ("127.0.0.1", 1), "server": ("test", 80),
+        "headers": [(b"content-type", b"application/json"), (b"accept", b"application/json"),
+                    (b"content-length", str(len(raw)).encode())],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": raw, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    return status, json.loads(b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body"))
+
+
+def persisted(sha):
+    return {"persistedQuery": {"version": 1, "sha256Hash": sha}}
+
+
+def test_persisted_query_miss_then_register_then_hit(graphql_http):
+    app, redis = graphql_http
+    query = "{ studentById(studentId: 7) { firstName } }"
+    sha = persisted_queries.query_hash(query)
+
+    status, body = request(app, "POST", {"extensions": persisted(sha)})
+    assert status == 200
+    assert body["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+    status, body = request(app, "POST", {"query": query, "extensions": persisted(sha)})
+    assert (status, body) == (200, {"data": {"studentById": {"firstName": "Ann"}}})
+    assert redis.data == {f"pq:{sha}": query}
+
+    status, body = request(app, "POST", {"extensions": persisted(sha)})
+    assert (status, body) == (200, {"data": {"studentById": {"firstName": "Ann"}}})
+
+    status, body = request(app, "GET", query_string=urlencode({"extensions": json.dumps(persisted(sha))}).encode())
+    assert (status, body) == (200, {"data": {"studentById": {"firstName": "Ann"}}})
+
+
+def test_persisted_query_hash_mismatch(graphql_http):
+    app, redis = graphql_http
+    status, body = request(app, "POST", {"query": "{ __typename }", "extensions": persisted("0" * 64)})
+    assert status == 200
+    assert body["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_HASH_MISMATCH"
+    assert redis.data == {}
+
+
+def test_persisted_query_text_must_be_a_string(graphql_http):
+    app, _ = graphql_http
+    status, body = request(app, "POST", {"query": 5, "extensions": persisted("0" * 64)})
+    assert status == 400
+    assert body["errors"][0]["extensions"]["code"] == "BAD_REQUEST"
+
+
+@pytest.fixture
+def allowlist(tmp_path, monkeypatch):
+    allowed = "{ studentById(studentId: 7) { firstName } }"
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({persisted_queries.query_hash(allowed): allowed}))
+    store = persisted_queries.PersistedQueryStore(mode="allowlist", manifest_path=str(manifest))
+    monkeypatch.setattr(persisted_queries, "persisted_queries", store)
+    return allowed
+
+
+def test_allowlist_serves_manifest_documents(db, allowlist):
+    result = execute(allowlist)
+    assert result.errors is None
+    assert result.data == {"studentById": {"firstName": "Ann"}}
+
+
+def test_allowlist_rejects_other_documents_without_touching_mysql(db, allowlist):
+    for _ in range(2):   # also after the document cache has seen it
+        result = execute("{ studentById(studentId: 7) { lastName } }")
+        assert result.data is None
+        assert result.errors[0].extensions == {"code": "PERSISTED_QUERY_NOT_ALLOWED"}
+    assert db.calls == []
+
+
+def test_allowlist_covers_subscriptions(allowlist):
+    # graphql-transport-ws operations reach schema.subscribe without the HTTP middleware
+    async def run():
+        results = await schema.subscribe("subscription { checkInChanges(eventId: 1) { count } }")
+        return [result async for result in results]
+
+    [result] = asyncio.run(run())
+    assert result.data is None
+    assert result.errors[0].extensions == {"code": "PERSISTED_QUERY_NOT_ALLOWED"}
+
+
+@pytest.mark.parametrize("label, query", [
+    ("studentAttendance", "{ studentAttendance(studentId: 1, limit: 50) { id } }"),
+    ("studentAttendanceConnection",
+     "{ studentAttendanceConnection(studentId: 1, first: 50) "
+     "{ edges { node { id eventId studentId theDATE theTime eventName } } } }"),
+    ("studentAttendanceConnection(after)",
+     '{ studentAttendanceConnection(studentId: 1, first: 50, after: "WyIyMDI0LTAxLTAxIiwgMCwgMV0=") '
+     "{ edges { node { id eventId studentId theDATE theTime eventName } } } }"),
+])
+def test_migrate_explains_the_sql_the_resolvers_run(db, label, query):
+    result = execute(query)
+    assert result.errors is None
+    sql, params = migrate.hot_queries()[label]
+    assert db.calls[0][1:] == (" ".join(sql.split()), list(params))
@@ -0,0 +1,203 @@
+# tests/test_mysql_pool.py
+import threading
+from types import SimpleNamespace
+
+import mysql.connector.errors
+import pytest
+
+import mysql_pool
+from mysql_pool import ConnectionPool, PoolTimeout
+
+
+class FakeRaw:
+    def __init__(self, n):
+        self.n = n
+        self.closed = False
+        self.alive = True
+        self.in_transaction = False
+        self.rolled_back = False
+        self.autocommit = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise mysql.connector.errors.InterfaceError("gone")
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(mysql_pool, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        opened.append(FakeRaw(len(opened)))
+        return opened[-1]
+
+    return ConnectionPool(connect, **kwargs), opened
+
+
+def test_fill_opens_min_size():
+    pool, opened = make_pool(min_size=2, max_size=5)
+    pool.fill()
+    assert len(opened) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_grows_on_demand_up_to_max_size():
+    pool, opened = make_pool(min_size=0, max_size=3, timeout=0.05)
+    held = [pool.get_connection() for _ in range(3)]
+    assert len(opened) == 3
+    assert pool.stats()["inUse"] == 3
+    with pytest.raises(PoolTimeout):
+        pool.get_connection()
+    assert pool.timeouts == 1
+    for cnx in held:
+        cnx.close()
+    assert pool.stats()["idle"] == 3
+
+
+def test_reuses_most_recently_returned_connection():
+    pool, opened = make_pool(min_size=0, max_size=3)
+    a, b = pool.get_connection(), pool.get_connection()
+    a.close()
+    b.close()
+    assert pool.get_connection()._raw is opened[1]
+    assert len(opened) == 2
+
+
+def test_waiter_gets_connection_returned_before_deadline():
+    pool, _ = make_pool(min_size=0, max_size=1, timeout=5)
+    held = pool.get_connection()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.get_connection()))
+    waiter.start()
+    threading.Timer(0.05, held.close).start()
+    waiter.join(2)
+
+    assert not waiter.is_alive()
+    assert got and pool.timeouts == 0
+
+
+def test_per_call_timeout_overrides_pool_default():
+    pool, _ = make_pool(min_size=0, max_size=1, timeout=60)
+    pool.get_connection()
+    with pytest.raises(PoolTimeout):
+        pool.get_connection(timeout=0.01)
+
+
+def test_failed_connect_frees_the_slot():
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise mysql.connector.errors.InterfaceError("refused")
+        return FakeRaw(len(calls))
+
+    pool = ConnectionPool(connect, min_size=0, max_size=1, timeout=0.05)
+    with pytest.raises(mysql.connector.errors.InterfaceError):
+        pool.get_connection()
+    assert pool.stats()["size"] == 0
+    pool.get_connection()
+
+
+def test_closed_proxy_cannot_be_used():
+    pool, _ = make_pool(min_size=0, max_size=1)
+    cnx = pool.get_connection()
+    cnx.close()
+    cnx.close()  # idempotent
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        cnx.cursor()
+
+
+def test_release_rolls_back_and_resets_session():
+    pool, opened = make_pool(min_size=0, max_size=1)
+    with pool.get_connection() as cnx:
+        cnx.autocommit = True
+        opened[0].in_transaction = True
+    assert opened[0].rolled_back
+    assert opened[0].autocommit is False
+
+
+def test_stale_idle_connection_is_pinged_and_replaced(clock):
+    pool, opened = make_pool(min_size=0, max_size=2, validate_after=30, idle_timeout=10 ** 6)
+    pool.get_connection().close()
+    opened[0].alive = False
+
+    clock.now += 10
+    assert pool.get_connection()._raw is opened[0]   # recently used: not pinged
+
+    pool, opened = make_pool(min_size=0, max_size=2, validate_after=30, idle_timeout=10 ** 6)
+    pool.get_connection().close()
+    opened[0].alive = False
+    clock.now += 31
+    cnx = pool.get_connection()
+    assert cnx._raw is opened[1]
+    assert opened[0].closed and pool.recycled == 1
+
+
+def test_connections_past_max_lifetime_are_retired(clock):
+    pool, opened = make_pool(min_size=0, max_size=2, max_lifetime=100, idle_timeout=10 ** 6)
+    cnx = pool.get_connection()
+    clock.now += 100
+    cnx.close()  # too old to go back
+    assert opened[0].closed
+    assert pool.stats()["size"] == 0
+
+    pool.get_connection().close()
+    clock.now += 150
+    assert pool.get_connection()._raw is opened[2]   # retired at checkout too
+    assert opened[1].closed
+
+
+def test_idle_connections_above_min_size_are_reaped(clock):
+    pool, opened = make_pool(min_size=1, max_size=4, idle_timeout=60, validate_after=10 ** 6)
+    held = [pool.get_connection() for _ in range(3)]
+    held[0].close()
+    held[1].close()
+    clock.now += 61
+    held[2].close()   # the two idle past idle_timeout are closed, down to min_size
+
+    assert pool.stats()["size"] == 1
+    assert opened[0].closed and opened[1].closed
+    assert not opened[2].closed
+
+
+def test_close_drops_idle_and_returned_connections():
+    pool, opened = make_pool(min_size=0, max_size=2)
+    held = pool.get_connection()
+    pool.get_connection().close()
+    pool.close()
+    assert opened[1].closed
+    held.close()
+    assert opened[0].closed
+    assert pool.stats()["size"] == 0
+    with pytest.raises(mysql.connector.errors.PoolError):
+        pool.get_connection()
+
+
+def test_invalid_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        ConnectionPool(lambda: None, min_size=3, max_size=2)
+    with pytest.raises(ValueError):
+        ConnectionPool(lambda: None, min_size=0, max_size=0)
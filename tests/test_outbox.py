@@ -0,0 +1,75 @@
+# tests/test_outbox.py
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import mysql.connector
+import pytest
+
+import outbox
+from conftest import FakeDb
+
+JOBS = [
+    {"ID": 1, "kind": "search_remove", "payload": json.dumps({"people": [["student", 7]]}), "attempts": 1},
+    {"ID": 2, "kind": "search_remove", "payload": json.dumps({"people": [["student", 8]]}), "attempts": 1},
+]
+
+
+class OutboxDb(FakeDb):
+    """Hands out JOBS once; with `down` set, only the claim transaction reaches MySQL."""
+
+    def __init__(self, down=False):
+        super().__init__()
+        self.down = down
+        self.claimed = False
+
+    def answer(self, sql, params):
+        if self.claimed:
+            return []
+        self.claimed = True
+        return JOBS
+
+    def affect(self, sql, params):
+        if self.down and "attempts = attempts + 1" not in sql:
+            raise mysql.connector.errors.OperationalError("MySQL server has gone away")
+        return 1
+
+
+@pytest.fixture
+def removed(monkeypatch):
+    people = []
+
+    async def remove(kind, person_id):
+        if person_id == 8:
+            raise RuntimeError("search unavailable")
+        people.append((kind, person_id))
+
+    monkeypatch.setattr(outbox.name_index, "remove", remove)
+    return people
+
+
+def drain(db, monkeypatch):
+    @asynccontextmanager
+    async def conn():
+        yield db
+
+    monkeypatch.setattr(outbox, "async_mysql_conn", conn)
+    return asyncio.run(outbox.OutboxProcessor().drain())
+
+
+def test_drain_deletes_finished_jobs_and_backs_off_failed_ones(monkeypatch, removed):
+    db = OutboxDb()
+    assert drain(db, monkeypatch) == 1
+    assert removed == [("student", 7)]
+    assert ("execute", "DELETE FROM CleanupOutbox WHERE ID = %s", [1]) in db.calls
+    retry = [params for method, sql, params in db.calls if "lastError" in (sql or "")]
+    assert retry == [["search unavailable", 10, 2]]
+
+
+def test_bookkeeping_outage_leaves_jobs_to_the_lease(monkeypatch, removed):
+    db = OutboxDb(down=True)
+    assert drain(db, monkeypatch) == 0
+    # Both jobs ran and both outcomes were attempted; the rows keep their lease
+    assert removed == [("student", 7)]
+    outcomes = [sql for sql in db.statements("execute") if "attempts = attempts + 1" not in sql]
+    assert len(outcomes) == 2
@@ -0,0 +1,158 @@
+# tests/test_pagination.py
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from strawberry.types.nodes import InlineFragment, SelectedField
+
+import pagination
+from conftest import FakeDb
+from pagination import (
+    ListSpec, clamp_list_limit, clamp_page_size, decode_cursor, encode_cursor, fetch_page, selected_fields,
+    within_list_limit,
+)
+
+SPEC = ListSpec(
+    source="Student s",
+    columns={"ID": "s.ID", "firstName": "s.firstName", "guardianName": "g.name"},
+    order=["s.firstName", "s.ID"],
+    joins={"guardian": "LEFT JOIN Guardian g ON g.ID = s.guardianID"},
+    join_fields={"guardianName": "guardian"},
+)
+
+
+def answering(rows):
+    return FakeDb(lambda sql, params: rows)
+
+
+def rows(*names):
+    return [{"ID": i, "firstName": name, "_k0": name, "_k1": i} for i, name in enumerate(names, 1)]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["Ann", 7, None, 1.5])
+    assert decode_cursor(cursor) == ["Ann", 7, None, 1.5]
+
+
+def test_cursor_stringifies_other_values():
+    assert decode_cursor(encode_cursor([date(2024, 5, 1), 3])) == ["2024-05-01", 3]
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(["??>>~~" * 5])
+    assert "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1])[:-3] + "@@@", "bm90IGpzb24="])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_clamp_page_size():
+    assert clamp_page_size(None) == pagination.DEFAULT_PAGE_SIZE
+    assert clamp_page_size(0) == 0
+    assert clamp_page_size(10) == 10
+    assert clamp_page_size(10 ** 6) == pagination.MAX_PAGE_SIZE
+    with pytest.raises(ValueError):
+        clamp_page_size(-1)
+
+
+def test_clamp_list_limit():
+    assert clamp_list_limit(None) == pagination.MAX_LIST_SIZE
+    assert clamp_list_limit(5) == 5
+    assert clamp_list_limit(pagination.MAX_LIST_SIZE + 1) == pagination.MAX_LIST_SIZE
+    with pytest.raises(ValueError):
+        clamp_list_limit(-1)
+
+
+def test_within_list_limit():
+    assert within_list_limit([1, 2, 3], 3, None, "students") == [1, 2, 3]
+    assert within_list_limit([1, 2, 3, 4], 3, 3, "students") == [1, 2, 3]
+    with pytest.raises(ValueError, match="studentsConnection"):
+        within_list_limit([1, 2, 3, 4], 3, None, "students")
+    with pytest.raises(ValueError):
+        within_list_limit([1, 2, 3, 4], 3, 5000, "students")
+
+
+def test_select_list_projects_fields_and_needed_joins():
+    select, joins = SPEC.select_list({"firstName"})
+    assert select == "s.firstName AS firstName, s.firstName AS _k0, s.ID AS _k1"
+    assert joins == ""
+
+    select, joins = SPEC.select_list({"guardianName", "unknown"})
+    assert select.startswith("g.name AS guardianName, ")
+    assert joins == "LEFT JOIN Guardian g ON g.ID = s.guardianID"
+
+
+def test_select_list_falls_back_to_all_columns():
+    select, _ = SPEC.select_list(set())
+    assert select.startswith("s.ID AS ID, s.firstName AS firstName, g.name AS guardianName")
+
+
+def test_complete_fills_unselected_fields():
+    assert SPEC.complete({"ID": 1}) == {"ID": 1, "firstName": None, "guardianName": None}
+
+
+def test_first_page_reads_one_extra_row():
+    conn = answering(rows("Ann", "Bob", "Cy"))
+    page, info, cursors = asyncio.run(fetch_page(conn, SPEC, {"firstName"}, first=2))
+
+    _, sql, params = conn.calls[0]
+    assert sql == (
+        "SELECT s.firstName AS firstName, s.firstName AS _k0, s.ID AS _k1 FROM Student s "
+        "ORDER BY s.firstName ASC, s.ID ASC LIMIT %s"
+    )
+    assert params == [3]
+    assert page == [{"ID": 1, "firstName": "Ann"}, {"ID": 2, "firstName": "Bob"}]
+    assert info.hasNextPage is True
+    assert info.endCursor == cursors[-1]
+    assert [decode_cursor(c) for c in cursors] == [["Ann", 1], ["Bob", 2]]
+
+
+def test_after_cursor_seeks_with_row_value_comparison():
+    conn = answering(rows("Cy"))
+    after = encode_cursor(["Bob", 2])
+    page, info, _ = asyncio.run(fetch_page(
+        conn, SPEC, {"firstName"}, first=2, after=after, where=["s.active = %s"], params=[1],
+    ))
+
+    _, sql, params = conn.calls[0]
+    assert "WHERE s.active = %s AND (s.firstName, s.ID) > (%s, %s) ORDER BY" in sql
+    assert params == [1, "Bob", 2, 3]
+    assert len(page) == 1
+    assert info.hasNextPage is False
+
+
+def test_descending_list_seeks_backwards():
+    spec = ListSpec("Event e", {"ID": "e.ID"}, ["e.theDate", "e.ID"], descending=True)
+    conn = answering([])
+    _, info, cursors = asyncio.run(fetch_page(conn, spec, {"ID"}, after=encode_cursor(["2024-01-01", 9])))
+
+    _, sql, params = conn.calls[0]
+    assert "(e.theDate, e.ID) < (%s, %s)" in sql
+    assert sql.endswith("ORDER BY e.theDate DESC, e.ID DESC LIMIT %s")
+    assert params == ["2024-01-01", 9, pagination.DEFAULT_PAGE_SIZE + 1]
+    assert (info.hasNextPage, info.endCursor, cursors) == (False, None, [])
+
+
+def test_cursor_with_wrong_arity_is_rejected():
+    conn = answering([])
+    with pytest.raises(ValueError):
+        asyncio.run(fetch_page(conn, SPEC, {"ID"}, after=encode_cursor(["Bob"])))
+    assert conn.calls == []
+
+
+def test_selected_fields_follows_path_and_fragments():
+    def field(name, *children):
+        return SelectedField(name, {}, {}, list(children))
+
+    node = field(
+        "node", field("ID"), field("__typename"),
+        InlineFragment("Student", [field("firstName")], {}),
+    )
+    info = SimpleNamespace(selected_fields=[field("students", field("edges", node), field("pageInfo"))])
+
+    assert selected_fields(info, ("edges", "node")) == {"ID", "firstName"}
+    assert selected_fields(info) == {"edges", "pageInfo"}
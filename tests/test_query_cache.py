@@ -0,0 +1,145 @@
+# tests/test_query_cache.py
+import asyncio
+import json
+
+import pytest
+
+import query_cache
+from query_cache import INVALIDATION_CHANNEL, QueryCache
+from tenants import Tenant, use_tenant
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(query_cache, "get_async_redis", lambda: fake)
+    return fake
+
+
+def loader(calls, value):
+    async def load():
+        calls.append(value)
+        return value
+    return load
+
+
+def test_memory_backend_serves_hits_without_loading():
+    cache = QueryCache(backend="memory", ttl=60, max_entries=10)
+    calls = []
+
+    async def run():
+        first = await cache.get_or_load("students", "all", loader(calls, [1, 2]))
+        second = await cache.get_or_load("students", "all", loader(calls, [3]))
+        return first, second
+
+    assert asyncio.run(run()) == ([1, 2], [1, 2])
+    assert calls == [[1, 2]]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_bump_invalidates_namespace_and_publishes(redis):
+    cache = QueryCache(backend="memory", ttl=60, max_entries=10)
+    calls = []
+
+    async def run():
+        await cache.get_or_load("students", "all", loader(calls, "old"))
+        await cache.get_or_load("events", "all", loader(calls, "events"))
+        await cache.bump("students")
+        return (
+            await cache.get_or_load("students", "all", loader(calls, "new")),
+            await cache.get_or_load("events", "all", loader(calls, "unused")),
+        )
+
+    assert asyncio.run(run()) == ("new", "events")
+    assert calls == ["old", "events", "new"]
+    assert redis.published == [(INVALIDATION_CHANNEL, {"origin": cache._origin, "namespace": "students"})]
+
+
+def test_bump_survives_publish_failure(monkeypatch):
+    class Down:
+        async def publish(self, channel, message):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(query_cache, "get_async_redis", lambda: Down())
+    cache = QueryCache(backend="memory", ttl=60, max_entries=10)
+    calls = []
+
+    async def run():
+        await cache.get_or_load("students", "all", loader(calls, 1))
+        await cache.bump("students")
+        return await cache.get_or_load("students", "all", loader(calls, 2))
+
+    assert asyncio.run(run()) == 2
+
+
+def test_load_racing_a_clear_is_not_served_afterwards():
+    cache = QueryCache(backend="memory", ttl=60, max_entries=10)
+    calls = []
+
+    async def slow_load():
+        # Another worker's bump (or a resubscribe) lands while loading
+        cache.clear()
+        calls.append("stale")
+        return "stale"
+
+    async def run():
+        await cache.get_or_load("students", "all", slow_load)
+        return await cache.get_or_load("students", "all", loader(calls, "fresh"))
+
+    assert asyncio.run(run()) == "fresh"
+    assert calls == ["stale", "fresh"]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QueryCache(backend="memory", ttl=60, max_entries=2)
+    calls = []
+
+    async def run():
+        await cache.get_or_load("n", "a", loader(calls, "a"))
+        await cache.get_or_load("n", "b", loader(calls, "b"))
+        await cache.get_or_load("n", "a", loader(calls, "a2"))   # hit, a becomes most recent
+        await cache.get_or_load("n", "c", loader(calls, "c"))    # evicts b
+        await cache.get_or_load("n", "b", loader(calls, "b2"))
+
+    asyncio.run(run())
+    assert calls == ["a", "b", "c", "b2"]
+    assert cache.evictions == 2
+
+
+def test_entries_are_scoped_to_the_tenant():
+    cache = QueryCache(backend="memory", ttl=60, max_entries=10)
+    grace = Tenant("grace", "youth_grace", "youth_ministry_grace", "t:grace:")
+    hope = Tenant("hope", "youth_hope", "youth_ministry_hope", "t:hope:")
+
+    async def run():
+        with use_tenant(grace):
+            await cache.get_or_load("students", "all", loader([], "grace"))
+        with use_tenant(hope):
+            return await cache.get_or_load("students", "all", loader([], "hope"))
+
+    assert asyncio.run(run()) == "hope"
+
+
+def test_off_backend_always_loads():
+    cache = QueryCache(backend="off")
+    calls = []
+
+    async def run():
+        await cache.get_or_load("students", "all", loader(calls, 1))
+        await cache.get_or_load("students", "all", loader(calls, 1))
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        QueryCache(backend="memcached")
@@ -0,0 +1,42 @@
+# tests/test_query_manifest.py
+import glob
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+from query_manifest import extract, query_hash
+
+SCRIPT = """
+const a = `query Students { students { id } }`;
+const b = `
+  mutation Add($name: String!) { createStudent(firstName: $name, lastName: "x") { id } }`;
+const c = `{ __typename }`;
+const html = `<div>${name}</div>`;
+const dynamic = `query { student(id: ${id}) { id } }`;
+"""
+
+
+def test_extract_finds_static_operations(tmp_path):
+    path = tmp_path / "app.js"
+    path.write_text(SCRIPT)
+    found = extract([str(path)])
+    assert sorted(found.values(), key=len) == [
+        "{ __typename }",
+        "query Students { students { id } }",
+        '\n  mutation Add($name: String!) { createStudent(firstName: $name, lastName: "x") { id } }',
+    ]
+    assert all(sha == query_hash(text) for sha, text in found.items())
+
+
+def test_cli_runs_without_database_secrets(tmp_path):
+    # The Docker build runs this before any secret exists
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("MYSQL_PASSWORD", "MONGO_URI", "REDIS_PASSWORD", "REDIS_HOST")}
+    env["PERSISTED_QUERY_MANIFEST"] = str(tmp_path / "manifest.json")
+    scripts = sorted(glob.glob(os.path.join(ROOT, "frontend", "*.js")))
+    subprocess.run([sys.executable, "-m", "query_manifest", "extract", *scripts], cwd=ROOT, env=env, check=True,
+                   capture_output=True)
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest and manifest == extract(scripts)
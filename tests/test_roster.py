@@ -0,0 +1,109 @@
+# tests/test_roster.py
+import asyncio
+
+import pytest
+
+import roster
+from conftest import FakeDb
+from roster import EventNotFound, bulk_check_in, import_roster
+
+
+def school_db(events=(1,), students=range(1, 100)):
+    events, students = set(events), set(students)
+
+    def answer(sql, params):
+        known = events if "FROM Event" in sql else students
+        return [{"ID": i} for i in params if i in known]
+
+    return FakeDb(answer)
+
+
+class FakeStore:
+    def __init__(self, already=()):
+        self.checked = set(already)
+        self.calls = []
+
+    async def check_in_many(self, event_id, student_ids):
+        self.calls.append(list(student_ids))
+        added = [sid not in self.checked for sid in student_ids]
+        self.checked.update(student_ids)
+        return added
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeStore(already={3})
+    monkeypatch.setattr(roster, "checkin_store", fake)
+    return fake
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def run_import(db, *chunks, content_type="text/csv"):
+    return asyncio.run(import_roster(db, 1, stream(*chunks), content_type))
+
+
+def test_bulk_check_in_splits_new_existing_and_unknown(store):
+    result = asyncio.run(bulk_check_in(school_db(), 1, [2, 3, 500, 2, 4]))
+    assert result == {
+        "eventId": 1,
+        "checkedIn": [2, 4],
+        "alreadyCheckedIn": [3],
+        "failed": [{"studentId": 500, "reason": "student not found"}],
+    }
+    assert store.calls == [[2, 3, 4]]
+
+
+def test_bulk_check_in_unknown_event(store):
+    with pytest.raises(EventNotFound):
+        asyncio.run(bulk_check_in(school_db(), 7, [1]))
+    assert store.calls == []
+
+
+def test_student_lookup_is_chunked(store, monkeypatch):
+    monkeypatch.setattr(roster, "STUDENT_CHUNK", 2)
+    db = school_db()
+    asyncio.run(bulk_check_in(db, 1, [1, 2, 3, 4, 5]))
+    assert [params for _, _, params in db.calls[1:]] == [[1, 2], [3, 4], [5]]
+
+
+def test_csv_with_header_picks_the_id_column(store):
+    result = run_import(school_db(), b"\xef\xbb\xbfname,StudentID\r\nAnn,1\r\n", b"Bob,2\r\n\r\nCy,x\r\n")
+    assert result["checkedIn"] == [1, 2]
+    assert result["failed"] == [{"line": 5, "reason": "unreadable line: 'Cy,x'"}]
+
+
+def test_csv_without_header(store):
+    result = run_import(school_db(), b"1\n", b"2\n4")
+    assert result["checkedIn"] == [1, 2, 4]
+
+
+def test_csv_header_without_known_column_uses_first(store):
+    result = run_import(school_db(), b"who,when\n5,today\n")
+    assert result["checkedIn"] == [5]
+
+
+def test_lines_split_across_chunks(store):
+    result = run_import(school_db(), b"1", b"2\n1", b"3\n")
+    assert result["checkedIn"] == [12, 13]
+
+
+def test_ndjson_objects_and_bare_ids(store):
+    body = b'{"studentId": 1}\n7\n{"ID": "8"}\n{"name": "x"}\nnot json\n'
+    result = run_import(school_db(), body, content_type="application/x-ndjson")
+    assert result["checkedIn"] == [1, 7, 8]
+    assert [f["line"] for f in result["failed"]] == [4, 5]
+
+
+def test_import_writes_in_batches(store, monkeypatch):
+    monkeypatch.setattr(roster, "IMPORT_BATCH", 2)
+    run_import(school_db(), b"1\n2\n4\n5\n6\n")
+    assert store.calls == [[1, 2], [4, 5], [6]]
+
+
+def test_import_unknown_event(store):
+    with pytest.raises(EventNotFound):
+        asyncio.run(import_roster(school_db(events=()), 1, stream(b"1\n")))
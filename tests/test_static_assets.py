@@ -0,0 +1,130 @@
+# tests/test_static_assets.py
+import asyncio
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+import static_assets
+from static_assets import Asset, StaticAssets, choose_encoding, not_modified
+
+SCRIPT = b"console.log('hello');\n" * 100
+
+
+@pytest.fixture
+def assets(tmp_path):
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "tiny.css").write_bytes(b"p{}")
+    (tmp_path / "index.html").write_bytes(
+        b'<link href="tiny.css"><script src="app.js"></script>'
+        b'<a href="other.html">x</a><script src="https://cdn.example/x.js"></script>'
+    )
+    (tmp_path / "other.html").write_bytes(b"<p>other</p>")
+    (tmp_path / ".hidden").write_bytes(b"secret")
+    loaded = StaticAssets(str(tmp_path))
+    loaded.load()
+    return loaded
+
+
+def test_fingerprint_is_content_hash(assets):
+    asset = assets.assets["app.js"]
+    assert asset.fingerprinted == f"app.{asset.digest}.js"
+    assert len(asset.digest) == 12
+    assert Asset("app.js", SCRIPT + b"//").digest != asset.digest
+    assert assets.fingerprinted[asset.fingerprinted] is asset
+    assert ".hidden" not in assets.assets
+
+
+def test_pages_link_fingerprinted_scripts_and_styles(assets):
+    html = assets.assets["index.html"].variants["identity"].decode()
+    assert f'src="/assets/{assets.assets["app.js"].fingerprinted}"' in html
+    assert f'href="/assets/{assets.assets["tiny.css"].fingerprinted}"' in html
+    assert 'href="other.html"' in html
+    assert 'src="https://cdn.example/x.js"' in html
+
+
+def test_variants_are_precompressed_when_worth_it(assets):
+    script = assets.assets["app.js"]
+    assert gzip.decompress(script.variants["gzip"]) == SCRIPT
+    if static_assets.brotli is not None:
+        assert static_assets.brotli.decompress(script.variants["br"]) == SCRIPT
+    assert set(assets.assets["tiny.css"].variants) == {"identity"}
+    assert script.media_type.endswith("javascript; charset=utf-8")
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, "identity"),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),
+    ("identity", "identity"),
+    ("gzip;q=., br;q=0", "identity"),
+])
+def test_choose_encoding(assets, header, expected):
+    if static_assets.brotli is None and expected == "br":
+        expected = "gzip"
+    assert choose_encoding(assets.assets["app.js"], header) == expected
+
+
+def test_small_files_are_never_compressed(assets):
+    assert choose_encoding(assets.assets["tiny.css"], "br, gzip") == "identity"
+
+
+def test_etag_differs_per_variant():
+    asset = Asset("app.js", SCRIPT)
+    assert asset.etag("identity") == f'"{asset.digest}"'
+    assert asset.etag("gzip") == f'"{asset.digest}-gzip"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ('"abcd"', False),
+    ("*", True),
+])
+def test_not_modified(header, expected):
+    assert not_modified(header, '"abc"') is expected
+
+
+def get(path, **headers):
+    """Call the router's handler for `path` the way FastAPI would."""
+    request = Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()],
+    })
+    for route in static_assets.router.routes:
+        match = route.path_regex.match(path)
+        if match:
+            return asyncio.run(route.endpoint(request=request, **match.groupdict()))
+    raise AssertionError(f"no route for {path}")
+
+
+def test_fingerprinted_asset_is_immutable():
+    asset = static_assets.static_assets.assets["app.js"]
+    response = get(f"/assets/{asset.fingerprinted}", accept_encoding="gzip")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == static_assets.IMMUTABLE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == asset.etag("gzip")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body) == asset.variants["identity"]
+    assert get("/assets/app.000000000000.js").status_code == 404
+
+
+def test_stable_names_revalidate_with_etag():
+    first = get("/", accept_encoding="identity")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == static_assets.REVALIDATE
+    assert "content-encoding" not in first.headers
+    assert first.body == static_assets.static_assets.assets[static_assets.INDEX_PAGE].variants["identity"]
+
+    again = get("/", accept_encoding="identity", if_none_match=first.headers["etag"])
+    assert again.status_code == 304
+    assert again.body == b""
+    assert again.headers["etag"] == first.headers["etag"]
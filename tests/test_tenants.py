@@ -0,0 +1,113 @@
+# tests/test_tenants.py
+import asyncio
+import json
+
+import pytest
+
+import tenants
+from tenants import TenantMiddleware, UnknownTenant, resolve
+
+
+@pytest.fixture
+def churches(tmp_path, monkeypatch):
+    """grace (with its own host) and hope, served under .youth.example.org."""
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"grace": {"poolQuota": 8, "hosts": ["Youth.GraceChurch.org"]}, "hope": {}}))
+    monkeypatch.setattr(tenants, "TENANTS_FILE", str(path))
+    loaded = tenants._load()
+    monkeypatch.setattr(tenants, "TENANTS", loaded)
+    monkeypatch.setattr(tenants, "_BY_HOST", {h: t for t in loaded.values() for h in t.hosts})
+    monkeypatch.setattr(tenants, "HOST_SUFFIX", ".youth.example.org")
+    monkeypatch.setattr(tenants, "DEFAULT_TENANT", None)
+    monkeypatch.setattr(tenants, "TRUST_HEADER", False)
+    return loaded
+
+
+def headers(host, tenant_id=None):
+    found = {b"host": host.encode()}
+    if tenant_id is not None:
+        found[b"x-tenant-id"] = tenant_id.encode()
+    return found
+
+
+def test_load_fills_in_databases_and_prefixes(churches):
+    grace, hope = churches["grace"], churches["hope"]
+    assert (grace.db, grace.mongo_db, grace.redis_prefix, grace.pool_quota) == (
+        "youth_grace", "youth_ministry_grace", "t:grace:", 8
+    )
+    assert grace.hosts == ["youth.gracechurch.org"]
+    assert (hope.db, hope.pool_quota) == ("youth_hope", None)
+
+
+def test_load_rejects_bad_tenant_ids(tmp_path, monkeypatch):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"../grace": {}}))
+    monkeypatch.setattr(tenants, "TENANTS_FILE", str(path))
+    with pytest.raises(ValueError):
+        tenants._load()
+
+
+def test_resolve_by_host(churches):
+    assert resolve(headers("youth.gracechurch.org")) is churches["grace"]
+    assert resolve(headers("hope.youth.example.org:8443")) is churches["hope"]
+    assert resolve(headers("elsewhere.org")) is None
+    with pytest.raises(UnknownTenant):
+        resolve(headers("faith.youth.example.org"))
+
+
+def test_untrusted_header_must_match_the_host(churches, monkeypatch):
+    assert resolve(headers("hope.youth.example.org", "Hope")) is churches["hope"]
+    with pytest.raises(UnknownTenant):
+        resolve(headers("hope.youth.example.org", "grace"))
+    with pytest.raises(UnknownTenant):
+        resolve(headers("elsewhere.org", "grace"))
+
+    monkeypatch.setattr(tenants, "DEFAULT_TENANT", "grace")
+    assert resolve(headers("elsewhere.org", "grace")) is None
+
+
+def test_trusted_header_selects_the_tenant(churches, monkeypatch):
+    monkeypatch.setattr(tenants, "TRUST_HEADER", True)
+    assert resolve(headers("hope.youth.example.org", "grace")) is churches["grace"]
+    with pytest.raises(UnknownTenant):
+        resolve(headers("hope.youth.example.org", "faith"))
+
+
+def test_current_falls_back_to_the_default(churches, monkeypatch):
+    with pytest.raises(UnknownTenant):
+        tenants.current()
+    monkeypatch.setattr(tenants, "DEFAULT_TENANT", "hope")
+    assert tenants.current() is churches["hope"]
+    with tenants.use_tenant(churches["grace"]):
+        assert tenants.tenant_key("checkins") == "t:grace:checkins"
+    assert tenants.current() is churches["hope"]
+
+
+def serve(scope_type, host):
+    seen, sent = [], []
+
+    async def app(scope, receive, send):
+        seen.append(tenants._current.get())
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": scope_type, "headers": [(b"host", host.encode())]}
+    asyncio.run(TenantMiddleware(app)(scope, None, send))
+    return seen, sent
+
+
+def test_middleware_selects_the_tenant_for_the_request(churches):
+    seen, sent = serve("http", "grace.youth.example.org")
+    assert seen == [churches["grace"]] and sent == []
+    assert tenants._current.get() is None
+
+
+def test_middleware_answers_unknown_tenants_with_404(churches):
+    seen, sent = serve("http", "faith.youth.example.org")
+    assert seen == []
+    assert sent[0]["status"] == 404
+    assert json.loads(sent[1]["body"]) == {"detail": "Unknown tenant 'faith'"}
+
+    seen, sent = serve("websocket", "faith.youth.example.org")
+    assert seen == [] and sent == [{"type": "websocket.close", "code": 4404}]
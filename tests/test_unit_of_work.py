@@ -0,0 +1,131 @@
+# tests/test_unit_of_work.py
+import asyncio
+
+import pytest
+
+import unit_of_work
+from conftest import FakeDb
+from unit_of_work import UnitOfWork
+
+
+@pytest.fixture
+def borrowed(monkeypatch):
+    """Connections handed out by the pool, in order."""
+    conns = []
+
+    async def borrow():
+        conn = FakeDb(lambda sql, params: [{"n": len(conns)}])
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr(unit_of_work, "get_async_mysql_conn", borrow)
+    return conns
+
+
+def methods(conn):
+    return [method for method, _, _ in conn.calls]
+
+
+def test_borrows_lazily_and_shares_one_connection(borrowed):
+    async def run():
+        uow = UnitOfWork()
+        await uow.close()
+        assert borrowed == []
+        await asyncio.gather(uow.fetchall("SELECT 1"), uow.fetchone("SELECT 2"), uow.execute("UPDATE t"))
+        await uow.finish(commit=True)
+
+    asyncio.run(run())
+    assert len(borrowed) == 1
+    assert sorted(methods(borrowed[0])) == ["close", "execute", "fetchall", "fetchone"]
+
+
+def test_transaction_commits_before_after_commit_hooks(borrowed):
+    ran = []
+
+    async def hook(name):
+        ran.append((name, methods(borrowed[0])[-1]))
+
+    async def run():
+        uow = UnitOfWork()
+        uow.transactional = True
+        await uow.execute("INSERT INTO t VALUES (1)")
+        await uow.after_commit(hook, "bump")
+        assert ran == []
+        await uow.finish(commit=True)
+
+    asyncio.run(run())
+    assert methods(borrowed[0]) == ["begin", "execute", "commit", "close"]
+    assert ran == [("bump", "close")]
+
+
+def test_rollback_skips_hooks(borrowed):
+    ran = []
+
+    async def hook():
+        ran.append("hook")
+
+    async def run():
+        uow = UnitOfWork()
+        uow.transactional = True
+        await uow.execute("INSERT INTO t VALUES (1)")
+        await uow.after_commit(hook)
+        await uow.close()
+
+    asyncio.run(run())
+    assert methods(borrowed[0]) == ["begin", "execute", "rollback", "close"]
+    assert ran == []
+
+
+def test_hooks_run_immediately_outside_a_mutation_and_failures_are_reported(borrowed, capsys):
+    ran = []
+
+    async def hook():
+        ran.append("hook")
+
+    async def failing():
+        raise RuntimeError("redis down")
+
+    async def run():
+        uow = UnitOfWork()
+        await uow.after_commit(hook)
+        assert ran == ["hook"]
+
+        uow.transactional = True
+        await uow.after_commit(failing)
+        await uow.after_commit(hook)
+        await uow.finish(commit=True)
+
+    asyncio.run(run())
+    assert ran == ["hook", "hook"]
+    assert "redis down" in capsys.readouterr().out
+
+
+def test_broken_connection_is_replaced_outside_a_transaction(borrowed):
+    async def run():
+        uow = UnitOfWork()
+        await uow.fetchone("SELECT 1")
+        borrowed[0].broken = True
+        row = await uow.fetchone("SELECT 1")
+        await uow.close()
+        return row
+
+    assert asyncio.run(run()) == {"n": 2}
+    assert methods(borrowed[0]) == ["fetchone", "close"]
+    assert methods(borrowed[1]) == ["fetchone", "close"]
+
+
+def test_broken_connection_inside_a_transaction_fails(borrowed):
+    async def run():
+        uow = UnitOfWork()
+        uow.transactional = True
+        await uow.execute("INSERT INTO t VALUES (1)")
+        borrowed[0].broken = True
+        try:
+            with pytest.raises(RuntimeError, match="middle of a transaction"):
+                await uow.execute("INSERT INTO t VALUES (2)")
+        finally:
+            await uow.close()
+
+    asyncio.run(run())
+    assert len(borrowed) == 1
+    assert methods(borrowed[0]) == ["begin", "execute", "rollback", "close"]
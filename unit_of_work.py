@@ -0,0 +1,135 @@
+# unit_of_work.py
+"""
+One MySQL connection per GraphQL operation.
+
+`get_context` puts a `UnitOfWork` in `info.context["db"]`. It behaves like
+an `AsyncMySQLConnection` (fetchall / fetchone / execute / executemany /
+lastrowid) but only borrows a pooled connection on the first statement, and
+every resolver of the operation shares that connection. A dashboard query
+selecting students, events, groups and volunteers therefore checks out one
+connection instead of one per resolver.
+
+Query resolvers run concurrently and one connection can only run one
+statement at a time, so statements are serialized with a lock.
+
+For mutations, `UnitOfWorkExtension` opens a transaction on the first
+statement and commits it once the whole operation has run without errors
+(otherwise it rolls back). Side effects that must only happen after the
+data is committed - cache invalidation, Redis and Mongo cleanup - are
+registered with `after_commit`.
+"""
+import asyncio
+from typing import Awaitable, Callable, List, Tuple
+
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from database import MYSQL_ERRORS, get_async_mysql_conn
+
+
+class UnitOfWork:
+    """Lazily borrowed MySQL connection shared by the resolvers of one operation."""
+
+    def __init__(self):
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._in_transaction = False
+        self._after_commit: List[Tuple[Callable[..., Awaitable], tuple]] = []
+        # Set by UnitOfWorkExtension for mutations
+        self.transactional = False
+        self.lastrowid = None
+
+    async def _connection(self):
+        """The shared connection, borrowed on first use (lock held)."""
+        if self._conn is not None and self._conn.broken:
+            if self._in_transaction:
+                raise RuntimeError("MySQL connection was lost in the middle of a transaction")
+            await self._conn.close()
+            self._conn = None
+        if self._conn is None:
+            self._conn = await get_async_mysql_conn()
+            if self.transactional:
+                await self._conn.begin()
+                self._in_transaction = True
+        return self._conn
+
+    async def _run(self, method: str, sql, params):
+        async with self._lock:
+            conn = await self._connection()
+            result = await getattr(conn, method)(sql, params)
+            self.lastrowid = conn.lastrowid
+            return result
+
+    async def fetchall(self, sql, params=()):
+        return await self._run("fetchall", sql, params)
+
+    async def fetchone(self, sql, params=()):
+        return await self._run("fetchone", sql, params)
+
+    async def execute(self, sql, params=()):
+        """Run a statement and return its rowcount (lastrowid is kept on self)."""
+        return await self._run("execute", sql, params)
+
+    async def executemany(self, sql, seq_params):
+        return await self._run("executemany", sql, seq_params)
+
+    async def after_commit(self, fn: Callable[..., Awaitable], *args) -> None:
+        """Await `fn(*args)` once the operation's writes are committed (immediately outside a mutation)."""
+        if self.transactional:
+            self._after_commit.append((fn, args))
+        else:
+            await fn(*args)
+
+    async def finish(self, commit: bool) -> None:
+        """Commit or roll back, return the connection, then run after-commit hooks."""
+        async with self._lock:
+            conn, self._conn = self._conn, None
+            hooks, self._after_commit = self._after_commit, []
+            in_transaction, self._in_transaction = self._in_transaction, False
+            try:
+                if conn is not None and in_transaction:
+                    if commit:
+                        await conn.commit()
+                    else:
+                        await conn.rollback()
+            finally:
+                if conn is not None:
+                    await conn.close()
+
+        if not commit:
+            return
+        for fn, args in hooks:
+            try:
+                await fn(*args)
+            except Exception as e:
+                # The data is already committed; report rather than fail the response
+                print(f"after-commit hook {getattr(fn, '__qualname__', fn)} failed: {e}")
+
+    async def close(self) -> None:
+        """Return the connection if the operation never finished (rolls back)."""
+        if self._conn is not None:
+            await self.finish(commit=False)
+
+
+class UnitOfWorkExtension(SchemaExtension):
+    """Runs mutations in one transaction and returns the operation's connection."""
+
+    async def on_execute(self):
+        context = self.execution_context.context
+        uow = context.get("db") if isinstance(context, dict) else None
+        if uow is None:
+            yield
+            return
+
+        uow.transactional = self.execution_context.operation_type == OperationType.MUTATION
+        yield
+
+        result = self.execution_context.result
+        ok = result is not None and not result.errors
+        try:
+            await uow.finish(commit=ok)
+        except MYSQL_ERRORS as e:
+            if result is not None:
+                result.data = None
+                result.errors = list(result.errors or []) + [GraphQLError(f"Transaction failed: {e}")]